@@ -1,16 +1,25 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from streamlit_option_menu import option_menu
 from numerize.numerize import numerize
-import plotly.graph_objects as go
-from scipy import stats
-import io
-import openpyxl
+import result_cache
+import downsample
+import export
+import table
+import materials
+import watcher
+import instrument
+import service
+import metrics
+import spc
+import usage
 
 # Konfigurasi halaman
 st.set_page_config(page_title="Duta Beton Mandiri", page_icon="🚀", layout="wide")
 
+# Waktu per tahap rerun ini (lihat instrument.py); panel admin tampil dengan ?admin=1 di URL
+instrument.begin()
+
 # CSS Styling
 st.markdown("""
     <style>
@@ -85,26 +94,43 @@ st.markdown("""
     """, unsafe_allow_html=True)
 st.markdown("##")
 
-# Fungsi untuk load dan preprocessing data
-@st.cache_data
-def load_data(file_path, sheet_name="Sheet1"):
+# Fungsi untuk load dan preprocessing data (lewat cache Arrow di Source/.cache).
+# Session membaca snapshot dataset dari watcher; perubahan workbook di-load dan
+# diproses di thread background, jadi session tidak menunggu parsing Excel.
+# Sumber data dan backend query diatur di service.py.
+def load_data(name):
     try:
-        df = pd.read_excel(file_path, sheet_name=sheet_name)
-        df["TANGGAL"] = pd.to_datetime(df["TANGGAL"], errors='coerce')
-        df["YEARS"] = df["TANGGAL"].dt.year
-        df["MONTH"] = df["TANGGAL"].dt.month
-        df["DAYS"] = df["TANGGAL"].dt.day
-        return df
-    except FileNotFoundError:
-        st.error(f"File {file_path} tidak ditemukan. Pastikan file ada di direktori yang benar.")
+        with instrument.stage(f"load_data:{name}") as timing:
+            df, version = service.snapshot(name)
+            timing["rows"] = len(df)
+        return df, version
+    except FileNotFoundError as e:
+        st.error(f"File {e} tidak ditemukan. Pastikan file ada di direktori yang benar.")
         st.stop()
     except Exception as e:
         st.error(f"Terjadi kesalahan saat membaca file: {e}")
         st.stop()
 
 # Load data untuk kedua halaman
-df_production = load_data("Source/Production.xlsx")
-df_used = load_data("Source/Used.xlsx")
+df_production, production_version = load_data("Production")
+df_used, used_version = load_data("Used")
+watcher.start()
+data_production = service.get_data("Production", df_production, production_version)
+data_used = service.get_data("Used", df_used, used_version)
+
+# Join pemakaian material x output produksi untuk halaman Usage (lihat usage.py); dihitung
+# watcher bersama snapshot, jadi di sini biasanya hanya mengambil dari cache
+with instrument.stage("load_data:Usage") as timing:
+    df_usage, usage_version = service.usage_join(data_production, production_version, data_used, used_version)
+    timing["rows"] = len(df_usage)
+data_usage = service.get_usage_data(df_usage, usage_version)
+
+# API HTTP KPI (lihat api.py) di thread proses ini, berbagi dataset dan result cache dengan
+# halaman; None = tidak dijalankan (API bisa juga dijalankan sendiri dengan `python api.py`)
+API_PORT = None
+if API_PORT is not None:
+    import api
+    api.start(API_PORT)
 
 # Dictionary bulan
 month_dict = {
@@ -113,20 +139,25 @@ month_dict = {
     9: "September", 10: "October", 11: "November", 12: "December"
 }
 
-# Fungsi untuk membuat opsi filter
-def get_filter_options(df):
-    years_list = sorted(df["YEARS"].dropna().astype(int).unique())
-    months_list = [month_dict[m] for m in sorted(df["MONTH"].dropna().astype(int).unique())]
-    mesin_list = sorted(df["MESIN"].dropna().unique())
-    product_list = sorted(df["NAMA_PRODUCT"].dropna().unique())
-    return years_list, months_list, mesin_list, product_list
-
-# Fungsi untuk menampilkan filter sidebar
-def display_filters(df, page_name):
+# Fungsi untuk membuat opsi filter: pilihan satu kolom yang masih punya data untuk pilihan
+# kolom sebelumnya (tahun -> bulan -> mesin -> produk)
+def get_filter_options(data, page_name, version, column, selected):
+    options = service.dependent_options(page_name, data, version, column, selected)
+    return [month_dict[m] for m in options] if column == "MONTH" else options
+
+# Pilihan manual yang masih ada di daftar pilihan baru, supaya mempersempit filter
+# sebelumnya tidak mengosongkan pilihan yang masih berlaku
+def kept_selection(key, options):
+    available = set(options)
+    return [value for value in st.session_state.get(key, []) if value in available]
+
+# Fungsi untuk menampilkan filter sidebar. Pilihan filter dan rentang tanggal dihitung
+# sekali per versi dataset, bukan di setiap rerun; pilihan bulan, mesin dan produk
+# bertingkat mengikuti filter di atasnya.
+def display_filters(data, page_name, version):
     st.sidebar.markdown(f"### {page_name} Filters")
     
-    min_date = df["TANGGAL"].min()
-    max_date = df["TANGGAL"].max()
+    min_date, max_date = service.date_bounds(page_name, data, version)
     
     if f"{page_name}_date_range" not in st.session_state:
         st.session_state[f"{page_name}_date_range"] = [min_date, max_date]
@@ -144,56 +175,78 @@ def display_filters(df, page_name):
     
     st.sidebar.header(f"{page_name} Filter Options")
     
-    years_list, months_list, mesin_list, product_list = get_filter_options(df)
-    
+    years_list = get_filter_options(data, page_name, version, "YEARS", {})
     select_all_years = st.sidebar.checkbox(f"Select All {page_name} Years", value=True, key=f"{page_name}_years")
-    years = st.sidebar.multiselect(f"Select {page_name} Years", options=years_list, default=years_list if select_all_years else [], key=f"{page_name}_years_select")
+    years = st.sidebar.multiselect(f"Select {page_name} Years", options=years_list, default=years_list if select_all_years else kept_selection(f"{page_name}_years_select", years_list), key=f"{page_name}_years_select")
     
+    months_list = get_filter_options(data, page_name, version, "MONTH", {"YEARS": years})
     select_all_months = st.sidebar.checkbox(f"Select All {page_name} Months", value=True, key=f"{page_name}_months")
-    month_selection = st.sidebar.multiselect(f"Select {page_name} Months", options=months_list, default=months_list if select_all_months else [], key=f"{page_name}_months_select")
+    month_selection = st.sidebar.multiselect(f"Select {page_name} Months", options=months_list, default=months_list if select_all_months else kept_selection(f"{page_name}_months_select", months_list), key=f"{page_name}_months_select")
     months = [k for k, v in month_dict.items() if v in month_selection]
     
+    mesin_list = get_filter_options(data, page_name, version, "MESIN", {"YEARS": years, "MONTH": months})
     select_all_mesin = st.sidebar.checkbox(f"Select All {page_name} Machines", value=True, key=f"{page_name}_mesin")
-    mesin = st.sidebar.multiselect(f"Select {page_name} Machine", options=mesin_list, default=mesin_list if select_all_mesin else [], key=f"{page_name}_mesin_select")
+    mesin = st.sidebar.multiselect(f"Select {page_name} Machine", options=mesin_list, default=mesin_list if select_all_mesin else kept_selection(f"{page_name}_mesin_select", mesin_list), key=f"{page_name}_mesin_select")
     
+    product_list = get_filter_options(data, page_name, version, "NAMA_PRODUCT", {"YEARS": years, "MONTH": months, "MESIN": mesin})
     select_all_product = st.sidebar.checkbox(f"Select All {page_name} Products", value=True, key=f"{page_name}_product")
-    product = st.sidebar.multiselect(f"Select {page_name} Product", options=product_list, default=product_list if select_all_product else [], key=f"{page_name}_product_select")
+    product = st.sidebar.multiselect(f"Select {page_name} Product", options=product_list, default=product_list if select_all_product else kept_selection(f"{page_name}_product_select", product_list), key=f"{page_name}_product_select")
     
     return years, months, mesin, product, start_date, end_date
 
-# Fungsi untuk filter DataFrame
-def filter_dataframe(df, years, months, mesin, product, start_date, end_date):
-    return df[
-        (df["YEARS"].isin(years)) &
-        (df["MONTH"].isin(months)) &
-        (df["MESIN"].isin(mesin)) &
-        (df["NAMA_PRODUCT"].isin(product)) &
-        (df["TANGGAL"] >= pd.to_datetime(start_date)) &
-        (df["TANGGAL"] <= pd.to_datetime(end_date))
-    ]
-
-# Fungsi untuk ekspor data
-def export_data(df, page_name):
+# Fungsi untuk tabel data (fragment: mengganti kolom tidak membuat ulang grafik)
+# Hanya satu halaman baris yang dikirim ke browser; sort dan pencarian dilakukan di server
+@st.fragment
+def display_tabular(df, page_name, version, selection):
+    with instrument.stage("table", rows=len(df)), st.expander(f"{page_name} Tabular"):
+        show_data = st.multiselect(f'Filter {page_name} Columns: ', df.columns, default=[], key=f"{page_name.lower()}_columns")
+        columns = show_data if show_data else list(df.columns)
+
+        col1, col2, col3, col4, col5 = st.columns([2, 3, 2, 1, 1])
+        search_column = col1.selectbox("Search Column", columns, key=f"{page_name}_table_search_column")
+        query = col2.text_input("Search", key=f"{page_name}_table_search").strip()
+        sort_by = col3.selectbox("Sort By", ["(none)"] + columns, key=f"{page_name}_table_sort")
+        ascending = col4.radio("Order", ["Asc", "Desc"], key=f"{page_name}_table_order") == "Asc"
+        page_size = col5.selectbox("Rows", table.PAGE_SIZES, index=table.PAGE_SIZES.index(table.DEFAULT_PAGE_SIZE), key=f"{page_name}_table_page_size")
+        sort_by = None if sort_by == "(none)" else sort_by
+
+        positions = result_cache.results.get_or_compute(
+            page_name, version, "table", (selection, search_column, query, sort_by, ascending),
+            lambda: table.row_positions(df, sort_by, ascending, search_column, query))
+
+        n_pages = table.page_count(len(positions), page_size)
+        page_key = f"{page_name}_table_page"
+        if st.session_state.get(page_key, 1) > n_pages:
+            st.session_state[page_key] = n_pages
+        page_number = st.number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, step=1, key=page_key)
+
+        st.dataframe(table.page(df, positions, page_number, page_size, columns))
+        first = min((page_number - 1) * page_size + 1, len(positions))
+        last = min(page_number * page_size, len(positions))
+        st.caption(f"Rows {first:,}–{last:,} of {len(positions):,}")
+
+# Fungsi untuk ekspor data (fragment: klik download tidak menjalankan ulang seluruh halaman)
+# File ekspor baru dibuat saat tombol diklik, lalu di-cache per seleksi filter
+@st.fragment
+def export_data(df, page_name, version, selection):
     with st.expander(f"📁 Export {page_name} Filtered Data"):
         st.markdown(f"Download hasil filter {page_name} dalam format yang Anda inginkan:")
-        
-        st.download_button(
-            label="⬇️ Download CSV",
-            data=df.to_csv(index=False),
-            file_name=f"{page_name.lower()}_filtered_data.csv",
-            mime="text/csv",
-            key=f"download_csv_{page_name}"
-        )
-        
-        buffer = io.BytesIO()
-        df.to_excel(buffer, index=False, engine='openpyxl')
-        st.download_button(
-            label="⬇️ Download Excel",
-            data=buffer,
-            file_name=f"{page_name.lower()}_filtered_data.xlsx",
-            mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            key=f"download_excel_{page_name}"
-        )
+
+        for fmt, label in [("csv", "CSV"), ("excel", "Excel"), ("parquet", "Parquet")]:
+            extension, mime = export.FORMATS[fmt]
+            st.download_button(
+                label=f"⬇️ Download {label}",
+                data=lambda fmt=fmt: timed_artifact(df, page_name, version, selection, fmt),
+                file_name=f"{page_name.lower()}_filtered_data.{extension}",
+                mime=mime,
+                on_click="ignore",
+                key=f"download_{fmt}_{page_name}"
+            )
+
+# File ekspor dibuat di luar rerun (saat tombol diklik), jadi dicatat sebagai run tersendiri
+def timed_artifact(df, page_name, version, selection, fmt):
+    with instrument.stage(f"export:{fmt}", rows=len(df)):
+        return export.get_artifact(df, page_name, version, selection, fmt)
 
 # Fungsi untuk progress bar (khusus Production)
 def progress_bar(df, page_name):
@@ -207,68 +260,6 @@ def progress_bar(df, page_name):
     else:
         st.write(f"{page_name} Progress: {percent}% of {int(target):,} Pcs")
 
-# Fungsi untuk perhitungan metrik (khusus Production)
-def calculate_metrics(df):
-    total_finishgood = float(df["ACTUAL_QTY"].sum())
-    production_mean = float(df["ACTUAL_QTY"].mean())
-    total_reject = float(df["REJECT"].sum()) if "REJECT" in df.columns else 0
-    reject_mean = float(df["REJECT"].mean()) if "REJECT" in df.columns else 0
-
-    max_single_qty_row = df.loc[df["ACTUAL_QTY"].idxmax()]
-    max_single_product = max_single_qty_row["NAMA_PRODUCT"]
-    max_single_qty = max_single_qty_row["ACTUAL_QTY"]
-
-    min_single_qty_row = df.loc[df["ACTUAL_QTY"].idxmin()]
-    min_single_product = min_single_qty_row["NAMA_PRODUCT"]
-    min_single_qty = min_single_qty_row["ACTUAL_QTY"]
-
-    grouped_product = df.groupby("NAMA_PRODUCT")[["ACTUAL_QTY", "REJECT"]].sum() if "REJECT" in df.columns else df.groupby("NAMA_PRODUCT")[["ACTUAL_QTY"]].sum()
-    max_actual_qty_product = grouped_product["ACTUAL_QTY"].idxmax()
-    max_actual_qty_value = grouped_product["ACTUAL_QTY"].max()
-    min_actual_qty_product = grouped_product["ACTUAL_QTY"].idxmin()
-    min_actual_qty_value = grouped_product["ACTUAL_QTY"].min()
-
-    if "REJECT" in df.columns:
-        max_reject_product = grouped_product["REJECT"].idxmax()
-        max_reject_value = grouped_product["REJECT"].max()
-        min_reject_product = grouped_product["REJECT"].idxmin()
-        min_reject_value = grouped_product["REJECT"].min()
-    else:
-        max_reject_product = min_reject_product = "N/A"
-        max_reject_value = min_reject_value = 0
-
-    total_unit_all = total_finishgood + total_reject
-    dpu = (total_reject / total_unit_all) * 100 if total_unit_all != 0 and "REJECT" in df.columns else 0
-
-    def calculate_dpmo_sigma(defect, total_unit, opp_per_unit):
-        dpmo = (defect / (total_unit * opp_per_unit)) * 1_000_000 if total_unit * opp_per_unit != 0 else 0
-        sigma = stats.norm.ppf(1 - dpmo / 1_000_000) + 1.5 if dpmo < 1_000_000 else 0
-        return dpmo, sigma
-
-    dpmo, sigma = calculate_dpmo_sigma(defect=total_reject, total_unit=total_unit_all, opp_per_unit=5) if "REJECT" in df.columns else (0, 0)
-
-    return {
-        "total_finishgood": total_finishgood,
-        "production_mean": production_mean,
-        "total_reject": total_reject,
-        "reject_mean": reject_mean,
-        "max_single_product": max_single_product,
-        "max_single_qty": max_single_qty,
-        "min_single_product": min_single_product,
-        "min_single_qty": min_single_qty,
-        "max_actual_qty_product": max_actual_qty_product,
-        "max_actual_qty_value": max_actual_qty_value,
-        "min_actual_qty_product": min_actual_qty_product,
-        "min_actual_qty_value": min_actual_qty_value,
-        "max_reject_product": max_reject_product,
-        "max_reject_value": max_reject_value,
-        "min_reject_product": min_reject_product,
-        "min_reject_value": min_reject_value,
-        "dpu": dpu,
-        "dpmo": dpmo,
-        "sigma": sigma
-    }
-
 # Fungsi untuk menampilkan metrik (khusus Production)
 def display_metrics(metrics, page_name):
     col1, col2, col3, col4 = st.columns(4)
@@ -339,20 +330,46 @@ def display_metrics(metrics, page_name):
 
     st.markdown("""---""")
 
-# Fungsi untuk visualisasi (khusus Production)
-def display_graphs(df, page_name):
-    distribusi_produk = df.groupby("NAMA_PRODUCT")[["ACTUAL_QTY"]].sum()
-    distribusi_produk["PERCENT"] = distribusi_produk["ACTUAL_QTY"] / distribusi_produk["ACTUAL_QTY"].sum()
-
-    hasil_utama = distribusi_produk[distribusi_produk["PERCENT"] >= 0.01]
-    hasil_lainnya = distribusi_produk[distribusi_produk["PERCENT"] < 0.01]
-
-    if not hasil_lainnya.empty:
-        total_lainnya = hasil_lainnya["ACTUAL_QTY"].sum()
-        hasil_utama.loc["Lainnya"] = [total_lainnya, total_lainnya / distribusi_produk["ACTUAL_QTY"].sum()]
-
-    hasil_utama = hasil_utama.sort_values(by="ACTUAL_QTY", ascending=False)
+# Fungsi pembuat figure per grafik (khusus Production). plotly di-import di dalam fungsi
+# supaya baru dimuat saat grafik pertama dibuat, bukan saat proses start.
+def fig_pareto_machine(data, page_name):
+    import plotly.graph_objects as go
+    reject_mesin = data["reject_mesin"]
+    fig_paretomachine = go.Figure()
+
+    fig_paretomachine.add_trace(
+        go.Bar(
+            x=reject_mesin.index,
+            y=reject_mesin["REJECT"],
+            name="Reject Qty",
+            marker=dict(color="#0083b8"),
+            yaxis="y1"
+        )
+    )
+    fig_paretomachine.add_trace(
+        go.Scatter(
+            x=reject_mesin.index,
+            y=reject_mesin["CUMPCT"],
+            name="Cumulative %",
+            yaxis="y2",
+            marker=dict(color="orange"),
+            mode="lines+markers"
+        )
+    )
+    fig_paretomachine.update_layout(
+        title=f"<b>{page_name} Pareto Chart: Reject per Machine</b>",
+        yaxis=dict(title="Number of Reject", showgrid=False),
+        yaxis2=dict(title="Cumulative %", overlaying="y", side="right", showgrid=False, range=[0, 110]),
+        xaxis=dict(title="Machine"),
+        legend=dict(x=0.7, y=1.1),
+        template="plotly_white",
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+    return fig_paretomachine
 
+def fig_distribution(data, page_name):
+    import plotly.express as px
+    hasil_utama = data["distribusi_produk"]
     fig_produksi = px.pie(
         hasil_utama,
         values="ACTUAL_QTY",
@@ -361,97 +378,83 @@ def display_graphs(df, page_name):
         color_discrete_sequence=px.colors.qualitative.Set3
     )
     fig_produksi.update_layout(template="plotly_white")
-
-    if "REJECT" in df.columns:
-        reject_mesin = df.groupby("MESIN")[["REJECT"]].sum().sort_values(by="REJECT", ascending=False)
-        reject_mesin["CUMSUM"] = reject_mesin["REJECT"].cumsum()
-        reject_mesin["CUMPCT"] = 100 * reject_mesin["CUMSUM"] / reject_mesin["REJECT"].sum()
-
-        fig_paretomachine = go.Figure()
-
-        fig_paretomachine.add_trace(
-            go.Bar(
-                x=reject_mesin.index,
-                y=reject_mesin["REJECT"],
-                name="Reject Qty",
-                marker=dict(color="#0083b8"),
-                yaxis="y1"
-            )
-        )
-        fig_paretomachine.add_trace(
-            go.Scatter(
-                x=reject_mesin.index,
-                y=reject_mesin["CUMPCT"],
-                name="Cumulative %",
-                yaxis="y2",
-                marker=dict(color="orange"),
-                mode="lines+markers"
-            )
-        )
-        fig_paretomachine.update_layout(
-            title=f"<b>{page_name} Pareto Chart: Reject per Machine</b>",
-            yaxis=dict(title="Number of Reject", showgrid=False),
-            yaxis2=dict(title="Cumulative %", overlaying="y", side="right", showgrid=False, range=[0, 110]),
-            xaxis=dict(title="Machine"),
-            legend=dict(x=0.7, y=1.1),
-            template="plotly_white",
-            plot_bgcolor="rgba(0,0,0,0)"
-        )
-
-        reject_produk = df.groupby("NAMA_PRODUCT")[["REJECT"]].sum().sort_values(by="REJECT", ascending=False)
-        reject_produk["CUMSUM"] = reject_produk["REJECT"].cumsum()
-        reject_produk["CUMPCT"] = 100 * reject_produk["CUMSUM"] / reject_produk["REJECT"].sum()
-
-        fig_paretoproduct = go.Figure()
-        fig_paretoproduct.add_trace(
-            go.Bar(
-                x=reject_produk.index,
-                y=reject_produk["REJECT"],
-                name="Reject Qty",
-                marker=dict(color="#d62728"),
-                yaxis="y1"
-            )
-        )
-        fig_paretoproduct.add_trace(
-            go.Scatter(
-                x=reject_produk.index,
-                y=reject_produk["CUMPCT"],
-                name="Cumulative %",
-                yaxis="y2",
-                marker=dict(color="orange"),
-                mode="lines+markers"
-            )
-        )
-        fig_paretoproduct.update_layout(
-            title=f"<b>{page_name} Pareto Chart: Reject per Product</b>",
-            yaxis=dict(title="Number of Reject", showgrid=False),
-            yaxis2=dict(title="Cumulative %", overlaying="y", side="right", showgrid=False, range=[0, 110]),
-            xaxis=dict(title="Product Name"),
-            legend=dict(x=0.7, y=1.1),
-            template="plotly_white",
-            plot_bgcolor="rgba(0,0,0,0)"
-        )
-
-        reject_trend = df.groupby("TANGGAL")["REJECT"].sum().reset_index()
-        fig_reject_trend = px.line(
-            reject_trend,
-            x="TANGGAL",
-            y="REJECT",
-            title=f"<b>{page_name} Trend of Reject per Month</b>",
-            markers=True,
-            color_discrete_sequence=["#ff0000"]
+    return fig_produksi
+
+def fig_pareto_product(data, page_name):
+    import plotly.graph_objects as go
+    reject_produk = data["reject_produk"]
+    fig_paretoproduct = go.Figure()
+    fig_paretoproduct.add_trace(
+        go.Bar(
+            x=reject_produk.index,
+            y=reject_produk["REJECT"],
+            name="Reject Qty",
+            marker=dict(color="#d62728"),
+            yaxis="y1"
         )
-        fig_reject_trend.update_layout(
-            xaxis_title="Date",
-            yaxis_title="Number of Reject",
-            plot_bgcolor="rgba(0,0,0,0)",
-            template="plotly_white"
+    )
+    fig_paretoproduct.add_trace(
+        go.Scatter(
+            x=reject_produk.index,
+            y=reject_produk["CUMPCT"],
+            name="Cumulative %",
+            yaxis="y2",
+            marker=dict(color="orange"),
+            mode="lines+markers"
         )
-
+    )
+    fig_paretoproduct.update_layout(
+        title=f"<b>{page_name} Pareto Chart: Reject per Product</b>",
+        yaxis=dict(title="Number of Reject", showgrid=False),
+        yaxis2=dict(title="Cumulative %", overlaying="y", side="right", showgrid=False, range=[0, 110]),
+        xaxis=dict(title="Product Name"),
+        legend=dict(x=0.7, y=1.1),
+        template="plotly_white",
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+    return fig_paretoproduct
+
+def fig_reject_trend(data, page_name, zoom=None):
+    import plotly.express as px
+    reject_trend = data["reject_trend"]
+    if zoom is not None:
+        start, end = pd.to_datetime(zoom[0]), pd.to_datetime(zoom[1])
+        reject_trend = reject_trend[(reject_trend["TANGGAL"] >= start) & (reject_trend["TANGGAL"] <= end)]
+    # Rentang panjang: hanya titik min/max per minggu/bulan yang dikirim ke browser
+    reject_trend, bucket = downsample.downsample(reject_trend, "TANGGAL", "REJECT")
+    fig_reject_trend = px.line(
+        reject_trend,
+        x="TANGGAL",
+        y="REJECT",
+        title=f"<b>{page_name} Trend of Reject per Month</b>",
+        markers=True,
+        color_discrete_sequence=["#ff0000"]
+    )
+    fig_reject_trend.update_layout(
+        xaxis_title=f"Date (min/max per {bucket})" if bucket else "Date",
+        yaxis_title="Number of Reject",
+        plot_bgcolor="rgba(0,0,0,0)",
+        template="plotly_white"
+    )
+    return fig_reject_trend
+
+# Kontrol zoom untuk trend reject: rentang yang lebih sempit ditampilkan dengan resolusi penuh
+def reject_trend_controls(container, data, page_name):
+    dates = data["reject_trend"]["TANGGAL"]
+    first, last = dates.min().date(), dates.max().date()
+    if first == last:
+        return {}
+    zoom = container.slider(f"Zoom {page_name} Reject Trend", min_value=first, max_value=last,
+                            value=(first, last), key=f"{page_name}_trend_zoom")
+    return {"zoom": zoom} if zoom != (first, last) else {}
+
+def fig_production_per_product(data, page_name):
+    import plotly.express as px
+    produksi_produk = data["produksi_produk"]
     fig_bar_produk = px.bar(
-        df.groupby("NAMA_PRODUCT")["ACTUAL_QTY"].sum().sort_values(ascending=True),
+        produksi_produk,
         x="ACTUAL_QTY",
-        y=df.groupby("NAMA_PRODUCT")["ACTUAL_QTY"].sum().sort_values(ascending=True).index,
+        y=produksi_produk.index,
         orientation="h",
         title=f"<b>{page_name} Production Amount per Product</b>",
         color_discrete_sequence=["#00cc96"],
@@ -462,134 +465,344 @@ def display_graphs(df, page_name):
         yaxis_title="Product Name",
         plot_bgcolor="rgba(0,0,0,0)"
     )
+    return fig_bar_produk
+
+# Daftar grafik Production: (label tab, id grafik, fungsi pembuat, butuh kolom REJECT,
+# fungsi kontrol tambahan atau None)
+PRODUCTION_CHARTS = [
+    ("Reject per Machine", "pareto_machine", fig_pareto_machine, True, None),
+    ("Production Distribution", "distribution", fig_distribution, False, None),
+    ("Reject per Product", "pareto_product", fig_pareto_product, True, None),
+    ("Reject Trend", "reject_trend", fig_reject_trend, True, reject_trend_controls),
+    ("Production per Product", "production_per_product", fig_production_per_product, False, None),
+]
+
+# Figure yang di-cache disimpan sebagai spec JSON plotly beserta tingginya, jadi rerun tidak
+# perlu men-serialize ulang Figure (st.plotly_chart selalu memanggil plotly.io.to_json)
+def figure_spec(fig):
+    import plotly.io
+    return plotly.io.to_json(fig, validate=False), fig.layout.height or 450
+
+# Tampilkan spec dari figure_spec lewat proto PlotlyChart, sama seperti yang dilakukan
+# st.plotly_chart(fig, width="stretch") untuk grafik tanpa seleksi
+def plotly_spec_chart(container, spec, height):
+    from streamlit.elements.lib.form_utils import current_form_id
+    from streamlit.elements.lib.layout_utils import LayoutConfig
+    from streamlit.elements.lib.utils import compute_and_register_element_id
+    from streamlit.proto.PlotlyChart_pb2 import PlotlyChart
+
+    proto = PlotlyChart(spec=spec, config="{}", theme="streamlit", form_id=current_form_id(container))
+    proto.id = compute_and_register_element_id(
+        "plotly_chart", user_key=None, key_as_main_identity=False, dg=container,
+        plotly_spec=proto.spec, plotly_config=proto.config, selection_mode=("points", "box", "lasso"),
+        is_selection_activated=False, theme="streamlit", width="stretch", height="content", alt=None)
+    container._enqueue("plotly_chart", proto, layout_config=LayoutConfig(width="stretch", height=height))
+
+# Fungsi untuk visualisasi (khusus Production). Setiap grafik ada di tab sendiri dan hanya
+# tab yang terbuka yang dibuat; spec figure di-cache per (versi, seleksi, id grafik).
+def display_graphs(data, page_name, version, selection):
+    charts = [chart for chart in PRODUCTION_CHARTS if "reject_mesin" in data or not chart[3]]
+    tabs = st.tabs([chart[0] for chart in charts], key=f"{page_name}_charts", on_change="rerun")
+
+    for tab, (label, chart_id, build_figure, _, controls) in zip(tabs, charts):
+        if not tab.open:
+            continue
+        options = controls(tab, data, page_name) if controls else {}
+        spec, height = result_cache.results.get_or_compute(
+            page_name, version, f"figure:{chart_id}:{sorted(options.items())}", selection,
+            lambda: figure_spec(build_figure(data, page_name, **options)))
+        plotly_spec_chart(tab, spec, height)
+
+# Control chart satu mesin/produk: reject rate harian dengan CL dan batas Laney 3σ (p′-chart
+# atau u′-chart, lihat spc.py), reject rate bergulir, titik yang melanggar aturan Western
+# Electric (di atas CL = out of control, di bawah CL = perbaikan), dan rata-rata output
+# bergulir di sumbu kanan
+def fig_control_chart(series, name, chart_type, page_name):
+    import plotly.graph_objects as go
+    prefix = "P" if chart_type == "p′-chart" else "U"
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=series.index, y=series["RATE"], name="Reject rate", mode="lines+markers",
+                             marker=dict(color="#0083b8", size=5), line=dict(width=1)))
+    fig.add_trace(go.Scatter(x=series.index, y=series["CL"], name="CL", mode="lines", line=dict(color="green")))
+    for column, label in ((f"{prefix}_UCL", "UCL"), (f"{prefix}_LCL", "LCL")):
+        fig.add_trace(go.Scatter(x=series.index, y=series[column], name=label, mode="lines",
+                                 line=dict(color="#dc3545", dash="dash", shape="hv")))
+    fig.add_trace(go.Scatter(x=series.index, y=series["ROLL_RATE"], name=f"Reject rate {spc.ROLL_DAYS} hari",
+                             mode="lines", line=dict(color="orange")))
+    violations = series[series["RULES"] > 0]
+    for label, points, color in (("Out of control", violations[violations["Z"] > 0], "#dc3545"),
+                                 ("Perbaikan (di bawah CL)", violations[violations["Z"] < 0], "green")):
+        fig.add_trace(go.Scatter(
+            x=points.index, y=points["RATE"], name=label, mode="markers",
+            marker=dict(color=color, size=9, symbol="x"),
+            text=[", ".join(text for bit, text in spc.RULES.items() if rules & bit) for rules in points["RULES"]],
+            hovertemplate="%{x|%d %b %Y}: %{y:.2%}<br>%{text}<extra></extra>"))
+    fig.add_trace(go.Scatter(x=series.index, y=series["ROLL_QTY"], name=f"Rata-rata output {spc.ROLL_DAYS} hari",
+                             mode="lines", yaxis="y2", line=dict(color="#bbbbbb", width=1)))
+    fig.update_layout(
+        title=f"<b>{page_name} {chart_type}: {name}</b>",
+        yaxis=dict(title="Reject rate" if prefix == "P" else "Reject per unit", tickformat=".1%", showgrid=False),
+        yaxis2=dict(title="Output/hari", overlaying="y", side="right", showgrid=False),
+        xaxis=dict(title="Date"),
+        legend=dict(orientation="h", y=-0.2),
+        template="plotly_white",
+        plot_bgcolor="rgba(0,0,0,0)"
+    )
+    return fig
+
+# Control chart dan daftar mesin/produk out-of-control untuk seleksi (khusus Production).
+# Fragment: mengganti level atau seri tidak menjalankan ulang seluruh halaman.
+@st.fragment
+def display_control_charts(stats, page_name, version, filters, selection):
+    with st.expander(f"📈 {page_name} Control Charts (SPC)"):
+        col1, col2 = st.columns(2)
+        level_label = col1.radio("Level", ["Machine", "Product"], horizontal=True, key=f"{page_name}_spc_level")
+        chart_type = col2.radio("Chart", ["p′-chart", "u′-chart"], horizontal=True, key=f"{page_name}_spc_chart")
+        level = "mesin" if level_label == "Machine" else "product"
+
+        flagged = service.out_of_control(stats, version, level, filters, selection)
+        st.markdown(f"**Out-of-control {level_label.lower()}s** (aturan Western Electric di atas CL, dalam rentang tanggal filter)")
+        if flagged.empty:
+            st.caption("Tidak ada pelanggaran.")
+        else:
+            st.dataframe(
+                flagged.reset_index().rename(columns={f"RULE_{bit}": text for bit, text in spc.RULES.items()}),
+                hide_index=True,
+                column_config={
+                    "VIOLATION_DAYS": st.column_config.NumberColumn("Hari melanggar"),
+                    "LAST_VIOLATION": st.column_config.DateColumn("Pelanggaran terakhir"),
+                    "LAST_RATE": st.column_config.NumberColumn("Reject rate", format="percent"),
+                    "LAST_CL": st.column_config.NumberColumn("CL", format="percent"),
+                },
+            )
 
-    col_left, col_right = st.columns(2)
-    if "REJECT" in df.columns:
-        col_left.plotly_chart(fig_paretomachine, use_container_width=True)
-    col_right.plotly_chart(fig_produksi, use_container_width=True)
-    if "REJECT" in df.columns:
-        st.plotly_chart(fig_paretoproduct, use_container_width=True)
-        st.plotly_chart(fig_reject_trend, use_container_width=True)
-    st.plotly_chart(fig_bar_produk, use_container_width=True)
-
-def calculate_metrics_used(df):
-    # Daftar material yang ingin ditampilkan
-    target_materials = ["ABU BATU", "STL 5/10", "PASIR LUMAJANG",
-                        "SIRTU AYAK", "SEMEN", "CARBON BLACK",
-                        "CARBON RED", "PIGMENT BLACK 777 HEINRICH JERMAN",
-                        "PIGMENT RED 130 HEINRICH JERMAN", "CARBON TP 130 RED",
-                        "PIGMENT BLACK 330 HEINRICH JERMAN", "PIGMENT TP 130 RED"]
-
-    # Filter hanya baris dengan material tersebut (tanpa terpengaruh kapitalisasi)
-    df = df[df["NAMA_MATERIAL"].str.upper().isin([m.upper() for m in target_materials])]
-
-    grouped = df.groupby("NAMA_MATERIAL")["JUMLAH"].agg(["sum", "mean", "max", "min"]).reset_index()
-
-    metrics = []
-
-    for _, row in grouped.iterrows():
-        metrics.append({
-            "product": row["NAMA_MATERIAL"],
-            "total": row["sum"],
-            "mean": row["mean"],
-            "max": row["max"],
-            "min": row["min"]
-        })
-
-    return metrics
-
+        keys = filters[2] if level == "mesin" else filters[3]
+        options = [*flagged.index, *(key for key in keys if key not in flagged.index)]
+        name = st.selectbox(f"{level_label}", options, key=f"{page_name}_spc_{level}")
+        series = spc.chart(stats[level], name, filters[4], filters[5])
+        if series.empty:
+            st.info(f"Tidak ada produksi {name} dalam rentang tanggal ini.")
+            return
+        st.plotly_chart(fig_control_chart(series, name, chart_type, page_name), use_container_width=True)
+
+# Rincian DPU/DPMO/sigma (khusus Production): grup dengan DPMO tertinggi di atas, per tanggal
+# urut tanggal
+SIGMA_TABS = [("Machine", "mesin"), ("Product", "product"), ("Machine × Product", "mesin_product"), ("Day", "tanggal")]
+
+def display_sigma_breakdown(breakdown, page_name):
+    with st.expander(f"📐 {page_name} Six Sigma Breakdown"):
+        st.caption(f"Peluang cacat per unit per produk diatur di `{metrics.OPPORTUNITIES_FILE}` (default {metrics.DEFAULT_OPPORTUNITIES}).")
+        tabs = st.tabs([label for label, _ in SIGMA_TABS])
+        for tab, (label, level) in zip(tabs, SIGMA_TABS):
+            frame = breakdown[level]
+            if level != "tanggal":
+                frame = frame.sort_values("DPMO", ascending=False, kind="stable")
+            tab.dataframe(
+                frame.reset_index(),
+                hide_index=True,
+                column_config={
+                    "ACTUAL_QTY": st.column_config.NumberColumn("QC Passed", format="%,.0f"),
+                    "REJECT": st.column_config.NumberColumn("Reject", format="%,.0f"),
+                    "UNITS": st.column_config.NumberColumn("Total Output", format="%,.0f"),
+                    "OPPORTUNITIES": st.column_config.NumberColumn("Opportunities", format="%,.0f"),
+                    "DPU": st.column_config.NumberColumn("DPU (%)", format="%.2f%%"),
+                    "DPMO": st.column_config.NumberColumn("DPMO", format="%,.0f"),
+                    "SIGMA": st.column_config.NumberColumn("Sigma Level", format="%.2f"),
+                },
+            )
 
-def display_metrics_used(metrics):
+# Ringkasan material dalam satu tabel (satu baris per material)
+def display_metrics_used(summary):
     st.subheader("Used Materials Metrics")
-
-    for m in metrics:
-        st.markdown(f"""
-            <div style="background-color:#000000; padding: 20px; border-radius: 10px; margin-bottom: 10px;">
-                <b>🔹 {m['product']}</b>
-            </div>
-        """, unsafe_allow_html=True)
-
-        col1, col2, col3, col4 = st.columns(4)
-
-        with col1:
-            st.markdown("""
-                <div style="background-color:#0d6efd; padding: 6px 12px; border-radius: 8px; color: white; font-weight: bold;">
-                    Total Digunakan
-                </div>
-            """, unsafe_allow_html=True)
-            st.metric(label="", value=f"{m['total']:,.2f} Kg")
-
-        with col2:
-            st.markdown("""
-                <div style="background-color:#dba43d; padding: 6px 12px; border-radius: 8px; color: white; font-weight: bold;">
-                    Rata-rata
-                </div>
-            """, unsafe_allow_html=True)
-            st.metric(label="", value=f"{m['mean']:,.2f} Kg")
-
-        with col3:
-            st.markdown("""
-                <div style="background-color:#dc3545; padding: 6px 12px; border-radius: 8px; color: white; font-weight: bold;">
-                    Maksimum
-                </div>
-            """, unsafe_allow_html=True)
-            st.metric(label="", value=f"{m['max']:,.2f} Kg")
-
-        with col4:
-            st.markdown("""
-                <div style="background-color:#198754; padding: 6px 12px; border-radius: 8px; color: white; font-weight: bold;">
-                    Minimum
-                </div>
-            """, unsafe_allow_html=True)
-            st.metric(label="", value=f"{m['min']:,.2f} Kg")
-
-        st.divider()
+    st.dataframe(
+        summary,
+        column_config={
+            "NAMA_MATERIAL": st.column_config.TextColumn("Material"),
+            "TOTAL": st.column_config.ProgressColumn("Total Digunakan", format="%,.2f Kg", min_value=0, max_value=float(summary["TOTAL"].max()) if not summary.empty else 1.0),
+            "MEAN": st.column_config.NumberColumn("Rata-rata", format="%,.2f Kg"),
+            "MAX": st.column_config.NumberColumn("Maksimum", format="%,.2f Kg"),
+            "MIN": st.column_config.NumberColumn("Minimum", format="%,.2f Kg"),
+        },
+    )
 
 # Fungsi untuk halaman Production
 def production_page():
-    years, months, mesin, product, start_date, end_date = display_filters(df_production, "Production")
+    with instrument.stage("filters"):
+        filters = display_filters(data_production, "Production", production_version)
+    years, months, mesin, product, start_date, end_date = filters
     
     if not years or not months or not mesin or not product:
         st.warning("Mohon lengkapi semua filter Production sebelum melanjutkan.")
         st.stop()
     
-    df_production_selection = filter_dataframe(df_production, years, months, mesin, product, start_date, end_date)
+    selection = service.selection_key(filters)
+    with instrument.stage("filter_dataframe") as timing:
+        df_production_selection = service.selected_rows("Production", data_production, production_version, filters, selection)
+        timing["rows"] = len(df_production_selection)
     
     if df_production_selection.empty:
         st.warning("Tidak ada data Production yang sesuai dengan kombinasi filter yang dipilih. Silakan sesuaikan filter.")
         st.stop()
     
-    with st.expander("Production Tabular"):
-        show_data = st.multiselect('Filter Production Columns: ', df_production_selection.columns, default=[], key="production_columns")
-        st.dataframe(df_production_selection[show_data] if show_data else df_production_selection)
-    
-    export_data(df_production_selection, "Production")
-    progress_bar(df_production_selection, "Production")
-    metrics = calculate_metrics(df_production_selection)
-    display_metrics(metrics, "Production")
-    display_graphs(df_production_selection, "Production")
+    display_tabular(df_production_selection, "Production", production_version, selection)
+
+    with instrument.stage("export_data"):
+        export_data(df_production_selection, "Production", production_version, selection)
+
+    # KPI dan grafik dihitung dari cube harian (TANGGAL x MESIN x NAMA_PRODUCT) untuk seleksi
+    # yang sama; cube ikut di-cache supaya backend SQL tidak di-query ulang setiap rerun
+    with instrument.stage("cube") as timing:
+        cube_selection = service.production_cube(data_production, production_version, filters, selection)
+        timing["rows"] = len(cube_selection)
+    progress_bar(cube_selection, "Production")
+
+    # Agregasi (sekali untuk metrik dan semua grafik) di-cache per seleksi filter
+    with instrument.stage("calculate_metrics", rows=len(cube_selection)):
+        agg = service.production_aggregate(production_version, cube_selection, selection)
+        opportunities = metrics.load_opportunities()
+        production_metrics = service.production_metrics(production_version, cube_selection, agg, selection, opportunities)
+        display_metrics(production_metrics, "Production")
+    with instrument.stage("display_graphs"):
+        data = service.production_graphs(production_version, agg, selection)
+        display_graphs(data, "Production", production_version, selection)
+    with instrument.stage("sigma_breakdown", rows=len(cube_selection)):
+        breakdown = service.production_sigma(production_version, cube_selection, selection, opportunities)
+        if breakdown is not None:
+            display_sigma_breakdown(breakdown, "Production")
+    with instrument.stage("control_charts"):
+        stats = service.production_spc(data_production, production_version)
+        if stats is not None:
+            display_control_charts(stats, "Production", production_version, filters, selection)
 
 #Fungsi untuk halaman Used
 def used_page():
-    years, months, mesin, product, start_date, end_date = display_filters(df_used, "Used")
+    with instrument.stage("filters"):
+        filters = display_filters(data_used, "Used", used_version)
+    years, months, mesin, product, start_date, end_date = filters
     
     if not years or not months or not mesin or not product:
         st.warning("Mohon lengkapi semua filter Used sebelum melanjutkan.")
         st.stop()
     
-    df_used_selection = filter_dataframe(df_used, years, months, mesin, product, start_date, end_date)
+    selection = service.selection_key(filters)
+    with instrument.stage("filter_dataframe") as timing:
+        df_used_selection = service.selected_rows("Used", data_used, used_version, filters, selection)
+        timing["rows"] = len(df_used_selection)
     
     if df_used_selection.empty:
         st.warning("Tidak ada data Used yang sesuai dengan kombinasi filter yang dipilih. Silakan sesuaikan filter.")
         st.stop()
 
-    with st.expander("Used Tabular"):
-        show_data = st.multiselect('Filter Used Columns: ', df_used_selection.columns, default=[], key="used_columns")
-        st.dataframe(df_used_selection[show_data] if show_data else df_used_selection)
-    
-    export_data(df_used_selection, "Used")
-    metrics = calculate_metrics_used(df_used_selection)
-    display_metrics_used(metrics)
+    display_tabular(df_used_selection, "Used", used_version, selection)
+
+    with instrument.stage("export_data"):
+        export_data(df_used_selection, "Used", used_version, selection)
+    with instrument.stage("calculate_metrics_used", rows=len(df_used_selection)):
+        material_list = materials.load_material_list()
+        used_metrics = service.material_summary(data_used, used_version, filters, selection, material_list)
+        display_metrics_used(used_metrics)
+
+# Grafik kg per unit untuk satu material: batang per kelompok, atau garis per tanggal
+def fig_usage_per_unit(summary, material, grouping, group_label, page_name):
+    import plotly.express as px
+    data = summary.xs(material, level="NAMA_MATERIAL").reset_index()
+    title = f"<b>{page_name}: {material} per Unit per {group_label}</b>"
+    if grouping == "tanggal":
+        fig = px.line(data, x="TANGGAL", y="KG_PER_UNIT", title=title, markers=True, color_discrete_sequence=["#0083b8"])
+    else:
+        if grouping == "mesin_product":
+            data["GROUP"] = data["MESIN"].astype("str") + " · " + data["NAMA_PRODUCT"].astype("str")
+        else:
+            data["GROUP"] = data[usage.GROUPINGS[grouping][0]].astype("str")
+        data = data.sort_values("KG_PER_UNIT")
+        fig = px.bar(data, x="KG_PER_UNIT", y="GROUP", orientation="h", title=title, color_discrete_sequence=["#00cc96"],
+                     hover_data={"JUMLAH": ":,.2f", "ACTUAL_QTY": ":,.0f"})
+    fig.update_layout(xaxis_title="Kg per Pcs" if grouping != "tanggal" else "Date",
+                      yaxis_title="Kg per Pcs" if grouping == "tanggal" else group_label,
+                      template="plotly_white", plot_bgcolor="rgba(0,0,0,0)")
+    return fig
+
+USAGE_GROUPINGS = {"Product": "product", "Machine": "mesin", "Machine × Product": "mesin_product", "Day": "tanggal"}
+
+# Kg material per pcs untuk seleksi (khusus Usage): tabel kelompok x material dan grafik
+# per material. Fragment: mengganti pengelompokan/material tidak menjalankan ulang halaman.
+@st.fragment
+def display_usage(rows, page_name, version, selection):
+    col1, col2 = st.columns([1, 3])
+    group_label = col1.selectbox("Group By", list(USAGE_GROUPINGS), key=f"{page_name}_group")
+    grouping = USAGE_GROUPINGS[group_label]
+    all_names = usage.material_names(df_usage)
+    default = usage.material_names(df_usage, materials.load_material_list())
+    names = col2.multiselect("Materials", all_names, default=default or all_names, key=f"{page_name}_materials")
+    if not names:
+        st.warning("Pilih minimal satu material.")
+        return
+
+    summary = service.usage_summary(rows, version, selection, grouping, names)
+    chosen = rows[rows["NAMA_MATERIAL"].isin(names)]
+    total = chosen["JUMLAH"].sum()
+    if total:
+        coverage = chosen.loc[chosen["MATCHED"], "JUMLAH"].sum() / total
+        st.caption(f"{coverage:.1%} pemakaian material (kg) punya data produksi di tanggal, mesin dan produk yang sama; "
+                   "sisanya tidak ikut dihitung di rasio per unit.")
+
+    st.subheader("Kg Material per Pcs")
+    per_unit = summary["KG_PER_UNIT"].unstack("NAMA_MATERIAL")
+    per_unit.columns = per_unit.columns.astype("str")
+    per_unit = per_unit[[name for name in names if name in per_unit.columns]]
+    st.dataframe(per_unit, column_config={name: st.column_config.NumberColumn(name, format="%.4f") for name in per_unit.columns})
+
+    material = st.selectbox("Material", list(per_unit.columns), key=f"{page_name}_chart_material")
+    if material is not None:
+        st.plotly_chart(fig_usage_per_unit(summary, material, grouping, group_label, page_name), use_container_width=True)
+
+    with st.expander(f"{page_name} Detail"):
+        st.dataframe(summary.reset_index(), hide_index=True, column_config={
+            "JUMLAH": st.column_config.NumberColumn("Material (Kg)", format="%,.2f"),
+            "ACTUAL_QTY": st.column_config.NumberColumn("Output (Pcs)", format="%,.0f"),
+            "KG_PER_UNIT": st.column_config.NumberColumn("Kg per Pcs", format="%.4f"),
+            "COVERAGE": st.column_config.NumberColumn("Coverage", format="percent"),
+        })
+
+# Fungsi untuk halaman Usage: pemakaian material dibanding output produksi
+def usage_page():
+    with instrument.stage("filters"):
+        filters = display_filters(data_usage, "Usage", usage_version)
+    years, months, mesin, product, start_date, end_date = filters
+
+    if not years or not months or not mesin or not product:
+        st.warning("Mohon lengkapi semua filter Usage sebelum melanjutkan.")
+        st.stop()
+
+    selection = service.selection_key(filters)
+    with instrument.stage("filter_dataframe") as timing:
+        df_usage_selection = service.selected_rows("Usage", data_usage, usage_version, filters, selection)
+        timing["rows"] = len(df_usage_selection)
+
+    if df_usage_selection.empty:
+        st.warning("Tidak ada data Usage yang sesuai dengan kombinasi filter yang dipilih. Silakan sesuaikan filter.")
+        st.stop()
+
+    with instrument.stage("usage_per_unit", rows=len(df_usage_selection)):
+        display_usage(df_usage_selection, "Usage", usage_version, selection)
+
+# Panel admin: tahap rerun ini dan kuantil waktu per tahap dari run terakhir di proses ini
+def display_instrumentation(run):
+    with st.expander("⏱ Performance (admin)", expanded=True):
+        if run is not None:
+            stages = pd.DataFrame(run["stages"], columns=["stage", "seconds", "rows", "rss_delta"])
+            stages["ms"] = stages.pop("seconds") * 1000
+            stages["rss_delta_mb"] = stages.pop("rss_delta") / 2**20
+            st.caption(f"Rerun ini: {run['seconds'] * 1000:,.0f} ms total")
+            st.dataframe(stages, hide_index=True)
+        quantiles = instrument.summary()
+        if quantiles:
+            summary = pd.DataFrame([
+                {"page": page, "stage": name, **{f"p{int(q * 100)} ms": value * 1000 for q, value in values.items()}}
+                for (page, name), values in quantiles.items()
+            ])
+            st.caption(f"{len(instrument.history)} run terakhir di proses ini")
+            st.dataframe(summary, hide_index=True)
 
 
 # Sidebar navigation
@@ -597,17 +810,25 @@ with st.sidebar:
     st.image("data/dbm.png", caption="PT Duta Beton Mandiri")
     selected = option_menu(
         menu_title="Main Menu",
-        options=['Production', 'Used'],
-        icons=['file-text', 'archive'],
+        options=['Production', 'Used', 'Usage'],
+        icons=['file-text', 'archive', 'speedometer2'],
         menu_icon="cast",
         default_index=0
     )
 
 st.subheader(f"Page: {selected}")
-if selected == "Production":
-    production_page()
-elif selected == "Used":
-    used_page()
+try:
+    if selected == "Production":
+        production_page()
+    elif selected == "Used":
+        used_page()
+    elif selected == "Usage":
+        usage_page()
+finally:
+    # Run tetap dicatat saat halaman berhenti lewat st.stop() (mis. filter kosong)
+    finished_run = instrument.end(selected)
+    if st.query_params.get("admin") == "1":
+        display_instrumentation(finished_run)
 
 # Hide Streamlit branding
 st.markdown("""
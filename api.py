@@ -0,0 +1,285 @@
+# API HTTP JSON untuk KPI dashboard, tanpa browser atau session Streamlit
+#
+# Aplikasi ASGI kecil (Starlette) di atas service.py, untuk MES, skrip laporan shift, dan
+# konsumen otomatis lain. Filter sama dengan sidebar dashboard, sebagai query parameter
+# yang boleh diulang; parameter yang tidak diisi berarti "semua" (rentang tanggal penuh):
+#
+#   GET /health
+#   GET /api/{Production|Used}/options       pilihan filter, rentang tanggal, versi dataset
+#   GET /api/Production/metrics              KPI (DPU, DPMO, sigma, ...) dan pareto reject
+#   GET /api/Production/sigma                DPU/DPMO/sigma per mesin, produk, mesin-produk, tanggal
+#   GET /api/Production/out_of_control       mesin/produk yang melanggar aturan Western Electric (di atas CL)
+#                                            (level=mesin atau level=product)
+#   GET /api/Used/materials                  ringkasan pemakaian material
+#
+#   curl "localhost:8502/api/Production/metrics?years=2024&months=1&months=2&mesin=MESIN%201&start=2024-01-01"
+#
+# Dataset dibaca dari cache Arrow shared yang sama dengan dashboard (memory map, tidak ada
+# salinan kedua di memori) dan diperbarui thread watcher. Hasil memakai result_cache yang
+# sama: dijalankan di dalam proses dashboard (API_PORT di Home.py) halaman dan API berbagi
+# hasil yang sudah dihitung; dijalankan sendiri (`python api.py` atau `uvicorn api:app`)
+# hasil di-cache per proses API. Setiap respons membawa ETag dari versi dataset dan seleksi,
+# jadi polling dengan If-None-Match dijawab 304 tanpa menghitung ulang selama data tidak berubah.
+import argparse
+import hashlib
+import logging
+import math
+import threading
+from contextlib import asynccontextmanager
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import instrument
+import materials
+import metrics
+import service
+import spc
+import watcher
+
+DEFAULT_PORT = 8502
+
+logger = logging.getLogger(__name__)
+
+_server_thread = None
+_server_lock = threading.Lock()
+
+
+class BadRequest(ValueError):
+    pass
+
+
+# Nilai hasil pandas/numpy ke tipe JSON; NaN/inf (mis. sigma untuk nol reject) menjadi null
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, (pd.Timestamp, date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return value
+
+
+def _records(frame, index_names):
+    index_names = [index_names] if isinstance(index_names, str) else list(index_names)
+    frame = frame.reset_index()
+    frame.columns = [*index_names, *frame.columns[len(index_names):]]
+    return _jsonable(frame.to_dict("records"))
+
+
+def _ints(params, name):
+    try:
+        return [int(value) for value in params.getlist(name)]
+    except ValueError:
+        raise BadRequest(f"{name} harus bilangan bulat") from None
+
+
+def _date(params, name, default):
+    value = params.get(name)
+    if value is None:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise BadRequest(f"{name} harus tanggal YYYY-MM-DD") from None
+
+
+# Seleksi filter dari query parameter; yang tidak diisi memakai seleksi default dashboard
+def parse_filters(params, name, data, version):
+    years, months, mesin, product, start_date, end_date = service.default_filters(name, data, version)
+    filters = (
+        _ints(params, "years") or years,
+        _ints(params, "months") or months,
+        params.getlist("mesin") or mesin,
+        params.getlist("product") or product,
+        _date(params, "start", start_date),
+        _date(params, "end", end_date),
+    )
+    if filters[4] > filters[5]:
+        raise BadRequest("start harus sebelum end")
+    return filters
+
+
+def _etag(*parts):
+    return '"' + hashlib.sha256(repr(parts).encode()).hexdigest()[:32] + '"'
+
+
+# Jawab 304 kalau klien sudah punya hasil untuk versi dan seleksi ini; kalau tidak, hitung.
+# Hanya request yang benar-benar menghitung yang dicatat instrument (lihat instrument.py).
+def _respond(request, page, etag, compute):
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    instrument.begin(page)
+    try:
+        result = compute()
+    finally:
+        instrument.end()
+    return JSONResponse(_jsonable(result), headers=headers)
+
+
+# Endpoint untuk satu dataset (atau dataset dari path); handler menerima snapshot terbaru.
+# Endpoint sync dijalankan Starlette di threadpool, jadi perhitungan tidak memblok event loop.
+def _endpoint(dataset=None):
+    def decorator(handler):
+        def endpoint(request):
+            name = dataset or request.path_params["dataset"]
+            if name not in service.DATASETS:
+                return JSONResponse({"error": f"dataset {name} tidak dikenal"}, 404)
+            try:
+                df, version = service.snapshot(name)
+            except FileNotFoundError as e:
+                return JSONResponse({"error": f"file {e} tidak ditemukan"}, 503)
+            try:
+                return handler(request, name, df, service.get_data(name, df, version), version)
+            except BadRequest as e:
+                return JSONResponse({"error": str(e)}, 400)
+        return endpoint
+    return decorator
+
+
+def health(request):
+    return JSONResponse({"status": "ok"})
+
+
+@_endpoint()
+def options(request, name, df, data, version):
+    def compute():
+        start_date, end_date = service.date_bounds(name, data, version)
+        return {"dataset": name, "version": list(version), "start": start_date, "end": end_date,
+                "options": service.filter_options(name, data, version)}
+    return _respond(request, f"api:{name}:options", _etag("options", name, version), compute)
+
+
+@_endpoint("Production")
+def production_metrics(request, name, df, data, version):
+    filters = parse_filters(request.query_params, name, data, version)
+    selection = service.selection_key(filters)
+    opportunities = metrics.load_opportunities()
+
+    def compute():
+        with instrument.stage("cube") as timing:
+            cube_selection = service.production_cube(data, version, filters, selection)
+            timing["rows"] = len(cube_selection)
+        result = {"dataset": name, "version": list(version), "filters": filters,
+                  "rows": int(cube_selection["ROWS"].sum()) if len(cube_selection) else 0}
+        if cube_selection.empty:
+            return {**result, "metrics": None}
+        with instrument.stage("calculate_metrics", rows=len(cube_selection)):
+            agg = service.production_aggregate(version, cube_selection, selection)
+            result["metrics"] = service.production_metrics(version, cube_selection, agg, selection, opportunities)
+            graphs = service.production_graphs(version, agg, selection)
+        if "TARGET_QTY" in cube_selection.columns:
+            result["target_qty"] = cube_selection["TARGET_QTY"].sum()
+        if "reject_mesin" in graphs:
+            result["pareto"] = {"mesin": _records(graphs["reject_mesin"], "MESIN"),
+                                "product": _records(graphs["reject_produk"], "NAMA_PRODUCT")}
+        return result
+    return _respond(request, "api:Production", _etag("metrics", version, selection, opportunities), compute)
+
+
+@_endpoint("Production")
+def production_sigma(request, name, df, data, version):
+    filters = parse_filters(request.query_params, name, data, version)
+    selection = service.selection_key(filters)
+    opportunities = metrics.load_opportunities()
+
+    def compute():
+        cube_selection = service.production_cube(data, version, filters, selection)
+        with instrument.stage("sigma_breakdown", rows=len(cube_selection)):
+            breakdown = service.production_sigma(version, cube_selection, selection, opportunities)
+        levels = {level: _records(frame, metrics.SIGMA_LEVELS[level]) for level, frame in (breakdown or {}).items()}
+        return {"dataset": name, "version": list(version), "filters": filters, "levels": levels}
+    return _respond(request, "api:Production:sigma", _etag("sigma", version, selection, opportunities), compute)
+
+
+@_endpoint("Used")
+def used_materials(request, name, df, data, version):
+    filters = parse_filters(request.query_params, name, data, version)
+    selection = service.selection_key(filters)
+    material_list = materials.load_material_list()
+
+    def compute():
+        with instrument.stage("calculate_metrics_used"):
+            summary = service.material_summary(data, version, filters, selection, material_list)
+        return {"dataset": name, "version": list(version), "filters": filters,
+                "materials": _records(summary, "NAMA_MATERIAL")}
+    return _respond(request, "api:Used", _etag("materials", version, selection, material_list), compute)
+
+
+@_endpoint("Production")
+def production_out_of_control(request, name, df, data, version):
+    level = request.query_params.get("level", "mesin")
+    if level not in spc.LEVELS:
+        raise BadRequest(f"level harus salah satu dari {', '.join(spc.LEVELS)}")
+    filters = parse_filters(request.query_params, name, data, version)
+    selection = service.selection_key(filters)
+
+    def compute():
+        stats = service.production_spc(data, version)
+        flagged = service.out_of_control(stats, version, level, filters, selection) if stats is not None else None
+        return {"dataset": name, "version": list(version), "filters": filters, "level": level,
+                "rules": spc.RULES, "out_of_control": [] if flagged is None else _records(flagged, spc.LEVELS[level])}
+    return _respond(request, "api:Production:out_of_control", _etag("out_of_control", version, selection, level), compute)
+
+
+# Dataset di-load sekali saat start supaya request pertama tidak menunggu parsing
+@asynccontextmanager
+async def lifespan(app):
+    for name in service.DATASETS:
+        service.snapshot(name)
+    watcher.start()
+    yield
+
+
+app = Starlette(
+    routes=[
+        Route("/health", health),
+        Route("/api/Production/metrics", production_metrics),
+        Route("/api/Production/sigma", production_sigma),
+        Route("/api/Production/out_of_control", production_out_of_control),
+        Route("/api/Used/materials", used_materials),
+        Route("/api/{dataset}/options", options),
+    ],
+    lifespan=lifespan,
+)
+
+
+# Jalankan API di thread background proses ini (sekali per proses), mis. dari Home.py supaya
+# API dan halaman berbagi result cache. Thread uvicorn non-main tidak memasang signal handler.
+def start(port=DEFAULT_PORT, host="127.0.0.1"):
+    global _server_thread
+    import uvicorn
+
+    with _server_lock:
+        if _server_thread is not None:
+            return
+        server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+        _server_thread = threading.Thread(target=server.run, name="metrics-api", daemon=True)
+        _server_thread.start()
+    logger.info("metrics API di http://%s:%d", host, port)
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="API HTTP JSON untuk KPI dashboard.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=1, help="Proses uvicorn (dataset tetap dibagi lewat memory map)")
+    args = parser.parse_args(argv)
+    uvicorn.run("api:app" if args.workers > 1 else app, host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
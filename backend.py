@@ -0,0 +1,432 @@
+# Backend data untuk halaman dashboard
+#
+# Halaman tidak mengakses DataFrame langsung, tetapi lewat backend dengan antarmuka yang
+# sama (filters = (years, months, mesin, product, start_date, end_date) dari
+# display_filters):
+#   date_bounds()                        TANGGAL terkecil dan terbesar
+#   options(column)                      nilai unik (tanpa kosong) untuk pilihan filter
+#   dependent_options(column, selected)  nilai `column` yang masih ada untuk pilihan kolom
+#                                        sebelumnya (kolom -> nilai), untuk filter bertingkat
+#   rows(filters)                        baris mentah terpilih (index = row id)
+#   production_cube(filters)             cube harian (lihat cube.py) untuk baris terpilih
+#   material_summary(filters, materials) ringkasan JUMLAH per material (lihat materials.py)
+#   daily_sums(columns, measures, start, stop)
+#                                        jumlah `measures` per (TANGGAL, *columns) untuk baris
+#                                        mentah [start, stop), untuk struktur yang diperbarui
+#                                        incremental (SPC, join pemakaian)
+#
+# "pandas" adalah jalur lama: semua data di memori, filter lewat filter_index. "sqlite"
+# dan "duckdb" menyimpan dataset di file database di Source/.cache; filter dikirim sebagai
+# predikat WHERE dan agregasi baris mentah -> cube/ringkasan material dijalankan di engine,
+# jadi yang masuk ke Python hanya hasil agregat. Store diperbarui per versi dataset
+# (append hanya menyisipkan baris baru) dan tetap dipakai setelah restart; setiap versi
+# dibaca lewat SQLView yang hanya melihat baris versi itu.
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+import cube
+import filter_index
+import ingest
+import materials
+import schema
+
+STORE_DIR = Path("Source") / ingest.CACHE_DIRNAME
+# Naikkan kalau struktur tabel store berubah supaya store lama dibangun ulang
+STORE_VERSION = 2
+# Format TANGGAL di SQLite (teks ISO, urutan teks = urutan waktu)
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+INSERT_CHUNK_ROWS = 50_000
+# Jumlah versi per store yang view-nya disimpan (session lama + versi terbaru)
+MAX_VIEWS = 4
+
+
+class PandasBackend:
+    def __init__(self, dataset, df, version):
+        self.dataset = dataset
+        self.df = df
+        self.version = version
+        self.columns = df.columns
+
+    # Struktur turunan yang dihitung watcher sebelum snapshot dipakai ("cube", "materials")
+    def prepare(self, structures=()):
+        filter_index.get_index(self.df).combinations()
+        if "cube" in structures:
+            filter_index.get_index(cube.get_cube(self.df, self.version))
+        if "materials" in structures:
+            materials.get_lookup(self.df, self.version)
+
+    def date_bounds(self):
+        return self.df["TANGGAL"].min(), self.df["TANGGAL"].max()
+
+    def options(self, column):
+        return sorted(self.df[column].dropna().unique())
+
+    def dependent_options(self, column, selected):
+        return filter_index.get_index(self.df).dependent_options(column, selected)
+
+    def rows(self, filters):
+        return filter_index.get_index(self.df).filter(self.df, *filters)
+
+    def production_cube(self, filters):
+        daily = cube.get_cube(self.df, self.version)
+        return filter_index.get_index(daily).filter(daily, *filters)
+
+    def material_summary(self, filters, material_list=None):
+        return materials.summarize(self.rows(filters), materials.get_lookup(self.df, self.version), material_list)
+
+    def daily_sums(self, columns, measures, start=0, stop=None):
+        rows = self.df.iloc[start:stop]
+        return rows.groupby(["TANGGAL", *columns], observed=True, sort=False)[measures].sum().reset_index()
+
+
+# Store SQL satu dataset, dipakai bersama semua session di proses ini. Store hanya maju:
+# versi baru di lineage yang sama menyisipkan baris tambahan, lineage baru membangun ulang
+# tabel, masing-masing dalam satu transaksi. Setiap versi dibaca lewat SQLView-nya sendiri
+# yang hanya melihat baris versi itu. Subclass mengatur koneksi, cara menyisipkan baris,
+# dan representasi TANGGAL.
+class SQLBackend:
+    extension = None
+    # Perintah pembuka transaksi sync
+    begin = "BEGIN"
+    # Predikat baris milik satu versi (lihat SQLView)
+    row_bound = "row_id < ?"
+
+    def __init__(self, dataset, directory=STORE_DIR):
+        self.dataset = dataset
+        self.path = Path(directory) / f"{dataset}.{self.extension}"
+        # versi -> SQLView, hanya MAX_VIEWS versi terakhir
+        self._views = {}
+        self._lock = threading.Lock()
+
+    # View untuk df pada versi ini (lihat ingest.load_versioned). Kalau store belum memuat
+    # versi ini, store disamakan dulu, tetapi hanya untuk sync=True (versi terbaru dataset):
+    # session yang masih memakai versi lama tidak boleh memundurkan store. None kalau versi
+    # lama itu tidak ada lagi di store (lineage-nya sudah diganti).
+    def view(self, df, version, sync=True):
+        lineage, rows = version
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = self._connection()
+            stored = self._stored_version(connection)
+            if stored is None or stored[0] != lineage or stored[1] < rows:
+                if not sync:
+                    return None
+                self._sync(connection, df, version, stored)
+            view = self._views.pop(version, None) or SQLView(self, version, df.dtypes.to_dict())
+            self._views[version] = view
+            while len(self._views) > MAX_VIEWS:
+                del self._views[next(iter(self._views))]
+        return view
+
+    # Satu transaksi: sisipkan baris setelah versi tersimpan (lineage sama) atau bangun ulang
+    # tabel. Session lain tetap membaca isi lama sampai commit.
+    def _sync(self, connection, df, version, stored):
+        lineage, rows = version
+        connection.execute(self.begin)
+        try:
+            if stored is not None:
+                # Proses lain bisa saja sudah menulis sejak stored dibaca
+                stored = self._stored_version(connection)
+            if stored is not None and stored[0] == lineage and stored[1] >= rows:
+                connection.rollback()
+                return
+            if stored is not None and stored[0] == lineage:
+                self._insert(connection, _by_date(df.iloc[stored[1]:rows]))
+            else:
+                self._create(connection, df.iloc[:rows])
+            connection.execute("DELETE FROM meta")
+            connection.execute("INSERT INTO meta VALUES (?, ?, ?)", [STORE_VERSION, lineage, rows])
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+    # (lineage, rows) yang tersimpan di store; None kalau store belum ada atau formatnya lama.
+    # Dipanggil sebelum BEGIN: di DuckDB error di dalam transaksi membatalkan transaksinya.
+    def _stored_version(self, connection):
+        try:
+            stored = connection.execute("SELECT store_version, lineage, rows FROM meta").fetchone()
+        except Exception:
+            # Tabel meta belum ada (error-nya berbeda per engine)
+            return None
+        if stored is None or stored[0] != STORE_VERSION:
+            return None
+        return stored[1], stored[2]
+
+    def _create(self, connection, df):
+        connection.execute("DROP TABLE IF EXISTS data")
+        connection.execute("DROP TABLE IF EXISTS meta")
+        columns = ", ".join(f'"{column}" {self._sql_type(df[column])}' for column in df.columns)
+        connection.execute(f"CREATE TABLE data (row_id BIGINT NOT NULL, {columns})")
+        connection.execute("CREATE TABLE meta (store_version INTEGER, lineage TEXT, rows BIGINT)")
+        self._create_indexes(connection)
+        self._insert(connection, _by_date(df))
+
+    def _create_indexes(self, connection):
+        pass
+
+    @staticmethod
+    def _sql_type(values):
+        return {"i": "BIGINT", "u": "BIGINT", "f": "DOUBLE", "M": "TIMESTAMP"}.get(values.dtype.kind, "TEXT")
+
+
+# Satu versi dataset di store SQL. Store bisa saja sudah berisi baris versi yang lebih baru,
+# jadi setiap query dibatasi ke row_id < jumlah baris versi ini.
+class SQLView:
+    def __init__(self, store, version, dtypes):
+        self.dataset = store.dataset
+        self.store = store
+        self.version = version
+        self.dtypes = dtypes
+        self.columns = list(dtypes)
+        self._domain = None
+
+    def prepare(self, structures=()):
+        pass
+
+    def _query(self, sql, params):
+        return self.store._query(sql, params)
+
+    # Predikat baris versi ini, selalu predikat pertama di WHERE
+    def _rows(self):
+        return self.store.row_bound, [self.version[1]]
+
+    # (nilai per kolom filter tanpa kosong, TANGGAL terkecil dan terbesar) untuk mengenali
+    # seleksi "semua" (lihat filter_index.active_predicates); sekali per versi
+    def _filter_domain(self):
+        if self._domain is None:
+            bound, params = self._rows()
+            columns = ", ".join(f"COUNT(*) - COUNT({column}) AS {column}" for column in filter_index.FILTER_COLUMNS)
+            nulls = self._query(f"SELECT {columns} FROM data WHERE {bound}", params).iloc[0]
+            values = {column: self.options(column) for column in filter_index.FILTER_COLUMNS if not nulls[column]}
+            bounds = self.date_bounds()
+            self._domain = (values, None if pd.isna(bounds[0]) else bounds)
+        return self._domain
+
+    # Predikat WHERE untuk filter halaman; nilai kosong tidak pernah lolos (sama seperti
+    # filter_index). Kolom yang semua nilainya terpilih dan rentang tanggal penuh tidak
+    # dikirim sebagai predikat.
+    def _where(self, filters):
+        columns, date_range = filter_index.active_predicates(filters, *self._filter_domain())
+        bound, params = self._rows()
+        if date_range is None:
+            clauses = [bound, "TANGGAL IS NOT NULL"]
+        else:
+            clauses = [bound, "TANGGAL BETWEEN ? AND ?"]
+            params = [*params, self.store._date_param(date_range[0]), self.store._date_param(date_range[1])]
+        for clause, values in self._in_clauses(columns):
+            if clause is None:
+                return "1 = 0", []
+            clauses.append(clause)
+            params.extend(values)
+        return " AND ".join(clauses), params
+
+    # (predikat IN, parameter) per kolom; (None, []) kalau tidak ada nilai yang dipilih
+    @staticmethod
+    def _in_clauses(columns):
+        for column, values in columns.items():
+            values = [int(value) if column in ("YEARS", "MONTH") else str(value) for value in values]
+            if not values:
+                yield None, []
+                continue
+            yield f"{column} IN ({', '.join('?' * len(values))})", values
+
+    def date_bounds(self):
+        bound, params = self._rows()
+        bounds = self._query(f"SELECT MIN(TANGGAL) AS lo, MAX(TANGGAL) AS hi FROM data WHERE {bound}", params)
+        lo, hi = (self.store._restore_dates(bounds[column]) for column in ("lo", "hi"))
+        return lo.iloc[0], hi.iloc[0]
+
+    def options(self, column):
+        bound, params = self._rows()
+        values = self._query(f'SELECT DISTINCT "{column}" FROM data WHERE {bound} AND "{column}" IS NOT NULL', params)
+        return sorted(values[column].tolist())
+
+    def dependent_options(self, column, selected):
+        bound, params = self._rows()
+        clauses = [bound, f'"{column}" IS NOT NULL']
+        for clause, values in self._in_clauses(selected):
+            if clause is None:
+                return []
+            clauses.append(clause)
+            params.extend(values)
+        values = self._query(f'SELECT DISTINCT "{column}" FROM data WHERE {" AND ".join(clauses)}', params)
+        return sorted(values[column].tolist())
+
+    def rows(self, filters):
+        where, params = self._where(filters)
+        df = self._query(f"SELECT * FROM data WHERE {where} ORDER BY row_id", params)
+        df.index = pd.Index(df.pop("row_id").to_numpy("int64"))
+        df["TANGGAL"] = self.store._restore_dates(df["TANGGAL"])
+        return df.astype(self.dtypes)
+
+    # Cube harian langsung dari baris terpilih. Row id baris ekstrem (MAX_ROW/MIN_ROW) hanya
+    # diisi untuk sel yang memuat nilai ekstrem seluruh seleksi, karena hanya sel itu yang
+    # dibaca calculate_metrics (Highest/Lowest Single-Day Output); kalau seri, row id terkecil.
+    def production_cube(self, filters):
+        where, params = self._where(filters)
+        keys = ", ".join(cube.KEYS)
+        measures = [column for column in cube.MEASURES if column in self.dtypes]
+        columns = [f"CAST(COALESCE(SUM({m}), 0) AS {self._sum_type(m)}) AS {m}" for m in measures]
+        columns += [f"COUNT({m}) AS {m}_N" for m in measures]
+        columns += ["COUNT(*) AS ROWS", "MAX(ACTUAL_QTY) AS MAX_QTY", "MIN(ACTUAL_QTY) AS MIN_QTY"]
+        daily = self._query(f"SELECT {keys}, {', '.join(columns)} FROM data WHERE {where} GROUP BY {keys}", params)
+        daily["TANGGAL"] = self.store._restore_dates(daily["TANGGAL"])
+
+        for name, extreme in (("MAX", daily["MAX_QTY"].max()), ("MIN", daily["MIN_QTY"].min())):
+            if pd.isna(extreme):
+                daily[f"{name}_ROW"] = float("nan")
+                continue
+            cells = self._query(f"SELECT {keys}, MIN(row_id) AS {name}_ROW FROM data WHERE {where} AND ACTUAL_QTY = ?"
+                                f" GROUP BY {keys}", [*params, extreme.item()])
+            cells["TANGGAL"] = self.store._restore_dates(cells["TANGGAL"])
+            daily = daily.merge(cells, on=cube.KEYS, how="left")
+        return daily
+
+    def _sum_type(self, column):
+        return "DOUBLE" if self.dtypes[column].kind == "f" else "BIGINT"
+
+    # Sama dengan PandasBackend.daily_sums; grup urut row id pertamanya (seperti groupby
+    # sort=False di pandas)
+    def daily_sums(self, columns, measures, start=0, stop=None):
+        stop = self.version[1] if stop is None else min(stop, self.version[1])
+        keys = ", ".join(["TANGGAL", *columns])
+        sums = ", ".join(f"CAST(COALESCE(SUM({m}), 0) AS {self._sum_type(m)}) AS {m}" for m in measures)
+        present = " AND ".join(f"{column} IS NOT NULL" for column in ["TANGGAL", *columns])
+        daily = self._query(f"SELECT {keys}, {sums} FROM data WHERE row_id >= ? AND row_id < ? AND {present}"
+                            f" GROUP BY {keys} ORDER BY MIN(row_id)", [start, stop])
+        daily["TANGGAL"] = self.store._restore_dates(daily["TANGGAL"])
+        return daily
+
+    # Sama dengan materials.summarize; normalisasi nama memakai UPPER milik engine
+    def material_summary(self, filters, material_list=None):
+        where, params = self._where(filters)
+        where += " AND NAMA_MATERIAL IS NOT NULL"
+        if material_list is not None:
+            names = materials.normalize(pd.Series(material_list, dtype="str")).tolist()
+            where += f" AND UPPER(NAMA_MATERIAL) IN ({', '.join('?' * len(names))})"
+            params = [*params, *names]
+        sql = f"""
+            SELECT UPPER(NAMA_MATERIAL) AS NAMA_MATERIAL, CAST(COALESCE(SUM(JUMLAH), 0) AS DOUBLE) AS TOTAL,
+                   AVG(JUMLAH) AS MEAN, MAX(JUMLAH) AS MAX, MIN(JUMLAH) AS MIN
+            FROM data WHERE {where}
+            GROUP BY UPPER(NAMA_MATERIAL)
+            ORDER BY 1
+        """
+        summary = self._query(sql, params).set_index("NAMA_MATERIAL")
+        return summary.astype("float64")
+
+
+class SQLiteBackend(SQLBackend):
+    extension = "sqlite"
+    # IMMEDIATE: kunci tulis diambil sebelum versi tersimpan dibaca ulang di _sync
+    begin = "BEGIN IMMEDIATE"
+
+    def __init__(self, dataset, directory=STORE_DIR):
+        super().__init__(dataset, directory)
+        # Koneksi sqlite3 tidak boleh dipakai bersama antar thread (session)
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            import sqlite3
+            connection = sqlite3.connect(self.path)
+            # WAL: session tetap bisa membaca selama watcher menulis versi baru
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def _query(self, sql, params):
+        return pd.read_sql_query(sql, self._connection(), params=params)
+
+    def _create_indexes(self, connection):
+        connection.execute("CREATE INDEX data_tanggal ON data (TANGGAL, MESIN, NAMA_PRODUCT)")
+        connection.execute("CREATE UNIQUE INDEX data_row_id ON data (row_id)")
+
+    # executemany di dalam transaksi _sync (DataFrame.to_sql meng-commit sendiri per chunk,
+    # jadi store yang setengah jadi bisa terlihat)
+    def _insert(self, connection, df):
+        columns = ", ".join(f'"{column}"' for column in ["row_id", *df.columns])
+        sql = f"INSERT INTO data ({columns}) VALUES ({', '.join('?' * (len(df.columns) + 1))})"
+        for start in range(0, len(df), INSERT_CHUNK_ROWS):
+            part = schema.widen(df.iloc[start:start + INSERT_CHUNK_ROWS])
+            part["TANGGAL"] = part["TANGGAL"].dt.strftime(DATE_FORMAT)
+            part = part.astype(object).where(part.notna(), None)
+            connection.executemany(sql, part.itertuples(name=None))
+
+    @staticmethod
+    def _date_param(value):
+        return pd.Timestamp(value).strftime(DATE_FORMAT)
+
+    @staticmethod
+    def _restore_dates(values):
+        return pd.to_datetime(values, format=DATE_FORMAT)
+
+
+class DuckDBBackend(SQLBackend):
+    extension = "duckdb"
+
+    def __init__(self, dataset, directory=STORE_DIR):
+        super().__init__(dataset, directory)
+        self._root = None
+
+    def _connection(self):
+        if self._root is None:
+            try:
+                import duckdb
+            except ImportError as e:
+                raise ImportError("Backend duckdb membutuhkan paket duckdb (pip install duckdb)") from e
+            self._root = duckdb.connect(str(self.path))
+        return self._root
+
+    # Setiap query memakai cursor sendiri supaya aman dipanggil dari banyak thread
+    def _query(self, sql, params):
+        return self._connection().cursor().execute(sql, params).df()
+
+    def _insert(self, connection, df):
+        part = schema.widen(df).rename_axis("row_id").reset_index()
+        connection.register("incoming", part)
+        try:
+            connection.execute("INSERT INTO data SELECT * FROM incoming")
+        finally:
+            connection.unregister("incoming")
+
+    @staticmethod
+    def _date_param(value):
+        return pd.Timestamp(value).to_pydatetime()
+
+    @staticmethod
+    def _restore_dates(values):
+        return pd.to_datetime(values)
+
+
+# Baris disisipkan urut TANGGAL (NaT di akhir), jadi baris dalam satu rentang tanggal
+# berdekatan di file dan predikat tanggal hanya membaca halaman yang dibutuhkan
+def _by_date(df):
+    return df.sort_values("TANGGAL", kind="stable", na_position="last")
+
+
+BACKENDS = {"pandas": PandasBackend, "sqlite": SQLiteBackend, "duckdb": DuckDBBackend}
+
+# Store SQL per (jenis backend, dataset); dibuat sekali per proses
+_stores = {}
+_lock = threading.Lock()
+
+
+# Backend `kind` untuk dataset pada versi ini. sync=False untuk versi yang bukan versi
+# terbaru dataset (session lama): store SQL tidak diubah, dan kalau versi itu tidak ada lagi
+# di store, query dijalankan di memori lewat PandasBackend.
+def get(kind, dataset, df, version, sync=True):
+    if kind not in BACKENDS:
+        raise ValueError(f"Backend tidak dikenal: {kind} (pilih salah satu dari {', '.join(BACKENDS)})")
+    if kind == "pandas":
+        return PandasBackend(dataset, df, version)
+    with _lock:
+        store = _stores.get((kind, dataset))
+        if store is None:
+            store = _stores[(kind, dataset)] = BACKENDS[kind](dataset)
+    view = store.view(df, version, sync)
+    return view if view is not None else PandasBackend(dataset, df, version)
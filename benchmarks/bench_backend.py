@@ -0,0 +1,100 @@
+# Verifikasi dan benchmark backend query (pandas vs SQLite/DuckDB)
+#
+# Memastikan backend SQL memberi hasil yang sama dengan backend pandas (baris terpilih,
+# KPI, data grafik, ringkasan material) untuk berbagai seleksi filter di workbook asli,
+# lalu membandingkan waktu build store dan waktu per interaksi di data sintetis.
+#
+#   python -m benchmarks.bench_backend --rows 2000000 --backends sqlite duckdb
+import argparse
+import tempfile
+import time
+
+import pandas as pd
+
+import backend
+import ingest
+import materials
+import metrics
+from benchmarks.bench_cube import assert_graph_data_equal, assert_metrics_equal, random_selections
+from benchmarks.synthetic import production_frame
+
+
+def page_results(data, filters):
+    daily = data.production_cube(filters)
+    agg = metrics.aggregate(daily)
+    return metrics.calculate_metrics(daily, agg), metrics.graph_data(agg)
+
+
+def verify(kind, directory, selections):
+    for dataset in ("Production", "Used"):
+        df, version = ingest.load_versioned(f"Source/{dataset}.xlsx")
+        expected = backend.PandasBackend(dataset, df, version)
+        store = backend.BACKENDS[kind](dataset, directory).view(df, version)
+        assert expected.date_bounds() == store.date_bounds()
+        for column in ("YEARS", "MONTH", "MESIN", "NAMA_PRODUCT"):
+            assert list(expected.options(column)) == list(store.options(column)), column
+        columns, measure = (["MESIN", "NAMA_PRODUCT"], "ACTUAL_QTY") if dataset == "Production" \
+            else (["MESIN", "NAMA_MATERIAL"], "JUMLAH")
+        keys = dict.fromkeys(columns, "str")
+        pd.testing.assert_frame_equal(expected.daily_sums(columns, [measure], 100).astype(keys),
+                                      store.daily_sums(columns, [measure], 100).astype(keys), check_dtype=False)
+
+        material_list = materials.load_material_list()
+        checked = 0
+        for filters in random_selections(df, selections):
+            rows = expected.rows(filters)
+            pd.testing.assert_frame_equal(rows, store.rows(filters))
+            if rows.empty:
+                continue
+            if dataset == "Production":
+                expected_metrics, expected_graphs = page_results(expected, filters)
+                result_metrics, result_graphs = page_results(store, filters)
+                assert_metrics_equal(expected_metrics, result_metrics)
+                assert_graph_data_equal(expected_graphs, result_graphs)
+            else:
+                pd.testing.assert_frame_equal(expected.material_summary(filters, material_list),
+                                              store.material_summary(filters, material_list), check_exact=False)
+            checked += 1
+        print(f"{kind} {dataset}.xlsx: {checked} selections match the pandas backend")
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verifikasi dan benchmark backend query SQL vs pandas.")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--selections", type=int, default=30)
+    parser.add_argument("--backends", nargs="+", default=["sqlite"], choices=["sqlite", "duckdb"])
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in args.backends:
+            verify(kind, tmp, args.selections)
+
+        df = production_frame(args.rows)
+        version = ("benchmark", len(df))
+        full = next(random_selections(df, 0))
+        # Satu bulan, dua mesin: seleksi sempit yang umum dipakai
+        narrow = [full[0], full[1][:1], full[2][:2], full[3], full[4], full[4] + pd.Timedelta(days=30)]
+        stores = {"pandas": backend.PandasBackend("Production", df, version)}
+        for kind in args.backends:
+            stores[kind] = backend.BACKENDS[kind]("Production", tmp)
+
+        print(f"synthetic: {len(df):,} rows")
+        for kind, data in stores.items():
+            if kind == "pandas":
+                build = timed(data.prepare, ["cube"])
+            else:
+                build = timed(data.view, df, version)
+                data = data.view(df, version)
+            all_time = timed(page_results, data, full)
+            narrow_time = timed(page_results, data, narrow)
+            print(f"  {kind:7s} build {build:7.2f}s | KPI+graphs all selected {all_time:.3f}s | one month, two machines {narrow_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
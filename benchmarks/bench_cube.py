@@ -0,0 +1,118 @@
+# Verifikasi dan benchmark cube harian vs perhitungan di baris mentah
+#
+# Memastikan calculate_metrics/graph_data dari cube sama dengan implementasi lama di baris
+# mentah (workbook asli dan data sintetis, berbagai seleksi filter), termasuk cube yang
+# diperbarui secara incremental, lalu membandingkan waktu per interaksi.
+#
+#   python -m benchmarks.bench_cube --rows 2000000
+import argparse
+import math
+import random
+import time
+
+import pandas as pd
+
+import cube
+import ingest
+import metrics
+import schema
+from benchmarks import reference
+from benchmarks.synthetic import production_frame
+from filter_index import FilterIndex
+
+
+def assert_metrics_equal(expected, result):
+    assert expected.keys() == result.keys()
+    for key, value in expected.items():
+        if isinstance(value, str):
+            assert value == result[key], (key, value, result[key])
+        else:
+            assert math.isclose(value, result[key], rel_tol=1e-9), (key, value, result[key])
+
+
+def assert_graph_data_equal(expected, result):
+    assert expected.keys() == result.keys()
+    for key, value in expected.items():
+        if isinstance(value, pd.Series):
+            pd.testing.assert_series_equal(value, result[key])
+        else:
+            pd.testing.assert_frame_equal(value, result[key])
+
+
+def assert_cube_equal(expected, result):
+    expected = expected.sort_values(cube.KEYS).reset_index(drop=True)
+    result = result.sort_values(cube.KEYS).reset_index(drop=True)
+    pd.testing.assert_frame_equal(expected, result, check_dtype=False)
+
+
+def random_selections(df, count, seed=0):
+    rng = random.Random(seed)
+    options = [sorted(df[column].dropna().unique()) for column in ("YEARS", "MONTH", "MESIN", "NAMA_PRODUCT")]
+    start, end = df["TANGGAL"].min(), df["TANGGAL"].max()
+    yield [*options, start, end]
+    for _ in range(count):
+        chosen = [rng.sample(list(values), rng.randint(1, len(values))) for values in options]
+        dates = sorted(start + (end - start) * rng.random() for _ in range(2))
+        yield [*chosen, dates[0].normalize(), dates[1].normalize()]
+
+
+def verify(name, df, count):
+    full = cube.build(df)
+    split = len(df) * 2 // 3
+    assert_cube_equal(full, cube.merge(cube.build(df.iloc[:split]), cube.build(df.iloc[split:])))
+
+    raw_index, cube_index = FilterIndex(df), FilterIndex(full)
+    checked = 0
+    for selection in random_selections(df, count):
+        # Pembanding: implementasi lama di baris mentah dengan tipe data lama (tanpa schema)
+        raw = schema.widen(raw_index.filter(df, *selection))
+        if raw.empty:
+            continue
+        selected = cube_index.filter(full, *selection)
+        assert_metrics_equal(reference.calculate_metrics(raw), metrics.calculate_metrics(selected))
+        assert_graph_data_equal(reference.graph_data(raw), metrics.graph_data(metrics.aggregate(selected)))
+        checked += 1
+    print(f"{name}: {len(df):,} rows -> {len(full):,} cells, {checked} selections match the raw-row path")
+    return full
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verifikasi dan benchmark cube harian Production.")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--selections", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    verify("Production.xlsx", ingest.load_cached("Source/Production.xlsx"), args.selections)
+
+    df = production_frame(args.rows)
+    start = time.perf_counter()
+    full = cube.build(df)
+    print(f"build cube for {len(df):,} rows: {time.perf_counter() - start:.2f}s")
+    verify("synthetic", df, 5)
+
+    def raw_path(selection):
+        raw = reference.mask_filter(df, *selection)
+        reference.calculate_metrics(raw)
+        reference.graph_data(raw)
+
+    cube_index = FilterIndex(full)
+
+    def cube_path(selection):
+        selected = cube_index.filter(full, *selection)
+        agg = metrics.aggregate(selected)
+        metrics.calculate_metrics(selected, agg)
+        metrics.graph_data(agg)
+
+    selection = next(random_selections(df, 0))
+    raw_time, cube_time = timed(raw_path, selection), timed(cube_path, selection)
+    print(f"per interaction (all selected): raw rows {raw_time:.3f}s | cube {cube_time:.3f}s | {raw_time / cube_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# Benchmark FilterIndex vs masker boolean lama di filter_dataframe
+#
+#   python -m benchmarks.bench_filter --rows 10000000
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.reference import mask_filter
+from benchmarks.synthetic import machine_names, product_names, production_frame
+from filter_index import FilterIndex
+
+
+def best_of(repeat, func, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark filter index vs masker boolean.")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    df = production_frame(args.rows)
+    print(f"generate {args.rows:,} rows: {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    index = FilterIndex(df)
+    print(f"build index: {time.perf_counter() - start:.2f}s")
+
+    machines, products = machine_names(7), product_names(40)
+    all_years, all_months = [2024, 2025, 2026], list(range(1, 13))
+    selections = {
+        "all selected": (all_years, all_months, machines, products, "2024-01-01", "2026-12-31"),
+        "one machine": (all_years, all_months, machines[:1], products, "2024-01-01", "2026-12-31"),
+        "5 products, 1 quarter": (all_years, all_months, machines, products[:5], "2025-01-01", "2025-03-31"),
+        "1 year, 3 months": ([2025], [1, 2, 3], machines, products, "2024-01-01", "2026-12-31"),
+        "one week": (all_years, all_months, machines, products, "2025-06-01", "2025-06-07"),
+    }
+
+    print(f"{'selection':24s} {'rows':>12s} {'masks':>10s} {'index':>10s} {'speedup':>8s}")
+    for name, selection in selections.items():
+        mask_time, expected = best_of(args.repeat, mask_filter, df, *selection)
+        index_time, result = best_of(args.repeat, index.filter, df, *selection)
+        pd.testing.assert_frame_equal(result, expected)
+        print(f"{name:24s} {len(result):>12,} {mask_time:>9.3f}s {index_time:>9.3f}s {mask_time / index_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
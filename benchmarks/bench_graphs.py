@@ -0,0 +1,87 @@
+# Microbenchmark agregasi grafik: groupby terpisah (versi lama) vs metrics.aggregate
+#
+# Versi lama mengelompokkan seleksi tujuh kali (NAMA_PRODUCT lima kali, termasuk dua kali
+# di dalam px.bar dan sekali di calculate_metrics, lalu MESIN dan TANGGAL). Versi baru
+# mem-factorize setiap kunci sekali dan menjumlahkan semua ukuran dengan np.bincount.
+#
+#   python -m benchmarks.bench_graphs --rows 5000000
+import argparse
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+import metrics
+from benchmarks import reference
+from benchmarks.bench_cube import assert_graph_data_equal
+from benchmarks.synthetic import production_frame
+
+
+# Hitung berapa kali seleksi dikelompokkan (DataFrame.groupby) atau di-factorize
+@contextmanager
+def count_passes():
+    counts = {"groupby": 0, "factorize": 0}
+    groupby, factorize = pd.DataFrame.groupby, pd.factorize
+
+    def counted_groupby(self, *args, **kwargs):
+        counts["groupby"] += 1
+        return groupby(self, *args, **kwargs)
+
+    def counted_factorize(*args, **kwargs):
+        counts["factorize"] += 1
+        return factorize(*args, **kwargs)
+
+    pd.DataFrame.groupby, pd.factorize = counted_groupby, counted_factorize
+    try:
+        yield counts
+    finally:
+        pd.DataFrame.groupby, pd.factorize = groupby, factorize
+
+
+def separate(df):
+    data = reference.graph_data(df)
+    # grouped_product di calculate_metrics lama
+    data["grouped_product"] = df.groupby("NAMA_PRODUCT")[["ACTUAL_QTY", "REJECT"]].sum()
+    # px.bar lama memanggil groupby NAMA_PRODUCT dua kali (x dan y)
+    df.groupby("NAMA_PRODUCT")["ACTUAL_QTY"].sum().sort_values(ascending=True)
+    return data
+
+
+def fused(df):
+    agg = metrics.aggregate(df)
+    data = metrics.graph_data(agg)
+    data["grouped_product"] = agg["product"]
+    return data
+
+
+def best_of(repeat, func, df):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmark agregasi grafik Production.")
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    df = production_frame(args.rows)
+    with count_passes() as old_passes:
+        expected = separate(df)
+    with count_passes() as new_passes:
+        result = fused(df)
+    assert_graph_data_equal(expected, result)
+
+    old_time, new_time = best_of(args.repeat, separate, df), best_of(args.repeat, fused, df)
+    print(f"selection: {len(df):,} rows")
+    print(f"separate groupbys: {old_passes['groupby']} groupby passes, {old_time:.3f}s")
+    print(f"fused aggregate:   {new_passes['groupby']} groupby passes, {new_passes['factorize']} key factorizations, {new_time:.3f}s")
+    print(f"speedup: {old_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Verifikasi dan benchmark ringkasan material (halaman Used)
+#
+# Membandingkan materials.summarize (kode material dinormalisasi sekali per versi dataset)
+# dengan calculate_metrics_used lama (str.upper di setiap panggilan, lalu iterrows) pada
+# workbook asli dan salinan berulangnya.
+#
+#   python -m benchmarks.bench_materials --copies 100
+import argparse
+import time
+
+import pandas as pd
+
+import ingest
+import materials
+from benchmarks import reference
+from benchmarks.bench_cube import random_selections
+from filter_index import FilterIndex
+
+
+def expected_summary(df):
+    expected = pd.DataFrame(reference.calculate_metrics_used(df))
+    expected = expected.set_index("product").rename_axis("NAMA_MATERIAL")
+    expected.columns = ["TOTAL", "MEAN", "MAX", "MIN"]
+    return expected
+
+
+def verify(df, version, material_list, count):
+    lookup = materials.get_lookup(df, version)
+    index = FilterIndex(df)
+    checked = 0
+    for selection in random_selections(df, count):
+        selected = index.filter(df, *selection)
+        if selected.empty:
+            continue
+        result = materials.summarize(selected, lookup, material_list)
+        pd.testing.assert_frame_equal(expected_summary(selected), result, check_index_type=False)
+        checked += 1
+    print(f"Used.xlsx: {checked} selections match calculate_metrics_used")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verifikasi dan benchmark ringkasan material Used.")
+    parser.add_argument("--copies", type=int, default=100)
+    parser.add_argument("--selections", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    df, version = ingest.load_versioned("Source/Used.xlsx")
+    material_list = materials.load_material_list()
+    verify(df, version, material_list, args.selections)
+
+    big = pd.concat([df] * args.copies, ignore_index=True)
+    big_version = ("benchmark", len(big))
+    start = time.perf_counter()
+    lookup = materials.get_lookup(big, big_version)
+    print(f"build lookup for {len(big):,} rows: {time.perf_counter() - start:.2f}s (once per dataset version)")
+
+    start = time.perf_counter()
+    reference.calculate_metrics_used(big)
+    old_time = time.perf_counter() - start
+    start = time.perf_counter()
+    materials.summarize(big, lookup, material_list)
+    new_time = time.perf_counter() - start
+    print(f"per interaction (all selected): calculate_metrics_used {old_time:.3f}s | summarize {new_time:.3f}s | {old_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Pengukuran memori (RSS/PSS) per worker saat jumlah session bertambah
+#
+# Membandingkan cara lama (setiap worker membaca salinan dataset sendiri ke memori privat)
+# dengan file Arrow shared yang di-memory-map oleh semua worker. Setiap session menyimpan
+# hasil filter untuk seleksi default halaman (semua filter terpilih, berupa slice tanpa
+# salinan kolom) atau, dengan --partial, seleksi tanpa satu mesin (baris terpilih disalin).
+# Angka yang dilaporkan adalah selisih terhadap worker yang baru selesai import modul.
+#
+# PSS (proportional set size) membagi halaman memori yang dipakai bersama dengan jumlah
+# proses yang memakainya, jadi lebih jujur dari RSS untuk data shared. Hanya Linux.
+#
+#   python -m benchmarks.bench_memory --rows 2000000 --workers 4 --sessions 1 10 50
+import argparse
+import multiprocessing
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+import ingest
+from benchmarks.synthetic import production_frame
+from filter_index import get_index
+
+
+def memory_mb():
+    usage = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("Rss", "Pss"):
+                usage[name] = int(value.split()[0]) / 1024
+    return usage["Rss"], usage["Pss"]
+
+
+def page_selection(df, partial):
+    mesin = sorted(df["MESIN"].unique())
+    return [sorted(df["YEARS"].unique()), sorted(df["MONTH"].unique()), mesin[1:] if partial else mesin,
+            sorted(df["NAMA_PRODUCT"].unique()), df["TANGGAL"].min(), df["TANGGAL"].max()]
+
+
+def worker(mode, path, steps, partial, ready, results):
+    base_rss, base_pss = memory_mb()
+    df = ingest._map_frame(path) if mode == "shared" else pd.read_feather(path)
+    index = get_index(df)
+    selection = page_selection(df, partial)
+
+    sessions = []
+    for step in steps:
+        while len(sessions) < step:
+            sessions.append(index.filter(df, *selection))
+        ready.wait()
+        rss, pss = memory_mb()
+        results.put((rss - base_rss, pss - base_pss))
+        ready.wait()
+
+
+def measure(mode, path, workers, steps, partial):
+    context = multiprocessing.get_context("spawn")
+    ready = context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(mode, path, steps, partial, ready, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for step in steps:
+        # Semua worker sudah sampai jumlah session ini; ukur saat mereka masih hidup
+        ready.wait()
+        rows = [results.get() for _ in processes]
+        rss = sum(row[0] for row in rows) / workers
+        pss = sum(row[1] for row in rows) / workers
+        print(f"{mode:8s} {workers} workers, {step:4d} sessions/worker: RSS {rss:8.1f} MB | PSS {pss:8.1f} MB per worker")
+        ready.wait()
+    for process in processes:
+        process.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ukur RSS/PSS per worker untuk dataset shared vs salinan per worker.")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--partial", action="store_true", help="Seleksi tanpa satu mesin (bukan semua terpilih)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        df = production_frame(args.rows)
+        data_path = Path(tmp) / "bench.arrow"
+        ingest._share({"lineage": "bench", "rows": len(df)}, data_path, lambda: df)
+        path = str(ingest._shared_path(data_path))
+        print(f"dataset: {len(df):,} rows, {df.memory_usage(deep=True).sum() / 2**20:.1f} MB in pandas")
+        del df
+        for mode in ("private", "shared"):
+            measure(mode, path, args.workers, args.sessions, args.partial)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Waktu start dan rerun dashboard (tanpa browser, lewat streamlit AppTest)
+#
+# Setiap percobaan dijalankan di proses Python baru supaya import modul ikut terhitung:
+#   import  = import streamlit dan AppTest
+#   first   = run pertama Home.py (load dataset dari cache, filter, KPI, grafik tab pertama);
+#             ini perkiraan time-to-first-render di sisi server
+#   rerun   = run berikutnya dengan seleksi yang sama (median)
+# Juga dicatat modul berat mana yang sudah ter-import setelah run pertama.
+#
+#   python -m benchmarks.bench_startup --runs 3 --reruns 5 --page Used
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HOME = Path(__file__).resolve().parent.parent / "Home.py"
+# plotly.graph_objects selalu di-import oleh streamlit sendiri, jadi yang dicatat plotly.express
+HEAVY_MODULES = ["plotly.express", "scipy", "openpyxl", "xlsxwriter"]
+
+
+def child(page, reruns):
+    start = time.perf_counter()
+    import streamlit_option_menu
+    from streamlit.testing.v1 import AppTest
+    imported = time.perf_counter() - start
+
+    # Halaman dipilih dengan mengganti option_menu di sidebar
+    streamlit_option_menu.option_menu = lambda *args, **kwargs: page
+    app = AppTest.from_file(str(HOME), default_timeout=600)
+    start = time.perf_counter()
+    app.run()
+    first = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    timings = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - start)
+    print(json.dumps({"import": imported, "first": first, "rerun": statistics.median(timings) if timings else None,
+                      "heavy_modules": loaded}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ukur waktu start (cold) dan rerun dashboard.")
+    parser.add_argument("--page", default="Production", choices=["Production", "Used", "Usage"])
+    parser.add_argument("--runs", type=int, default=3, help="Jumlah proses baru (cold start)")
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.page, args.reruns)
+        return
+
+    results = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child", "--page", args.page, "--reruns", str(args.reruns)],
+            cwd=HOME.parent, capture_output=True, text=True, check=True)
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    median = lambda key: statistics.median(result[key] for result in results)
+    print(f"page {args.page}, {args.runs} cold starts:")
+    print(f"  import streamlit: {median('import'):.2f}s")
+    print(f"  first run:        {median('first'):.2f}s")
+    print(f"  rerun (median):   {median('rerun'):.3f}s")
+    print(f"  heavy modules after first run: {', '.join(results[0]['heavy_modules']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# Benchmark suite headless untuk tahap-tahap dashboard pada berbagai ukuran data
+#
+# Untuk setiap ukuran, frame Production dan Used sintetis (lihat synthetic.py, bentuk
+# setelah skema) dibuat lalu setiap tahap diukur tanpa browser:
+#   load_data            tulis file Arrow shared (cold) dan memory-map ulang (warm);
+#                        parse workbook .xlsx hanya untuk ukuran <= --xlsx-rows
+#   filter_dataframe     bangun filter index, lalu filter per seleksi
+#   calculate_metrics    bangun cube harian, lalu cube terfilter -> aggregate -> KPI
+#   display_graphs       agregasi data grafik (graph_data)
+#   sigma_breakdown      DPU/DPMO/sigma per mesin, produk, mesin-produk, tanggal
+#   control_charts       bangun statistik SPC, lalu daftar mesin out-of-control per seleksi
+#   calculate_metrics_used  bangun lookup material, lalu ringkasan per seleksi
+#   usage_per_unit       ringkasan harian Used, join dengan cube Production sintetis
+#                        berukuran sama, lalu kg per unit per produk per seleksi
+#   export_data          CSV/Parquet/Excel dari seleksi (dilewati di atas --export-rows)
+# Seleksi: "all" (semua filter terpilih) dan "narrow" (satu bulan, dua mesin). Waktu per
+# seleksi adalah median dari --repeat kali.
+#
+# Hasil ditulis sebagai JSON (termasuk commit git dan versi library), jadi dua run bisa
+# dibandingkan dengan --compare. 50 juta baris butuh sekitar 8 GB RAM.
+#
+#   python -m benchmarks.bench_suite --sizes 10000 100000 1000000 --output suite.json
+#   python -m benchmarks.bench_suite --sizes 10000 100000 --compare suite.json
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow
+
+import backend
+import cube
+import export
+import ingest
+import materials
+import metrics
+import spc
+import usage
+from benchmarks.bench_cube import random_selections
+from benchmarks.synthetic import production_frame, used_frame
+from filter_index import FilterIndex
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+# Batas baris satu sheet Excel (tanpa header)
+EXCEL_MAX_ROWS = 1_048_575
+
+
+class Recorder:
+    def __init__(self):
+        self.results = []
+
+    def add(self, dataset, rows, stage, seconds, selection=None, result_rows=None, note=None):
+        self.results.append({"dataset": dataset, "rows": rows, "stage": stage, "selection": selection,
+                             "seconds": seconds, "result_rows": result_rows, "note": note})
+        label = f"{stage}[{selection}]" if selection else stage
+        detail = f"{seconds * 1000:10.1f} ms" if seconds is not None else f"{'-':>13s}"
+        print(f"  {dataset:10s} {rows:>12,} {label:36s} {detail}" + (f"  ({note})" if note else ""))
+
+
+def timed(func, repeat=1):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def selections(df):
+    full = next(random_selections(df, 0))
+    narrow = [full[0], full[1][:1], full[2][:2], full[3], full[4], full[4] + pd.Timedelta(days=30)]
+    return {"all": full, "narrow": narrow}
+
+
+# Tulis file Arrow shared seperti ingest (cold) lalu map ulang (warm); frame hasil map yang
+# dipakai tahap berikutnya, sama seperti di dashboard
+def bench_load(rec, dataset, df, tmp, args):
+    n = len(df)
+    if n <= min(args.xlsx_rows, EXCEL_MAX_ROWS):
+        path = Path(tmp) / f"{dataset}-{n}.xlsx"
+        with open(path, "wb") as f:
+            export.write_excel(df, f)
+        seconds, _ = timed(lambda: ingest.read_workbook(path, "Sheet1", dataset))
+        rec.add(dataset, n, "load_data:xlsx", seconds)
+        path.unlink()
+    else:
+        rec.add(dataset, n, "load_data:xlsx", None, note=f"skipped, > {min(args.xlsx_rows, EXCEL_MAX_ROWS):,} rows")
+
+    manifest = {"schema": dataset, "lineage": f"suite-{n}", "rows": n}
+    data_path = Path(tmp) / f"{dataset}-{n}.arrow"
+    seconds, _ = timed(lambda: ingest._share(manifest, data_path, lambda: df))
+    rec.add(dataset, n, "load_data:cold", seconds)
+    seconds, mapped = timed(lambda: ingest._map_frame(ingest._shared_path(data_path)), args.repeat)
+    rec.add(dataset, n, "load_data:warm", seconds)
+    return mapped
+
+
+def bench_filter(rec, dataset, df, chosen, args):
+    n = len(df)
+    seconds, index = timed(lambda: FilterIndex(df))
+    rec.add(dataset, n, "filter_dataframe:build", seconds)
+    selected = {}
+    for name, filters in chosen.items():
+        seconds, selected[name] = timed(lambda: index.filter(df, *filters), args.repeat)
+        rec.add(dataset, n, "filter_dataframe", seconds, name, len(selected[name]))
+    return selected
+
+
+def bench_export(rec, dataset, n, selected, args):
+    for name, df in selected.items():
+        for fmt in ("csv", "parquet", "excel"):
+            limit = min(args.export_rows, EXCEL_MAX_ROWS) if fmt == "excel" else args.export_rows
+            if len(df) > limit:
+                rec.add(dataset, n, f"export_data:{fmt}", None, name, len(df), f"skipped, > {limit:,} rows")
+                continue
+            seconds, data = timed(lambda: export.to_bytes(df, fmt))
+            rec.add(dataset, n, f"export_data:{fmt}", seconds, name, len(df), f"{len(data) / 2**20:.1f} MB")
+
+
+def bench_production(rec, n, tmp, args):
+    df = bench_load(rec, "Production", production_frame(n, compact=True, seed=args.seed), tmp, args)
+    chosen = selections(df)
+    selected = bench_filter(rec, "Production", df, chosen, args)
+
+    seconds, daily = timed(lambda: cube.build(df))
+    rec.add("Production", n, "calculate_metrics:cube", seconds, result_rows=len(daily))
+    cube_index = FilterIndex(daily)
+    for name, filters in chosen.items():
+        def kpi():
+            cube_selection = cube_index.filter(daily, *filters)
+            agg = metrics.aggregate(cube_selection)
+            metrics.calculate_metrics(cube_selection, agg)
+            return agg
+        seconds, agg = timed(kpi, args.repeat)
+        rec.add("Production", n, "calculate_metrics", seconds, name)
+        seconds, _ = timed(lambda: metrics.graph_data(agg), args.repeat)
+        rec.add("Production", n, "display_graphs", seconds, name)
+        seconds, _ = timed(lambda: metrics.sigma_breakdown(cube_index.filter(daily, *filters)), args.repeat)
+        rec.add("Production", n, "sigma_breakdown", seconds, name)
+
+    seconds, stats = timed(lambda: spc.build(df))
+    rec.add("Production", n, "control_charts:build", seconds)
+    for name, filters in chosen.items():
+        seconds, _ = timed(lambda: spc.out_of_control(stats["mesin"], filters[2], filters[4], filters[5]), args.repeat)
+        rec.add("Production", n, "control_charts", seconds, name)
+
+    bench_export(rec, "Production", n, selected, args)
+
+
+def bench_used(rec, n, tmp, args):
+    df = bench_load(rec, "Used", used_frame(n, compact=True, seed=args.seed), tmp, args)
+    chosen = selections(df)
+    selected = bench_filter(rec, "Used", df, chosen, args)
+
+    version = (f"suite-{n}-{time.time()}", n)
+    seconds, lookup = timed(lambda: materials.get_lookup(df, version))
+    rec.add("Used", n, "calculate_metrics_used:lookup", seconds)
+    material_list = materials.load_material_list()
+    for name, rows in selected.items():
+        seconds, _ = timed(lambda: materials.summarize(rows, lookup, material_list), args.repeat)
+        rec.add("Used", n, "calculate_metrics_used", seconds, name, len(rows))
+
+    seconds, daily = timed(lambda: usage.get_daily(backend.PandasBackend("Used", df, version), version))
+    rec.add("Used", n, "usage_per_unit:daily", seconds, result_rows=len(daily))
+    production_cube = cube.build(production_frame(n, compact=True, seed=args.seed))
+    seconds, joined = timed(lambda: usage.build(production_cube, daily))
+    rec.add("Used", n, "usage_per_unit:join", seconds, result_rows=len(joined),
+            note=f"{joined['MATCHED'].mean():.1%} matched" if len(joined) else None)
+    joined_index = FilterIndex(joined)
+    for name, filters in chosen.items():
+        rows = joined_index.filter(joined, *filters)
+        seconds, _ = timed(lambda: usage.summarize(rows, "product"), args.repeat)
+        rec.add("Used", n, "usage_per_unit", seconds, name, len(rows))
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+def environment(args):
+    commit, dirty = git_commit()
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "dirty": dirty,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": pyarrow.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": dict(vars(args)),
+    }
+
+
+def _key(result):
+    return result["dataset"], result["rows"], result["stage"], result["selection"]
+
+
+# Bandingkan dengan hasil run lain (mis. dari commit sebelumnya): rasio > 1 berarti lebih lambat
+def compare(results, baseline_path):
+    baseline = {_key(result): result["seconds"] for result in json.loads(Path(baseline_path).read_text())["results"]}
+    print(f"\ncompared with {baseline_path} (new / old):")
+    for result in results:
+        old = baseline.get(_key(result))
+        if old is None or result["seconds"] is None or not old:
+            continue
+        dataset, rows, stage, selection = _key(result)
+        label = f"{stage}[{selection}]" if selection else stage
+        ratio = result["seconds"] / old
+        flag = "  <-- slower" if ratio > 1.2 else ""
+        print(f"  {dataset:10s} {rows:>12,} {label:36s} {old * 1000:10.1f} -> {result['seconds'] * 1000:10.1f} ms"
+              f"  x{ratio:.2f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark headless tahap-tahap dashboard pada data sintetis.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Jumlah baris (10000 s.d. 50000000)")
+    parser.add_argument("--datasets", nargs="+", default=["Production", "Used"], choices=["Production", "Used"])
+    parser.add_argument("--repeat", type=int, default=3, help="Ulangan per tahap per seleksi (median)")
+    parser.add_argument("--xlsx-rows", type=int, default=100_000, help="Ukuran maksimum untuk parse workbook .xlsx")
+    parser.add_argument("--export-rows", type=int, default=200_000, help="Ukuran seleksi maksimum untuk ekspor")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="File JSON hasil (default: bench_suite-<commit>.json)")
+    parser.add_argument("--compare", help="File JSON hasil run sebelumnya untuk dibandingkan")
+    args = parser.parse_args(argv)
+
+    meta = environment(args)
+    rec = Recorder()
+    benches = {"Production": bench_production, "Used": bench_used}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            for dataset in args.datasets:
+                benches[dataset](rec, n, tmp, args)
+                gc.collect()
+
+    output = Path(args.output or f"bench_suite-{(meta['commit'] or 'unknown')[:10]}.json")
+    output.write_text(json.dumps({"meta": meta, "results": rec.results}, indent=1))
+    print(f"\nwritten {output}")
+    if args.compare:
+        compare(rec.results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# Implementasi lama (langsung di baris mentah) sebagai pembanding di benchmark
+#
+# Disalin dari Home.py sebelum filter index dan cube diperkenalkan; dipakai untuk
+# memastikan hasil jalur baru sama persis dengan jalur baris mentah.
+import pandas as pd
+from scipy import stats
+
+
+def mask_filter(df, years, months, mesin, product, start_date, end_date):
+    return df[
+        (df["YEARS"].isin(years)) &
+        (df["MONTH"].isin(months)) &
+        (df["MESIN"].isin(mesin)) &
+        (df["NAMA_PRODUCT"].isin(product)) &
+        (df["TANGGAL"] >= pd.to_datetime(start_date)) &
+        (df["TANGGAL"] <= pd.to_datetime(end_date))
+    ]
+
+
+def calculate_metrics(df):
+    total_finishgood = float(df["ACTUAL_QTY"].sum())
+    production_mean = float(df["ACTUAL_QTY"].mean())
+    total_reject = float(df["REJECT"].sum()) if "REJECT" in df.columns else 0
+    reject_mean = float(df["REJECT"].mean()) if "REJECT" in df.columns else 0
+
+    max_single_qty_row = df.loc[df["ACTUAL_QTY"].idxmax()]
+    max_single_product = max_single_qty_row["NAMA_PRODUCT"]
+    max_single_qty = max_single_qty_row["ACTUAL_QTY"]
+
+    min_single_qty_row = df.loc[df["ACTUAL_QTY"].idxmin()]
+    min_single_product = min_single_qty_row["NAMA_PRODUCT"]
+    min_single_qty = min_single_qty_row["ACTUAL_QTY"]
+
+    grouped_product = df.groupby("NAMA_PRODUCT")[["ACTUAL_QTY", "REJECT"]].sum() if "REJECT" in df.columns else df.groupby("NAMA_PRODUCT")[["ACTUAL_QTY"]].sum()
+    max_actual_qty_product = grouped_product["ACTUAL_QTY"].idxmax()
+    max_actual_qty_value = grouped_product["ACTUAL_QTY"].max()
+    min_actual_qty_product = grouped_product["ACTUAL_QTY"].idxmin()
+    min_actual_qty_value = grouped_product["ACTUAL_QTY"].min()
+
+    if "REJECT" in df.columns:
+        max_reject_product = grouped_product["REJECT"].idxmax()
+        max_reject_value = grouped_product["REJECT"].max()
+        min_reject_product = grouped_product["REJECT"].idxmin()
+        min_reject_value = grouped_product["REJECT"].min()
+    else:
+        max_reject_product = min_reject_product = "N/A"
+        max_reject_value = min_reject_value = 0
+
+    total_unit_all = total_finishgood + total_reject
+    dpu = (total_reject / total_unit_all) * 100 if total_unit_all != 0 and "REJECT" in df.columns else 0
+
+    def calculate_dpmo_sigma(defect, total_unit, opp_per_unit):
+        dpmo = (defect / (total_unit * opp_per_unit)) * 1_000_000 if total_unit * opp_per_unit != 0 else 0
+        sigma = stats.norm.ppf(1 - dpmo / 1_000_000) + 1.5 if dpmo < 1_000_000 else 0
+        return dpmo, sigma
+
+    dpmo, sigma = calculate_dpmo_sigma(defect=total_reject, total_unit=total_unit_all, opp_per_unit=5) if "REJECT" in df.columns else (0, 0)
+
+    return {
+        "total_finishgood": total_finishgood,
+        "production_mean": production_mean,
+        "total_reject": total_reject,
+        "reject_mean": reject_mean,
+        "max_single_product": max_single_product,
+        "max_single_qty": max_single_qty,
+        "min_single_product": min_single_product,
+        "min_single_qty": min_single_qty,
+        "max_actual_qty_product": max_actual_qty_product,
+        "max_actual_qty_value": max_actual_qty_value,
+        "min_actual_qty_product": min_actual_qty_product,
+        "min_actual_qty_value": min_actual_qty_value,
+        "max_reject_product": max_reject_product,
+        "max_reject_value": max_reject_value,
+        "min_reject_product": min_reject_product,
+        "min_reject_value": min_reject_value,
+        "dpu": dpu,
+        "dpmo": dpmo,
+        "sigma": sigma
+    }
+
+
+def graph_data(df):
+    distribusi_produk = df.groupby("NAMA_PRODUCT")[["ACTUAL_QTY"]].sum()
+    distribusi_produk["PERCENT"] = distribusi_produk["ACTUAL_QTY"] / distribusi_produk["ACTUAL_QTY"].sum()
+
+    hasil_utama = distribusi_produk[distribusi_produk["PERCENT"] >= 0.01]
+    hasil_lainnya = distribusi_produk[distribusi_produk["PERCENT"] < 0.01]
+
+    if not hasil_lainnya.empty:
+        total_lainnya = hasil_lainnya["ACTUAL_QTY"].sum()
+        hasil_utama.loc["Lainnya"] = [total_lainnya, total_lainnya / distribusi_produk["ACTUAL_QTY"].sum()]
+
+    data = {
+        "distribusi_produk": hasil_utama.sort_values(by="ACTUAL_QTY", ascending=False),
+        "produksi_produk": df.groupby("NAMA_PRODUCT")["ACTUAL_QTY"].sum().sort_values(ascending=True),
+    }
+
+    if "REJECT" in df.columns:
+        reject_mesin = df.groupby("MESIN")[["REJECT"]].sum().sort_values(by="REJECT", ascending=False)
+        reject_mesin["CUMSUM"] = reject_mesin["REJECT"].cumsum()
+        reject_mesin["CUMPCT"] = 100 * reject_mesin["CUMSUM"] / reject_mesin["REJECT"].sum()
+
+        reject_produk = df.groupby("NAMA_PRODUCT")[["REJECT"]].sum().sort_values(by="REJECT", ascending=False)
+        reject_produk["CUMSUM"] = reject_produk["REJECT"].cumsum()
+        reject_produk["CUMPCT"] = 100 * reject_produk["CUMSUM"] / reject_produk["REJECT"].sum()
+
+        data["reject_mesin"] = reject_mesin
+        data["reject_produk"] = reject_produk
+        data["reject_trend"] = df.groupby("TANGGAL")["REJECT"].sum().reset_index()
+
+    return data
+
+
+def calculate_metrics_used(df):
+    # Daftar material yang ingin ditampilkan
+    target_materials = ["ABU BATU", "STL 5/10", "PASIR LUMAJANG",
+                        "SIRTU AYAK", "SEMEN", "CARBON BLACK",
+                        "CARBON RED", "PIGMENT BLACK 777 HEINRICH JERMAN",
+                        "PIGMENT RED 130 HEINRICH JERMAN", "CARBON TP 130 RED",
+                        "PIGMENT BLACK 330 HEINRICH JERMAN", "PIGMENT TP 130 RED"]
+
+    # Filter hanya baris dengan material tersebut (tanpa terpengaruh kapitalisasi)
+    df = df[df["NAMA_MATERIAL"].str.upper().isin([m.upper() for m in target_materials])]
+
+    grouped = df.groupby("NAMA_MATERIAL")["JUMLAH"].agg(["sum", "mean", "max", "min"]).reset_index()
+
+    metrics = []
+
+    for _, row in grouped.iterrows():
+        metrics.append({
+            "product": row["NAMA_MATERIAL"],
+            "total": row["sum"],
+            "mean": row["mean"],
+            "max": row["max"],
+            "min": row["min"]
+        })
+
+    return metrics
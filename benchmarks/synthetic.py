@@ -0,0 +1,119 @@
+# Generator data sintetis berbentuk sheet Production dan Used untuk benchmark
+#
+# Kardinalitas default mengikuti workbook asli: 7 mesin, 40 produk, 13 material, 3 tahun
+# tanggal. Dengan compact=True frame dibuat langsung dalam bentuk setelah skema (kolom
+# categorical dan integer kecil, lihat schema.py), jadi frame besar (puluhan juta baris)
+# tidak perlu melewati kolom string penuh.
+import numpy as np
+import pandas as pd
+
+import schema
+
+# (nama material, median JUMLAH, sebaran lognormal) seperti di Used.xlsx
+MATERIALS = [
+    ("SEMEN", 1530, 0.35), ("ABU BATU", 8475, 0.45), ("AIR", 585, 0.45), ("STL 5/10", 1440, 0.7),
+    ("PASIR LUMAJANG", 4255, 0.4), ("SIRTU AYAK", 9000, 0.4), ("CARBON BLACK", 4.8, 0.6),
+    ("PIGMENT BLACK 330 HEINRICH JERMAN", 6.2, 0.7), ("CARBON RED", 76, 0.3),
+    ("PIGMENT BLACK 777 HEINRICH JERMAN", 64, 0.6), ("CARBON TP 130 RED", 78, 0.2),
+    ("PIGMENT TP 130 RED", 91, 0.15), ("PIGMENT RED 130 HEINRICH JERMAN", 37, 0.5),
+]
+# Material per batch produksi (satu baris Used per material): bahan dasar + pewarna
+RECIPES = [[0, 1, 2, 3, 5, 6], [0, 1, 2, 4, 7, 8], [0, 1, 2, 3, 4, 9], [0, 1, 2, 5, 10, 11], [0, 1, 2, 4, 5, 12]]
+
+
+def machine_names(n_machines):
+    return [f"MP {i}" for i in range(1, n_machines + 1)]
+
+
+def product_names(n_products):
+    types = ["PAVING 6 K300", "PAVING 8 K350", "KANSTIN 421 K300", "GRASS BLOCK 6 (30X30) K300", "PAVING 10,5X10,5 6 K300"]
+    colors = ["ABU-ABU", "MERAH", "HITAM", "KUNING"]
+    return [f"{types[i % len(types)]} {colors[(i // len(types)) % len(colors)]} #{i + 1}" for i in range(n_products)]
+
+
+def material_names(n_materials):
+    names = [name for name, _, _ in MATERIALS[:n_materials]]
+    return names + [f"MATERIAL #{i + 1}" for i in range(len(names), n_materials)]
+
+
+# Kolom teks dari daftar nama dan kode per baris; compact=True langsung categorical
+# dengan kategori terurut (sama seperti hasil schema.apply)
+def _labels(names, codes, compact):
+    names = np.array(names, dtype=object)
+    if not compact:
+        return pd.Series(names[codes], dtype="str")
+    order = np.argsort(names)
+    rank = np.empty(len(names), dtype=np.int32)
+    rank[order] = np.arange(len(names))
+    categories = pd.Index(names[order], dtype="str")
+    return pd.Series(pd.Categorical.from_codes(rank[codes], categories))
+
+
+def _dates(rng, n_rows, n_days, start):
+    days = rng.integers(0, n_days, n_rows)
+    return (pd.Timestamp(start).to_datetime64() + days.astype("timedelta64[D]")).astype("datetime64[us]")
+
+
+def _with_date_parts(df, name, compact):
+    df["YEARS"] = df["TANGGAL"].dt.year
+    df["MONTH"] = df["TANGGAL"].dt.month
+    df["DAYS"] = df["TANGGAL"].dt.day
+    return schema.apply(df, name) if compact else df
+
+
+def _zipf(rng, n_values, n_rows):
+    weights = 1.0 / np.arange(1, n_values + 1)
+    return rng.choice(n_values, n_rows, p=weights / weights.sum())
+
+
+# Frame Production sintetis: produk mengikuti distribusi Zipf seperti data asli
+def production_frame(n_rows, n_machines=7, n_products=40, n_days=1095, start="2024-01-01", seed=0, compact=False):
+    rng = np.random.default_rng(seed)
+    tanggal = _dates(rng, n_rows, n_days, start)
+    products = _zipf(rng, n_products, n_rows)
+    machines = rng.integers(0, n_machines, n_rows)
+
+    target = rng.integers(500, 7000, n_rows)
+    reject = rng.binomial(target, 0.01)
+    actual = target - reject - rng.integers(0, 200, n_rows).clip(max=target - reject)
+
+    df = pd.DataFrame({
+        "MESIN": _labels(machine_names(n_machines), machines, compact),
+        "TANGGAL": tanggal,
+        "NAMA_PRODUCT": _labels(product_names(n_products), products, compact),
+        "TARGET_QTY": target,
+        "REJECT": reject,
+        "ACTUAL_QTY": actual,
+    })
+    return _with_date_parts(df, "Production", compact)
+
+
+# Frame Used sintetis: setiap batch produksi (produk, mesin, tanggal) memakai satu resep
+# berisi beberapa material, satu baris per material
+def used_frame(n_rows, n_machines=7, n_products=40, n_materials=len(MATERIALS), n_days=1095,
+               start="2024-01-01", seed=0, compact=False):
+    rng = np.random.default_rng(seed)
+    recipes = np.array([[slot % n_materials for slot in recipe] for recipe in RECIPES])
+    per_batch = recipes.shape[1]
+    n_batches = -(-n_rows // per_batch)
+
+    products = _zipf(rng, n_products, n_batches)
+    batch = np.arange(n_rows) // per_batch
+    material = recipes[(products % len(recipes))[batch], np.arange(n_rows) % per_batch]
+    if n_materials > len(MATERIALS):
+        # Material tambahan (di luar daftar asli) menggantikan sebagian pewarna secara acak
+        extra = rng.random(n_rows) < 0.05
+        material[extra] = rng.integers(len(MATERIALS), n_materials, extra.sum())
+
+    median = np.array([MATERIALS[i % len(MATERIALS)][1] for i in range(n_materials)])
+    spread = np.array([MATERIALS[i % len(MATERIALS)][2] for i in range(n_materials)])
+    jumlah = np.round(median[material] * np.exp(rng.normal(0, 1, n_rows) * spread[material]), 2)
+
+    df = pd.DataFrame({
+        "NAMA_PRODUCT": _labels(product_names(n_products), products[batch], compact),
+        "MESIN": _labels(machine_names(n_machines), rng.integers(0, n_machines, n_batches)[batch], compact),
+        "TANGGAL": _dates(rng, n_batches, n_days, start)[batch],
+        "NAMA_MATERIAL": _labels(material_names(n_materials), material, compact),
+        "JUMLAH": jumlah,
+    })
+    return _with_date_parts(df, "Used", compact)
@@ -0,0 +1,88 @@
+# Cube harian Production: agregat per (TANGGAL, MESIN, NAMA_PRODUCT)
+#
+# Semua KPI dan grafik halaman Production adalah jumlah per tanggal, mesin atau produk,
+# jadi cukup dihitung dari cube ini, bukan dari baris mentah. Selain jumlah dan count,
+# setiap sel menyimpan nilai ACTUAL_QTY terbesar/terkecil beserta row id barisnya supaya
+# "Highest/Lowest Single-Day Output" tetap sama persis dengan idxmax/idxmin di baris mentah.
+# Kolom filter (YEARS, MONTH, MESIN, NAMA_PRODUCT, TANGGAL) ikut ada, jadi cube bisa
+# difilter dengan filter_index seperti DataFrame aslinya.
+import threading
+
+import pandas as pd
+
+import schema
+
+KEYS = ["TANGGAL", "MESIN", "NAMA_PRODUCT"]
+MEASURES = ["ACTUAL_QTY", "REJECT", "TARGET_QTY"]
+
+# Cube per lineage dataset: lineage -> (jumlah baris mentah yang sudah masuk, cube)
+_cubes = {}
+_lock = threading.Lock()
+_MAX_LINEAGES = 4
+
+
+def _extreme(df, column, how):
+    values = df[[*KEYS, column]].dropna(subset=[column])
+    grouped = values.groupby(KEYS, sort=False, observed=True)[column]
+    rows = grouped.idxmax() if how == "max" else grouped.idxmin()
+    name = "MAX" if how == "max" else "MIN"
+    return pd.DataFrame({f"{name}_QTY": values.loc[rows.to_numpy(), column].to_numpy(),
+                         f"{name}_ROW": rows.to_numpy()}, index=rows.index)
+
+
+def _with_date_parts(cube):
+    cube["YEARS"] = cube["TANGGAL"].dt.year
+    cube["MONTH"] = cube["TANGGAL"].dt.month
+    cube["DAYS"] = cube["TANGGAL"].dt.day
+    return cube
+
+
+# Bangun cube dari baris mentah; row id = label index DataFrame mentah
+def build(df):
+    measures = [column for column in MEASURES if column in df.columns]
+    grouped = df.groupby(KEYS, sort=False, observed=True)
+    cube = grouped[measures].sum()
+    cube = cube.join(grouped[measures].count().add_suffix("_N"))
+    cube["ROWS"] = grouped.size()
+    cube = cube.join(_extreme(df, "ACTUAL_QTY", "max")).join(_extreme(df, "ACTUAL_QTY", "min"))
+    return _with_date_parts(cube.reset_index())
+
+
+def _best(df, column, ascending):
+    # Nilai ekstrem per sel; kalau seri, row id terkecil (baris paling awal) yang menang
+    ordered = df.sort_values([column, column.replace("QTY", "ROW")], ascending=[ascending, True], na_position="last")
+    return ordered.drop_duplicates(KEYS).set_index(KEYS)[[column, column.replace("QTY", "ROW")]]
+
+
+# Gabungkan dua cube (mis. cube lama + cube dari baris yang baru di-append)
+def merge(cube, cube_new):
+    both = schema.concat([cube, cube_new])
+    additive = [column for column in both.columns if column not in KEYS and column in
+                (*MEASURES, *(f"{m}_N" for m in MEASURES), "ROWS")]
+    merged = both.groupby(KEYS, sort=False, observed=True)[additive].sum()
+    merged = merged.join(_best(both, "MAX_QTY", False)).join(_best(both, "MIN_QTY", True))
+    return _with_date_parts(merged.reset_index())
+
+
+# Cube untuk dataset pada versi tertentu (lihat ingest.load_versioned). Kalau versi baru
+# hanya menambah baris, cube lama diperbarui dari baris tambahan saja.
+def get_cube(df, version):
+    lineage, rows = version
+    with _lock:
+        cached = _cubes.get(lineage)
+    if cached is not None and cached[0] == rows:
+        return cached[1]
+
+    if cached is not None and cached[0] < rows:
+        cube = merge(cached[1], build(df.iloc[cached[0]:rows]))
+    else:
+        cube = build(df.iloc[:rows])
+
+    with _lock:
+        # Session yang masih memakai versi lama tidak menimpa cube versi yang lebih baru
+        current = _cubes.get(lineage)
+        if current is None or current[0] < rows:
+            _cubes[lineage] = (rows, cube)
+        while len(_cubes) > _MAX_LINEAGES:
+            del _cubes[next(iter(_cubes))]
+    return cube
@@ -0,0 +1,48 @@
+# Downsampling deret waktu untuk grafik (mis. trend reject harian)
+#
+# Untuk rentang tanggal panjang, satu titik per hari membuat payload grafik besar dan
+# lambat di browser. Bucket (hari, minggu, bulan) dipilih dari rentang tanggal dan lebar
+# grafik, lalu di setiap bucket hanya titik minimum dan maksimum yang disimpan supaya
+# lonjakan (spike) tetap terlihat.
+import numpy as np
+
+# Lebar grafik (px) yang diasumsikan; server tidak tahu lebar browser sebenarnya
+DEFAULT_WIDTH_PX = 1000
+# Jarak minimum antar titik (px) sebelum titik mulai bertumpuk
+PX_PER_POINT = 4
+
+# (frekuensi period pandas, label, perkiraan jumlah hari per bucket)
+BUCKETS = [("W", "week", 7), ("M", "month", 30.44)]
+
+
+# Pilih bucket untuk rentang [start, end]; None berarti resolusi penuh (per hari)
+def choose_bucket(start, end, width_px=DEFAULT_WIDTH_PX, px_per_point=PX_PER_POINT):
+    budget = max(width_px // px_per_point, 2)
+    days = (end - start).days + 1
+    if days <= budget:
+        return None
+    for freq, label, days_per_bucket in BUCKETS:
+        # Setiap bucket menyumbang dua titik (min dan max)
+        if 2 * days / days_per_bucket <= budget:
+            return freq, label
+    return BUCKETS[-1][:2]
+
+
+# Simpan baris dengan nilai minimum dan maksimum per bucket, urutan baris tetap
+def minmax_per_bucket(df, x, y, freq):
+    if df.empty:
+        return df
+    grouped = df[y].groupby(df[x].dt.to_period(freq).to_numpy(), sort=False)
+    rows = np.union1d(grouped.idxmin().to_numpy(), grouped.idxmax().to_numpy())
+    return df.loc[rows]
+
+
+# Downsample deret untuk rentang tanggalnya sendiri; kembalikan (frame, label bucket atau None)
+def downsample(df, x, y, width_px=DEFAULT_WIDTH_PX):
+    if df.empty:
+        return df, None
+    bucket = choose_bucket(df[x].min(), df[x].max(), width_px)
+    if bucket is None:
+        return df, None
+    freq, label = bucket
+    return minmax_per_bucket(df, x, y, freq), label
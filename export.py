@@ -0,0 +1,82 @@
+# Ekspor data hasil filter (CSV, Excel, Parquet)
+#
+# File ekspor hanya dibuat saat tombol download diklik (lihat export_data di Home.py), bukan
+# di setiap rerun. CSV ditulis per potongan baris dan Excel ditulis dengan mode
+# constant_memory xlsxwriter, jadi tidak ada salinan teks/workbook penuh selain hasil
+# akhirnya. Hasil akhir di-cache per dataset, seleksi filter, kolom, dan format, dengan
+# batas total ukuran (LRU).
+import io
+
+import result_cache
+
+# Jumlah baris per potongan saat menulis CSV / Excel
+CHUNK_ROWS = 50_000
+# Batas total ukuran file ekspor yang disimpan di cache
+CACHE_BYTES = 256 * 1024 * 1024
+
+# (ekstensi, mime) per format
+FORMATS = {
+    "csv": ("csv", "text/csv"),
+    "excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def _chunks(df, chunk_rows=CHUNK_ROWS):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def write_csv(df, stream, chunk_rows=CHUNK_ROWS):
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    df.iloc[:0].to_csv(text, index=False)
+    for chunk in _chunks(df, chunk_rows):
+        chunk.to_csv(text, index=False, header=False)
+    # Lepas wrapper tanpa menutup stream di bawahnya
+    text.flush()
+    text.detach()
+
+
+def write_excel(df, stream, chunk_rows=CHUNK_ROWS):
+    # Baru di-import saat ekspor Excel pertama diminta
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(stream, {
+        "constant_memory": True,
+        "default_date_format": "yyyy-mm-dd hh:mm:ss",
+    })
+    worksheet = workbook.add_worksheet("Sheet1")
+    header = workbook.add_format({"bold": True, "border": 1, "align": "center"})
+    worksheet.write_row(0, 0, [str(column) for column in df.columns], header)
+
+    row = 1
+    for chunk in _chunks(df, chunk_rows):
+        # Nilai kosong (NaN/NaT) ditulis sebagai sel kosong, seperti to_excel
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for record in values.itertuples(index=False, name=None):
+            worksheet.write_row(row, 0, record)
+            row += 1
+    workbook.close()
+
+
+def write_parquet(df, stream):
+    df.to_parquet(stream, index=False, engine="pyarrow")
+
+
+WRITERS = {"csv": write_csv, "excel": write_excel, "parquet": write_parquet}
+
+
+def to_bytes(df, fmt):
+    stream = io.BytesIO()
+    WRITERS[fmt](df, stream)
+    return stream.getvalue()
+
+
+# File ekspor yang sudah jadi, dipakai bersama oleh semua session
+artifacts = result_cache.ResultCache(maxsize=32, maxbytes=CACHE_BYTES)
+
+
+# Ambil file ekspor dari cache atau buat sekarang
+def get_artifact(df, dataset, version, selection, fmt):
+    key = (selection, tuple(df.columns), fmt)
+    return artifacts.get_or_compute(dataset, version, "export", key, lambda: to_bytes(df, fmt))
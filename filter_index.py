@@ -0,0 +1,192 @@
+# Index filter untuk filter_dataframe
+#
+# Dibangun sekali per dataset yang di-load: baris diurutkan berdasarkan TANGGAL supaya
+# rentang tanggal cukup dicari dengan binary search, lalu setiap nilai YEARS, MONTH,
+# MESIN dan NAMA_PRODUCT punya bitmap baris (np.packbits, urutan sesuai TANGGAL).
+# Seleksi dijawab dengan OR bitmap nilai yang dipilih per kolom lalu AND antar kolom,
+# hasilnya sama persis dengan masker boolean di versi lama.
+#
+# Seleksi default dashboard (semua nilai terpilih, rentang tanggal penuh) dikenali lewat
+# active_predicates dan predikatnya dilewati, jadi tidak ada bitmap yang dihitung dan baris
+# yang lolos (semua baris bertanggal) diambil dari hasil yang disimpan sekali per index.
+# Pilihan filter bertingkat (tahun -> bulan -> mesin -> produk) dijawab dari kombinasi unik
+# kode keempat kolom, bukan dari baris mentah.
+import weakref
+
+import numpy as np
+import pandas as pd
+
+FILTER_COLUMNS = ["YEARS", "MONTH", "MESIN", "NAMA_PRODUCT"]
+
+# Index per DataFrame (id(df) -> FilterIndex), dibuang otomatis saat DataFrame-nya dibuang
+_indexes = {}
+
+
+class FilterIndex:
+    def __init__(self, df):
+        tanggal = df["TANGGAL"].to_numpy()
+        # NaT diurutkan paling akhir, jadi tidak pernah masuk rentang tanggal mana pun
+        self.order = np.argsort(tanggal, kind="stable")
+        self.tanggal = tanggal[self.order]
+        self.n_rows = len(df)
+        # Jumlah baris dengan TANGGAL (NaT ada di akhir urutan)
+        self.n_dated = int(np.searchsorted(np.isnat(self.tanggal), True)) if self.tanggal.dtype.kind == "M" else self.n_rows
+        self.codes = {}
+        self.categories = {}
+        self.bitmaps = {}
+        self.null_bitmaps = {}
+
+        for column in FILTER_COLUMNS:
+            codes, uniques = pd.factorize(df[column])
+            codes = codes[self.order]
+            self.codes[column] = codes
+            self.categories[column] = list(uniques)
+            self.bitmaps[column] = {value: np.packbits(codes == code) for code, value in enumerate(uniques.tolist())}
+            if (codes < 0).any():
+                self.null_bitmaps[column] = np.packbits(codes < 0)
+        self._dated_rows = None
+        self._combinations = None
+        self._code_lookup = {}
+
+    # TANGGAL terkecil dan terbesar (None kalau tidak ada baris bertanggal)
+    def bounds(self):
+        if not self.n_dated:
+            return None
+        return self.tanggal[0], self.tanggal[self.n_dated - 1]
+
+    # Posisi (dalam urutan TANGGAL) untuk rentang tanggal inklusif
+    def date_slice(self, start_date, end_date):
+        start = pd.Timestamp(start_date).to_datetime64()
+        end = pd.Timestamp(end_date).to_datetime64()
+        return np.searchsorted(self.tanggal, start, "left"), np.searchsorted(self.tanggal, end, "right")
+
+    # Bitmap untuk satu kolom pada rentang byte [lo_byte, hi_byte); None kalau semua baris lolos
+    def _column_bitmap(self, column, values, lo_byte, hi_byte):
+        bitmaps = self.bitmaps[column]
+        selected = {value for value in values if value in bitmaps}
+        unselected = [bitmap for value, bitmap in bitmaps.items() if value not in selected]
+        null_bitmap = self.null_bitmaps.get(column)
+
+        # Kalau yang dipilih lebih banyak, lebih murah menghitung komplemen dari yang tidak dipilih
+        if len(selected) > len(unselected):
+            if null_bitmap is not None:
+                unselected.append(null_bitmap)
+            if not unselected:
+                return None
+            return ~_union(unselected, lo_byte, hi_byte)
+        return _union([bitmaps[value] for value in selected], lo_byte, hi_byte)
+
+    # Row id semua baris bertanggal (urut naik), dihitung sekali per index
+    def dated_rows(self):
+        if self._dated_rows is None:
+            self._dated_rows = np.sort(self.order[:self.n_dated])
+        return self._dated_rows
+
+    # Row id (posisi di DataFrame asli, urut naik) yang lolos semua filter
+    def select(self, years, months, mesin, product, start_date, end_date):
+        domain = {column: self.categories[column] for column in FILTER_COLUMNS if column not in self.null_bitmaps}
+        columns, date_range = active_predicates((years, months, mesin, product, start_date, end_date),
+                                                domain, self.bounds())
+        if date_range is None:
+            lo, hi = 0, self.n_dated
+        else:
+            lo, hi = self.date_slice(*date_range)
+        if lo >= hi:
+            return np.empty(0, dtype=np.intp)
+        if not columns and (lo, hi) == (0, self.n_dated):
+            return self.dated_rows()
+
+        lo_byte, hi_byte = lo // 8, (hi + 7) // 8
+        mask = None
+        for column, values in columns.items():
+            bitmap = self._column_bitmap(column, values, lo_byte, hi_byte)
+            if bitmap is None:
+                continue
+            mask = bitmap if mask is None else np.bitwise_and(mask, bitmap, out=mask)
+
+        if mask is None:
+            positions = np.arange(lo, hi)
+        else:
+            bits = np.unpackbits(mask)[lo - lo_byte * 8:hi - lo_byte * 8]
+            positions = np.flatnonzero(bits) + lo
+        return np.sort(self.order[positions])
+
+    def filter(self, df, years, months, mesin, product, start_date, end_date):
+        positions = self.select(years, months, mesin, product, start_date, end_date)
+        # Baris berurutan (mis. semua terpilih): slice, kolom tidak disalin
+        if len(positions) and positions[-1] - positions[0] + 1 == len(positions):
+            return df.iloc[positions[0]:positions[-1] + 1]
+        return df.iloc[positions]
+
+    # Kombinasi unik kode (YEARS, MONTH, MESIN, NAMA_PRODUCT) yang ada di data: kolom ->
+    # array kode per kombinasi (-1 untuk kosong). Dibangun sekali per index.
+    def combinations(self):
+        if self._combinations is None:
+            key = np.zeros(self.n_rows, dtype=np.int64)
+            for column in FILTER_COLUMNS:
+                key = key * (len(self.categories[column]) + 1) + (self.codes[column] + 1)
+            unique = np.unique(key)
+            combinations = {}
+            for column in reversed(FILTER_COLUMNS):
+                size = len(self.categories[column]) + 1
+                combinations[column] = unique % size - 1
+                unique = unique // size
+            self._combinations = combinations
+        return self._combinations
+
+    # Nilai `column` yang masih ada di data untuk pilihan kolom-kolom sebelumnya
+    # (`selected`: kolom -> nilai terpilih), urut naik
+    def dependent_options(self, column, selected):
+        combinations = self.combinations()
+        mask = np.ones(len(combinations[column]), dtype=bool)
+        for other, values in selected.items():
+            codes = [code for code in map(self._code_lookup_for(other).get, values) if code is not None]
+            mask &= np.isin(combinations[other], codes)
+        codes = np.unique(combinations[column][mask])
+        categories = self.categories[column]
+        return sorted(categories[code] for code in codes if code >= 0)
+
+    def _code_lookup_for(self, column):
+        lookup = self._code_lookup.get(column)
+        if lookup is None:
+            lookup = self._code_lookup[column] = {value: code for code, value in enumerate(self.categories[column])}
+        return lookup
+
+
+# Predikat filter yang benar-benar membatasi hasil: (kolom -> nilai terpilih, rentang
+# tanggal atau None). Kolom yang pilihannya mencakup semua nilai di `domain` (kolom ->
+# semua nilai; kolom yang punya nilai kosong tidak dimasukkan karena nilai kosong tidak
+# pernah lolos) dilewati, begitu juga rentang tanggal yang mencakup `bounds` (TANGGAL
+# terkecil dan terbesar). Dipakai filter index dan backend SQL.
+def active_predicates(filters, domain, bounds):
+    years, months, mesin, product, start_date, end_date = filters
+    columns = {}
+    for column, values in zip(FILTER_COLUMNS, (years, months, mesin, product)):
+        everything = domain.get(column)
+        if everything is not None and len(values) >= len(everything) and set(everything).issubset(values):
+            continue
+        columns[column] = values
+    date_range = (start_date, end_date)
+    if bounds is not None and pd.Timestamp(start_date) <= bounds[0] and pd.Timestamp(end_date) >= bounds[1]:
+        date_range = None
+    return columns, date_range
+
+
+def _union(bitmaps, lo_byte, hi_byte):
+    if not bitmaps:
+        return np.zeros(hi_byte - lo_byte, dtype=np.uint8)
+    out = bitmaps[0][lo_byte:hi_byte].copy()
+    for bitmap in bitmaps[1:]:
+        np.bitwise_or(out, bitmap[lo_byte:hi_byte], out=out)
+    return out
+
+
+# Ambil index untuk DataFrame ini, bangun kalau belum ada
+def get_index(df):
+    key = id(df)
+    index = _indexes.get(key)
+    if index is None:
+        index = FilterIndex(df)
+        _indexes[key] = index
+        weakref.finalize(df, _indexes.pop, key, None)
+    return index
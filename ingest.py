@@ -0,0 +1,692 @@
+# Cache kolumnar (Arrow IPC) untuk workbook Excel di Source/
+#
+# Parsing Excel lewat openpyxl lambat, jadi hasil load_data disimpan sebagai file
+# Arrow IPC di Source/.cache/ beserta manifest (mtime, ukuran, sha256 file sumber).
+# Selama workbook tidak berubah, restart cukup memory-map file Arrow tersebut.
+#
+# Operator menambah data satu hari sekali di akhir sheet. Untuk itu manifest juga
+# menyimpan fingerprint XML baris yang sudah di-ingest (sha256 dari isi <sheetData>
+# sampai baris terakhir) dan high-water mark TANGGAL. Kalau fingerprint masih cocok,
+# hanya baris baru setelahnya yang di-parse lalu disimpan sebagai part Arrow baru;
+# kalau baris lama diedit, cache dibangun ulang penuh.
+#
+# Sumber data juga bisa berupa direktori atau pola glob berisi banyak workbook (mis. satu
+# per bulan atau per line) dengan banyak sheet. Setiap (workbook, sheet) punya cache
+# sendiri, jadi hanya file yang berubah yang di-parse ulang (paralel di process pool),
+# lalu semuanya digabung dengan skema yang sama. Sheet yang bukan sheet data (mis. tanpa
+# kolom TANGGAL) dicatat di manifest-nya beserta fingerprint, jadi tidak di-parse ulang
+# sampai sheet itu sendiri berubah.
+#
+# Frame yang dipakai dashboard dibaca lewat memory map tanpa menyalin kolom, jadi semua
+# worker/proses di server yang sama berbagi halaman memori (page cache) yang sama. Untuk
+# satu workbook yang di-map adalah part cache-nya sendiri (selama tinggal satu part); untuk
+# dataset multi-file, satu file Arrow "shared" gabungan. Append tidak menulis ulang histori:
+# part baru ditulis terpisah dan file shared hanya ditulis ulang saat rebuild penuh atau
+# setelah baris baru mencapai RESHARE_FRACTION dari isi file shared, jadi biaya tulis per
+# refresh sebanding dengan baris baru. Sampai saat itu frame gabungan milik proses sendiri.
+import argparse
+import glob
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import posixpath
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from xml.etree import ElementTree
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+import schema
+
+CACHE_VERSION = 4
+CACHE_DIRNAME = ".cache"
+DEFAULT_SOURCES = ["Source/Production.xlsx", "Source/Used.xlsx"]
+WORKBOOK_PATTERNS = ["*.xlsx", "*.xlsm"]
+# Jumlah part append maksimum sebelum cache dipadatkan jadi satu file
+MAX_PARTS = 16
+# File shared dataset ditulis ulang setelah baris baru (lineage sama) mencapai bagian ini
+# dari jumlah baris di file shared
+RESHARE_FRACTION = 0.25
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_ROW_NUMBER = re.compile(rb'(<row\b[^>]*?\sr=")(\d+)(")')
+_CELL_NUMBER = re.compile(rb'(<c\b[^>]*?\sr="[A-Z]+)(\d+)(")')
+_XML_CHUNK = 1 << 20
+
+logger = logging.getLogger(__name__)
+
+# DataFrame yang sudah di-load di proses ini: (path, sheet) -> (manifest, df)
+_frames = {}
+_lock = threading.Lock()
+# Satu load dataset multi-file sekaligus per proses (process pool tidak dibuat bersamaan)
+_dataset_lock = threading.Lock()
+
+
+# Fungsi untuk preprocessing kolom tanggal (sama seperti load_data sebelumnya).
+# TANGGAL yang terisi tapi tidak bisa di-parse tetap jadi NaT, tapi jumlahnya dicatat di
+# df.attrs["invalid_tanggal"] (lalu di manifest cache).
+def preprocess(df):
+    raw = df["TANGGAL"]
+    df["TANGGAL"] = pd.to_datetime(raw, errors='coerce')
+    df.attrs["invalid_tanggal"] = int((df["TANGGAL"].isna() & raw.notna()).sum())
+    df["YEARS"] = df["TANGGAL"].dt.year
+    df["MONTH"] = df["TANGGAL"].dt.month
+    df["DAYS"] = df["TANGGAL"].dt.day
+    return df
+
+
+# Parse workbook lalu terapkan skema tipe datanya (lihat schema.py); `name` menentukan
+# skema, default nama file workbook
+def read_workbook(file_path, sheet_name="Sheet1", name=None):
+    name = name or Path(file_path).stem
+    return schema.apply(preprocess(pd.read_excel(file_path, sheet_name=sheet_name)), name)
+
+
+def file_digest(file_path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_paths(file_path, sheet_name="Sheet1"):
+    source = Path(file_path)
+    base = source.parent / CACHE_DIRNAME / f"{source.stem}__{sheet_name}"
+    return base.with_name(base.name + ".arrow"), base.with_name(base.name + ".json")
+
+
+def _part_path(data_path, index):
+    return data_path if index == 0 else data_path.with_name(f"{data_path.stem}.{index:05d}.arrow")
+
+
+def _source_stat(file_path):
+    stat = os.stat(file_path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _read_manifest(manifest_path):
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, write):
+    tmp_path = path.with_name(path.name + f".tmp{os.getpid()}")
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_manifest(manifest_path, manifest):
+    try:
+        _write_atomic(manifest_path, lambda p: p.write_text(json.dumps(manifest, indent=2)))
+    except OSError:
+        pass
+
+
+def _write_part(df, part_path):
+    # Cache hanya optimasi: kalau direktori tidak bisa ditulis, lanjut tanpa cache
+    try:
+        part_path.parent.mkdir(parents=True, exist_ok=True)
+        # Tanpa kompresi supaya file bisa di-memory-map saat dibaca
+        _write_atomic(part_path, lambda p: feather.write_feather(df, p, compression="uncompressed"))
+        return True
+    except OSError:
+        return False
+
+
+def _remove_parts(data_path, parts):
+    for index in range(1, parts):
+        try:
+            os.remove(_part_path(data_path, index))
+        except OSError:
+            pass
+
+
+# Baca file Arrow lewat memory map tanpa menyalin: kolom string tetap di buffer Arrow dan
+# kolom angka/tanggal menjadi view numpy di atas map (split_blocks mencegah konsolidasi
+# blok yang akan menyalin kolom)
+def _map_frame(path):
+    return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+
+
+def _read_cache(data_path, parts=1):
+    frames = [_map_frame(_part_path(data_path, i)) for i in range(parts)]
+    return frames[0] if len(frames) == 1 else schema.concat(frames)
+
+
+def _shared_path(data_path):
+    return data_path.with_name(data_path.stem + ".shared.arrow")
+
+
+def _version_tag(manifest):
+    return f"{CACHE_VERSION}:{manifest.get('schema')}:{manifest['lineage']}:{manifest['rows']}".encode()
+
+
+def _shared_tag(shared_path):
+    try:
+        with pa.memory_map(str(shared_path)) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    return metadata.get(b"dataset_version")
+
+
+# Frame dataset dari file shared (satu file, tanpa part) untuk versi manifest ini. Proses
+# pertama yang memuat versi baru menulis file tersebut dari build(); proses lain cukup
+# me-map-nya. Kalau versi baru hanya menambah sedikit baris (lineage sama, kurang dari
+# RESHARE_FRACTION), file tidak ditulis ulang dan frame privat dari build() yang dipakai;
+# begitu juga kalau file tidak bisa ditulis.
+def _share(manifest, data_path, build):
+    shared_path = _shared_path(data_path)
+    tag = _version_tag(manifest)
+    df = None
+    try:
+        current = _shared_tag(shared_path)
+        if current != tag:
+            df = build()
+            if _grown_slightly(current, tag):
+                return df
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"dataset_version": tag})
+            shared_path.parent.mkdir(parents=True, exist_ok=True)
+            _write_atomic(shared_path, lambda p: feather.write_feather(table, p, compression="uncompressed"))
+        return _map_frame(shared_path)
+    except OSError:
+        return df if df is not None else build()
+
+
+# Tag file shared `current` dan `tag` berlineage sama dan baris barunya masih di bawah
+# RESHARE_FRACTION
+def _grown_slightly(current, tag):
+    if current is None:
+        return False
+    old_prefix, _, old_rows = current.rpartition(b":")
+    new_prefix, _, new_rows = tag.rpartition(b":")
+    return old_prefix == new_prefix and 0 < int(new_rows) - int(old_rows) < RESHARE_FRACTION * int(old_rows)
+
+
+# Frame satu workbook yang dibagi antar proses: kalau cache tinggal satu part (setelah
+# rebuild atau pemadatan part), part itu sendiri yang di-memory-map, jadi tidak ada salinan
+# kedua di disk. Selama masih ada part tambahan, frame gabungan milik proses ini dipakai
+# sampai part dipadatkan lagi (lihat MAX_PARTS).
+def _share_parts(manifest, data_path, manifest_path, df):
+    if manifest.get("parts") != 1 or _read_manifest(manifest_path) != manifest:
+        # Part belum (atau gagal) ditulis untuk versi ini
+        return df
+    try:
+        mapped = _map_frame(data_path)
+    except (OSError, pa.ArrowInvalid):
+        return df
+    # File shared terpisah dari versi cache sebelumnya tidak dipakai lagi
+    try:
+        os.remove(_shared_path(data_path))
+    except OSError:
+        pass
+    return mapped
+
+
+# Cari file XML worksheet di dalam arsip xlsx berdasarkan nama sheet
+def _sheet_member(archive, sheet_name):
+    workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    rels = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(f"{_NS_PKG_REL}Relationship")}
+    for sheet in workbook.iter(f"{_NS_MAIN}sheet"):
+        if sheet.get("name") == sheet_name:
+            target = targets[sheet.get(f"{_NS_REL}id")]
+            return target.lstrip("/") if target.startswith("/") else posixpath.join("xl", target)
+    raise KeyError(sheet_name)
+
+
+# Fingerprint baris yang sudah di-ingest: sha256 isi <sheetData> sampai </row> terakhir
+def sheet_fingerprint(file_path, sheet_name="Sheet1"):
+    with zipfile.ZipFile(file_path) as archive:
+        xml = archive.read(_sheet_member(archive, sheet_name))
+    start = xml.find(b"<sheetData")
+    end = xml.rfind(b"</row>", start, xml.find(b"</sheetData>", start)) + len(b"</row>")
+    last_row = xml.rfind(b"<row ", start, end)
+    match = _ROW_NUMBER.match(xml, last_row)
+    if start < 0 or last_row < 0 or not match:
+        return None
+    return {
+        "region_len": end - start,
+        "region_sha256": hashlib.sha256(xml[start:end]).hexdigest(),
+        "last_row": int(match.group(2)),
+    }
+
+
+# Baca XML worksheet secara streaming: cocokkan fingerprint, kembalikan bagian setelahnya
+def _read_sheet_tail(archive, member, fingerprint):
+    with archive.open(member) as f:
+        head = b""
+        while b"<sheetData" not in head or b"</row>" not in head[head.find(b"<sheetData"):]:
+            chunk = f.read(_XML_CHUNK)
+            if not chunk:
+                return None
+            head += chunk
+        start = head.find(b"<sheetData")
+        # Header sheet (sampai <sheetData>) dan baris header kolom dipakai untuk workbook mini
+        prologue = head[:head.index(b">", start) + 1]
+        header_end = head.find(b"</row>", start)
+        header_row = head[len(prologue):header_end + len(b"</row>")]
+
+        digest = hashlib.sha256()
+        remaining = fingerprint["region_len"]
+        buffer = head[start:]
+        while remaining > 0:
+            if not buffer:
+                buffer = f.read(_XML_CHUNK)
+                if not buffer:
+                    return None
+            digest.update(buffer[:remaining])
+            consumed = min(len(buffer), remaining)
+            remaining -= consumed
+            buffer = buffer[consumed:]
+        if digest.hexdigest() != fingerprint["region_sha256"]:
+            return None
+        rest = buffer + f.read()
+
+    end = rest.find(b"</sheetData>")
+    return prologue, header_row, rest[:end], rest[end:]
+
+
+# Parse hanya baris baru: bangun workbook mini berisi header + baris baru saja
+def _parse_new_rows(file_path, sheet_name, fingerprint, name=None):
+    with zipfile.ZipFile(file_path) as archive:
+        member = _sheet_member(archive, sheet_name)
+        parts = _read_sheet_tail(archive, member, fingerprint)
+        if parts is None:
+            return None
+        prologue, header_row, new_rows, epilogue = parts
+        if b"<row" not in new_rows:
+            return pd.DataFrame()
+
+        # Nomor baris baru digeser supaya langsung menyambung setelah header
+        header_match = _ROW_NUMBER.search(header_row)
+        offset = fingerprint["last_row"] - (int(header_match.group(2)) if header_match else 1)
+        shift = lambda m: m.group(1) + str(int(m.group(2)) - offset).encode() + m.group(3)
+        new_rows = _CELL_NUMBER.sub(shift, _ROW_NUMBER.sub(shift, new_rows))
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as mini:
+            for info in archive.infolist():
+                if info.filename == member:
+                    mini.writestr(info.filename, prologue + header_row + new_rows + epilogue)
+                else:
+                    mini.writestr(info, archive.read(info.filename))
+    buffer.seek(0)
+    return read_workbook(buffer, sheet_name, name or Path(file_path).stem)
+
+
+def _new_manifest(file_path, sheet_name, df, stat, digest, lineage=None):
+    tanggal = df["TANGGAL"].max() if len(df) else pd.NaT
+    return {
+        "version": CACHE_VERSION,
+        "source": str(file_path),
+        "sheet": sheet_name,
+        "sha256": digest,
+        # sha256 workbook saat rebuild penuh terakhir; tetap sama selama hanya ada append
+        "lineage": lineage or digest,
+        "rows": len(df),
+        "parts": 1,
+        "high_water_mark": None if pd.isna(tanggal) else tanggal.isoformat(),
+        "fingerprint": sheet_fingerprint(file_path, sheet_name),
+        **stat,
+    }
+
+
+def _count_invalid_dates(file_path, df):
+    invalid = df.attrs.pop("invalid_tanggal", 0)
+    if invalid:
+        logger.warning("%s: %d baris dengan TANGGAL yang tidak bisa di-parse (menjadi NaT)", file_path, invalid)
+    return invalid
+
+
+def _rebuild(file_path, sheet_name, stat, digest, data_path, manifest_path, old_parts=1, name=None):
+    df = read_workbook(file_path, sheet_name, name)
+    manifest = _new_manifest(file_path, sheet_name, df, stat, digest or file_digest(file_path))
+    manifest["schema"] = _schema_name(file_path, name)
+    manifest["invalid_tanggal"] = _count_invalid_dates(file_path, df)
+    if _write_part(df, data_path):
+        _remove_parts(data_path, old_parts)
+        _write_manifest(manifest_path, manifest)
+    return manifest, df
+
+
+# Tambahkan baris baru ke frame yang sudah ada; None kalau harus rebuild penuh
+def _append(file_path, sheet_name, manifest, df, stat, digest, data_path, manifest_path, name=None):
+    if not manifest.get("fingerprint"):
+        return None
+    try:
+        df_new = _parse_new_rows(file_path, sheet_name, manifest["fingerprint"], name)
+    except (KeyError, ValueError, zipfile.BadZipFile):
+        return None
+    if df_new is None or (len(df_new) and list(df_new.columns) != list(df.columns)):
+        return None
+
+    high_water_mark = manifest.get("high_water_mark")
+    if len(df_new) and high_water_mark and df_new["TANGGAL"].min() < pd.Timestamp(high_water_mark):
+        # Baris "baru" bertanggal sebelum high-water mark: anggap riwayat berubah
+        return None
+
+    manifest = dict(manifest, **stat, sha256=digest)
+    manifest["invalid_tanggal"] = manifest.get("invalid_tanggal", 0) + _count_invalid_dates(file_path, df_new)
+    if len(df_new):
+        df = schema.concat([df, df_new])
+        manifest.update(_new_manifest(file_path, sheet_name, df, stat, digest, manifest["lineage"]),
+                        parts=manifest["parts"])
+        if manifest["parts"] >= MAX_PARTS:
+            if _write_part(df, data_path):
+                _remove_parts(data_path, manifest["parts"])
+                manifest["parts"] = 1
+        elif _write_part(df_new, _part_path(data_path, manifest["parts"])):
+            manifest["parts"] += 1
+        else:
+            return manifest, df
+    _write_manifest(manifest_path, manifest)
+    return manifest, df
+
+
+def _schema_name(file_path, name):
+    return name or Path(file_path).stem
+
+
+def _load(file_path, sheet_name, force, name=None):
+    stat = _source_stat(file_path)
+    data_path, manifest_path = cache_paths(file_path, sheet_name)
+    key = (os.path.abspath(file_path), sheet_name)
+
+    if not force and key in _frames:
+        manifest, df = _frames[key]
+        if manifest["mtime_ns"] == stat["mtime_ns"] and manifest["size"] == stat["size"]:
+            return manifest, df, "memory"
+    else:
+        manifest = _read_manifest(manifest_path)
+        df = None
+
+    if (force or not manifest or manifest.get("version") != CACHE_VERSION or not data_path.exists()
+            or manifest.get("schema") != _schema_name(file_path, name) or "skipped" in manifest):
+        return (*_rebuild(file_path, sheet_name, stat, None, data_path, manifest_path,
+                          manifest.get("parts", 1) if manifest else 1, name), "rebuilt")
+
+    if df is None:
+        try:
+            df = _read_cache(data_path, manifest["parts"])
+        except (OSError, ValueError):
+            # Part cache hilang atau rusak: parse ulang workbook
+            return (*_rebuild(file_path, sheet_name, stat, None, data_path, manifest_path,
+                              manifest["parts"], name), "rebuilt")
+        if manifest["mtime_ns"] == stat["mtime_ns"] and manifest["size"] == stat["size"]:
+            return manifest, df, "cache"
+
+    # mtime berubah (mis. file disalin ulang saat deploy) tapi isinya bisa saja sama
+    digest = file_digest(file_path)
+    if manifest["sha256"] == digest:
+        manifest = dict(manifest, **stat)
+        _write_manifest(manifest_path, manifest)
+        return manifest, df, "cache"
+
+    appended = _append(file_path, sheet_name, manifest, df, stat, digest, data_path, manifest_path, name)
+    if appended is not None:
+        return (*appended, "appended")
+    return (*_rebuild(file_path, sheet_name, stat, digest, data_path, manifest_path, manifest["parts"], name), "rebuilt")
+
+
+# Load workbook lewat cache; mengembalikan (DataFrame, status) dengan status salah satu dari
+# "memory", "cache", "appended" atau "rebuilt"
+def load(file_path, sheet_name="Sheet1", force=False):
+    manifest, df, status = _load_locked(file_path, sheet_name, force)
+    return df, status
+
+
+def _load_locked(file_path, sheet_name, force=False, name=None, share=True):
+    with _lock:
+        manifest, df, status = _load(file_path, sheet_name, force, name)
+        if share and status in ("appended", "rebuilt"):
+            df = _share_parts(manifest, *cache_paths(file_path, sheet_name), df)
+        _frames[(os.path.abspath(file_path), sheet_name)] = (manifest, df)
+    return manifest, df, status
+
+
+def load_cached(file_path, sheet_name="Sheet1"):
+    return load(file_path, sheet_name)[0]
+
+
+# Seperti load_cached, ditambah versi dataset untuk invalidasi cache hasil.
+# Versi = (lineage, jumlah baris): append hanya menambah jumlah baris, sehingga struktur
+# turunan (mis. cube) bisa diperbarui dari baris df.iloc[rows_lama:] saja.
+# `source` boleh satu workbook, direktori, atau pola glob; sheet_name=None berarti semua
+# sheet. `name` memilih skema (default nama file/direktori, lihat schema.py).
+def load_versioned(source, sheet_name="Sheet1", name=None, workers=None):
+    if sheet_name is not None and Path(source).is_file():
+        manifest, df, _ = _load_locked(source, sheet_name, name=name)
+        return df, (manifest["lineage"], manifest["rows"])
+    return load_dataset(source, sheet_name, name, workers)
+
+
+# Workbook untuk sumber berupa file, direktori, atau pola glob, urut nama file
+def expand_files(source):
+    path = Path(source)
+    if path.is_dir():
+        files = [file for pattern in WORKBOOK_PATTERNS for file in path.glob(pattern)]
+    elif path.is_file():
+        files = [path]
+    else:
+        files = [Path(file) for file in glob.glob(str(source))]
+    # File lock Excel (~$nama.xlsx) dilewati
+    return sorted(file for file in files if file.is_file() and not file.name.startswith("~$"))
+
+
+# Nama semua sheet workbook, urut seperti di Excel
+def sheet_names(file_path):
+    with zipfile.ZipFile(file_path) as archive:
+        workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    return [sheet.get("name") for sheet in workbook.iter(f"{_NS_MAIN}sheet")]
+
+
+def _dataset_name(source):
+    path = Path(source)
+    return path.name if path.is_dir() else (path.stem if path.is_file() else path.parent.name)
+
+
+# Cache (workbook, sheet) masih cocok dengan file sumbernya, jadi tidak perlu di-parse
+def _is_fresh(file_path, sheet_name, name):
+    data_path, manifest_path = cache_paths(file_path, sheet_name)
+    key = (os.path.abspath(file_path), sheet_name)
+    manifest = _frames[key][0] if key in _frames else _read_manifest(manifest_path)
+    if (not manifest or manifest.get("version") != CACHE_VERSION or manifest.get("schema") != name
+            or "skipped" in manifest):
+        return False
+    stat = _source_stat(file_path)
+    return manifest["mtime_ns"] == stat["mtime_ns"] and manifest["size"] == stat["size"] and data_path.exists()
+
+
+def _try_fingerprint(file_path, sheet_name):
+    try:
+        return sheet_fingerprint(file_path, sheet_name)
+    except (KeyError, OSError, zipfile.BadZipFile, ElementTree.ParseError):
+        return None
+
+
+# Catat sheet yang dilewati di manifest-nya: stat workbook (diambil sebelum parse) dan
+# fingerprint sheet. Tidak dicatat kalau workbook berubah selama parse.
+def _record_skip(file_path, sheet_name, name, stat, error):
+    data_path, manifest_path = cache_paths(file_path, sheet_name)
+    fingerprint = _try_fingerprint(file_path, sheet_name)
+    if _source_stat(file_path) != stat:
+        return
+    old = _read_manifest(manifest_path)
+    if old and "parts" in old:
+        # Sheet dulu berisi data: cache lama tidak akan dipakai lagi
+        _remove_parts(data_path, old["parts"])
+        try:
+            os.remove(data_path)
+        except OSError:
+            pass
+    try:
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return
+    _write_manifest(manifest_path, {"version": CACHE_VERSION, "schema": name, **stat,
+                                    "fingerprint": fingerprint, "skipped": error})
+    with _lock:
+        _frames.pop((os.path.abspath(file_path), sheet_name), None)
+
+
+# Alasan sheet dilewati kalau sheet itu sudah pernah dilewati dan belum berubah. Workbook
+# boleh berubah di sheet lain (mis. append harian di Sheet1): yang dibandingkan adalah
+# fingerprint sheet ini, lalu stat di manifest diperbarui.
+def _skipped(file_path, sheet_name, name):
+    manifest_path = cache_paths(file_path, sheet_name)[1]
+    manifest = _read_manifest(manifest_path)
+    if (not manifest or "skipped" not in manifest or manifest.get("version") != CACHE_VERSION
+            or manifest.get("schema") != name):
+        return None
+    stat = _source_stat(file_path)
+    if manifest["mtime_ns"] != stat["mtime_ns"] or manifest["size"] != stat["size"]:
+        fingerprint = manifest.get("fingerprint")
+        if fingerprint is None or _try_fingerprint(file_path, sheet_name) != fingerprint:
+            return None
+        _write_manifest(manifest_path, dict(manifest, **stat))
+    return manifest["skipped"]
+
+
+# Dijalankan di process pool: parse satu (workbook, sheet) dan tulis cache-nya. Frame tidak
+# dikirim balik; proses utama membaca cache yang baru ditulis. Mengembalikan pesan error
+# kalau sheet tidak bisa dipakai (mis. tidak ada kolom TANGGAL).
+def _parse_part(file_path, sheet_name, name, force=False):
+    stat = _source_stat(file_path)
+    try:
+        _load(file_path, sheet_name, force, name)
+    except (KeyError, ValueError) as e:
+        error = f"{type(e).__name__}: {e}"
+        _record_skip(file_path, sheet_name, name, stat, error)
+        return error
+    return None
+
+
+# Versi dataset gabungan. Lineage hanya tetap kalau semua part kecuali yang terakhir tidak
+# berubah, karena hanya baris baru di part terakhir yang berada di akhir frame gabungan.
+def _dataset_version(parts):
+    *head, (last_key, last_manifest) = parts
+    payload = [[*key, manifest["lineage"], manifest["rows"]] for key, manifest in head]
+    payload.append([*last_key, last_manifest["lineage"]])
+    lineage = hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+    return lineage, sum(manifest["rows"] for _, manifest in parts)
+
+
+# Load semua sheet dari banyak workbook sebagai satu dataset
+def load_dataset(source, sheet_name=None, name=None, workers=None, force=False):
+    files = expand_files(source)
+    if not files:
+        raise FileNotFoundError(source)
+    name = name or _dataset_name(source)
+
+    with _dataset_lock:
+        keys = [(str(file), sheet) for file in files for sheet in ([sheet_name] if sheet_name else sheet_names(file))]
+        skipped = {} if force else {key: reason for key in keys if (reason := _skipped(*key, name))}
+        stale = [key for key in keys if key not in skipped and (force or not _is_fresh(*key, name))]
+        errors = {}
+        parsed = set()
+        workers = min(workers or os.cpu_count() or 1, len(stale))
+        if workers > 1:
+            # spawn, bukan fork: proses utama bisa saja sedang menjalankan thread lain
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                results = pool.map(_parse_part, *zip(*stale), repeat(name), repeat(force))
+                errors = {key: error for key, error in zip(stale, results) if error}
+            force = False
+            # Frame lama di memori sudah basi: buang supaya _load membaca cache yang baru
+            # ditulis proses pool, bukan parse ulang di sini
+            parsed = {key for key in stale if key not in errors}
+            with _lock:
+                for key in parsed:
+                    _frames.pop((os.path.abspath(key[0]), key[1]), None)
+
+        parts, frames = [], []
+        for key in keys:
+            if key in skipped:
+                logger.debug("%s [%s] dilewati: %s", key[0], key[1], skipped[key])
+                continue
+            error = errors.get(key)
+            if error is None:
+                stat = _source_stat(key[0])
+                try:
+                    manifest, df, status = _load_locked(*key, force=force, name=name, share=False)
+                except (KeyError, ValueError) as e:
+                    error = f"{type(e).__name__}: {e}"
+                    _record_skip(*key, name, stat, error)
+                else:
+                    if key in parsed and status != "cache":
+                        # Seharusnya tidak terjadi: workbook berubah lagi selama pool berjalan
+                        logger.warning("%s [%s] di-parse ulang di proses utama (%s)", key[0], key[1], status)
+            if error:
+                logger.warning("%s [%s] dilewati: %s", key[0], key[1], error)
+                continue
+            parts.append((key, manifest))
+            frames.append(df)
+        if not parts:
+            raise ValueError(f"Tidak ada sheet yang bisa dibaca di {source}")
+
+        lineage, rows = _dataset_version(parts)
+        manifest = {"schema": name, "lineage": lineage, "rows": rows}
+        data_path = files[0].parent / CACHE_DIRNAME / f"{name}__dataset.arrow"
+        df = _share(manifest, data_path, lambda: schema.apply(schema.concat(frames), name))
+    return df, (lineage, rows)
+
+
+# CLI: bangun cache saat deploy dan laporkan waktu load cold vs warm
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bangun cache Arrow untuk workbook di Source/.")
+    parser.add_argument("sources", nargs="*", default=DEFAULT_SOURCES,
+                        help="Workbook, direktori, atau pola glob yang akan di-cache")
+    parser.add_argument("--sheet", default="Sheet1", help="Nama sheet (default: Sheet1)")
+    parser.add_argument("--all-sheets", action="store_true", help="Load semua sheet di setiap workbook")
+    parser.add_argument("--name", help="Nama skema (default: nama file/direktori, lihat schema.py)")
+    parser.add_argument("--workers", type=int, help="Jumlah proses parse paralel (default: jumlah core)")
+    parser.add_argument("--force", action="store_true", help="Parse ulang walaupun cache masih valid")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    sheet_name = None if args.all_sheets else args.sheet
+
+    for source in args.sources:
+        single = sheet_name is not None and Path(source).is_file()
+        start = time.perf_counter()
+        if single:
+            manifest, df, status = _load_locked(source, sheet_name, force=args.force, name=args.name)
+            detail = f"({status})"
+        else:
+            df, _ = load_dataset(source, sheet_name, args.name, args.workers, args.force)
+            detail = f"({len(expand_files(source))} workbooks)"
+        cold = time.perf_counter() - start
+        before, after = schema.memory_report(df)
+
+        # Warm = restart proses: baca ulang dari cache di disk, bukan dari memori
+        _frames.clear()
+        start = time.perf_counter()
+        load_versioned(source, sheet_name, args.name, args.workers)
+        warm = time.perf_counter() - start
+
+        line = (f"{source}: {len(df):,} rows {detail} | cold {cold:.3f}s | warm {warm:.3f}s"
+                f" | memory {before / 2**20:.2f} MB -> {after / 2**20:.2f} MB")
+        if single:
+            line += f" | invalid TANGGAL {manifest.get('invalid_tanggal', 0):,}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# Instrumentasi per tahap untuk setiap rerun dashboard
+#
+# Setiap rerun (run) mencatat tahap-tahapnya (load data, filter, tabel, KPI, grafik, ...)
+# dengan waktu, jumlah baris, dan selisih RSS proses. Run aktif disimpan per thread
+# (Streamlit menjalankan script setiap session di thread-nya sendiri); tahap di luar run
+# (mis. rerun fragment atau file ekspor yang dibuat saat tombol download diklik) dicatat
+# sebagai run tersendiri.
+#
+# Run yang selesai ditulis sebagai satu baris JSON ke .cache/metrics/runs.jsonl (dirotasi
+# ke runs.jsonl.1 setelah RUNS_MAX_BYTES, jadi di disk paling banyak dua file) dan
+# diringkas (sum/count/kuantil per tahap) di file teks format Prometheus
+# .cache/metrics/dashboard-<pid>.prom yang bisa dibaca textfile collector node_exporter.
+# RSS bersifat per proses, jadi selisihnya ikut terpengaruh session lain yang berjalan.
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+
+ENABLED = True
+METRICS_DIR = Path(".cache") / "metrics"
+# Jumlah run terakhir yang disimpan untuk kuantil dan panel admin
+HISTORY = 500
+QUANTILES = [0.5, 0.95]
+# Ukuran maksimum runs.jsonl sebelum dirotasi ke runs.jsonl.1 (rotasi sebelumnya dibuang)
+RUNS_MAX_BYTES = 10 * 1024 * 1024
+
+_local = threading.local()
+_lock = threading.Lock()
+_file_lock = threading.Lock()
+history = deque(maxlen=HISTORY)
+# (page, stage) -> [jumlah detik, jumlah run] sejak proses start
+_totals = defaultdict(lambda: [0.0, 0])
+
+
+def _rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Bukan Linux
+        return None
+
+
+class Run:
+    def __init__(self, page=None):
+        self.page = page
+        self.stages = []
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._rss = _rss()
+
+    def record(self, name, seconds, rows=None, rss_delta=None):
+        self.stages.append({"stage": name, "seconds": seconds, "rows": rows, "rss_delta": rss_delta})
+
+    def to_dict(self):
+        rss = _rss()
+        return {
+            "ts": self.started,
+            "page": self.page,
+            "seconds": time.perf_counter() - self._start,
+            "rss": rss,
+            "rss_delta": rss - self._rss if rss is not None and self._rss is not None else None,
+            "stages": self.stages,
+        }
+
+
+# Mulai run baru untuk rerun ini (run sebelumnya yang tidak selesai, mis. karena st.stop()
+# sebelum end(), dibuang)
+def begin(page=None):
+    if ENABLED:
+        _local.run = Run(page)
+
+
+# Selesaikan run aktif: simpan ke history, tulis log JSON dan file Prometheus
+def end(page=None):
+    run = getattr(_local, "run", None)
+    _local.run = None
+    if run is None:
+        return None
+    if page is not None:
+        run.page = page
+    result = run.to_dict()
+    with _lock:
+        history.append(result)
+        for item in result["stages"]:
+            total = _totals[(result["page"], item["stage"])]
+            total[0] += item["seconds"]
+            total[1] += 1
+    _write(result)
+    return result
+
+
+def current():
+    return getattr(_local, "run", None)
+
+
+# Catat satu tahap. Jumlah baris bisa diisi di dalam blok: `with stage("filter") as s:
+# ...; s["rows"] = len(df)`.
+@contextmanager
+def stage(name, rows=None):
+    if not ENABLED:
+        yield {}
+        return
+    standalone = current() is None
+    if standalone:
+        begin()
+    info = {"rows": rows}
+    rss = _rss()
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        seconds = time.perf_counter() - start
+        after = _rss()
+        run = current()
+        run.record(name, seconds, info["rows"], after - rss if after is not None and rss is not None else None)
+        if standalone:
+            end(name)
+
+
+def quantile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+# Kuantil waktu per (page, stage) dari run di history
+def summary():
+    with _lock:
+        runs = list(history)
+    seconds = defaultdict(list)
+    for run in runs:
+        for item in run["stages"]:
+            seconds[(run["page"], item["stage"])].append(item["seconds"])
+    return {key: {q: quantile(values, q) for q in QUANTILES} for key, values in seconds.items()}
+
+
+def _prometheus_path():
+    return METRICS_DIR / f"dashboard-{os.getpid()}.prom"
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text():
+    quantiles = summary()
+    with _lock:
+        totals = {key: tuple(value) for key, value in _totals.items()}
+        last = history[-1] if history else None
+    lines = [
+        "# HELP dashboard_stage_seconds Waktu per tahap rerun dashboard",
+        "# TYPE dashboard_stage_seconds summary",
+    ]
+    for (page, name), (total, count) in sorted(totals.items(), key=lambda item: tuple(map(str, item[0]))):
+        labels = f'page="{_label(page)}",stage="{_label(name)}"'
+        for q, value in quantiles.get((page, name), {}).items():
+            lines.append(f'dashboard_stage_seconds{{{labels},quantile="{q}"}} {value:.6f}')
+        lines.append(f"dashboard_stage_seconds_sum{{{labels}}} {total:.6f}")
+        lines.append(f"dashboard_stage_seconds_count{{{labels}}} {count}")
+    if last is not None and last["rss"] is not None:
+        lines += ["# HELP dashboard_rss_bytes RSS proses setelah run terakhir",
+                  "# TYPE dashboard_rss_bytes gauge",
+                  f"dashboard_rss_bytes {last['rss']}"]
+    return "\n".join(lines) + "\n"
+
+
+def _append_run(path, line):
+    with _file_lock:
+        try:
+            if path.stat().st_size + len(line) > RUNS_MAX_BYTES:
+                os.replace(path, path.with_name(path.name + ".1"))
+        except FileNotFoundError:
+            pass
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def _write(result):
+    try:
+        METRICS_DIR.mkdir(parents=True, exist_ok=True)
+        _append_run(METRICS_DIR / "runs.jsonl", json.dumps(result, default=str) + "\n")
+        path = _prometheus_path()
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(prometheus_text(), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        # Direktori metrics tidak bisa ditulis: instrumentasi tidak boleh menghentikan dashboard
+        pass
+
+
+# File Prometheus proses ini dibuang saat proses berhenti supaya angkanya tidak dianggap masih berlaku
+@atexit.register
+def _cleanup():
+    try:
+        _prometheus_path().unlink()
+    except OSError:
+        pass
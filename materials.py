@@ -0,0 +1,88 @@
+# Ringkasan pemakaian material (halaman Used)
+#
+# NAMA_MATERIAL dinormalisasi (huruf besar) sekali per versi dataset menjadi kode integer
+# per baris, jadi setiap seleksi filter cukup mengambil kode barisnya, tanpa memproses
+# string lagi. Daftar material yang ditampilkan dibaca dari Source/materials.txt.
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+MATERIALS_FILE = "Source/materials.txt"
+
+# Lookup per lineage dataset: lineage -> (jumlah baris, kode per baris, nama material)
+_lookups = {}
+_lock = threading.Lock()
+_MAX_LINEAGES = 4
+
+
+# Daftar material dari file konfigurasi (satu nama per baris, '#' untuk komentar);
+# None berarti semua material ditampilkan
+def load_material_list(path=MATERIALS_FILE):
+    path = Path(path)
+    if not path.exists():
+        return None
+    lines = (line.split("#", 1)[0].strip() for line in path.read_text(encoding="utf-8").splitlines())
+    materials = [line for line in lines if line]
+    return materials or None
+
+
+def normalize(values):
+    return values.str.upper()
+
+
+# Kode nama material `values` di daftar `names` (-1 untuk kosong); nama yang belum dikenal
+# ditambahkan di akhir daftar. Mengembalikan (kode, daftar nama).
+def encode(values, names):
+    normalized = normalize(values)
+    names = names.append(pd.Index(normalized.dropna().unique()).difference(names))
+    return names.get_indexer(normalized).astype(np.int32), names
+
+
+# Tambahkan kode untuk baris baru
+def _extend(codes, names, values):
+    new_codes, names = encode(values, names)
+    return np.concatenate([codes, new_codes]), names
+
+
+# Kode material per baris untuk dataset pada versi tertentu (lihat ingest.load_versioned).
+# Kalau versi baru hanya menambah baris, hanya baris tambahan yang dinormalisasi.
+def get_lookup(df, version):
+    lineage, rows = version
+    with _lock:
+        cached = _lookups.get(lineage)
+    if cached is not None and cached[0] == rows:
+        return cached[1:]
+
+    if cached is not None and cached[0] < rows:
+        codes, names = _extend(cached[1], cached[2], df["NAMA_MATERIAL"].iloc[cached[0]:rows])
+    else:
+        codes, names = _extend(np.empty(0, dtype=np.int32), pd.Index([], dtype=object), df["NAMA_MATERIAL"].iloc[:rows])
+
+    with _lock:
+        # Session yang masih memakai versi lama tidak menimpa lookup versi yang lebih baru
+        current = _lookups.get(lineage)
+        if current is None or current[0] < rows:
+            _lookups[lineage] = (rows, codes, names)
+        while len(_lookups) > _MAX_LINEAGES:
+            del _lookups[next(iter(_lookups))]
+    return codes, names
+
+
+# Total, rata-rata, maksimum dan minimum JUMLAH per material untuk seleksi (baris dari
+# DataFrame dataset, index = row id); satu baris per material, urut nama
+def summarize(selection, lookup, materials=None):
+    codes, names = lookup
+    codes = codes[selection.index.to_numpy()]
+    if materials is not None:
+        # Elemen terakhir (False) dipakai untuk kode -1 (NAMA_MATERIAL kosong)
+        wanted = np.append(names.isin(normalize(pd.Series(materials, dtype="str"))), False)
+        keep = wanted[codes]
+    else:
+        keep = codes >= 0
+
+    grouped = selection["JUMLAH"][keep].groupby(codes[keep]).agg(["sum", "mean", "max", "min"])
+    grouped.columns = ["TOTAL", "MEAN", "MAX", "MIN"]
+    grouped.index = names[grouped.index].rename("NAMA_MATERIAL")
+    return grouped.sort_index()
@@ -0,0 +1,282 @@
+# Perhitungan KPI dan data grafik halaman Production dari cube harian (lihat cube.py)
+#
+# Input semua fungsi di sini adalah cube yang sudah difilter, bukan baris mentah; hasilnya
+# sama dengan perhitungan langsung di baris mentah. Semua pengelompokan yang dibutuhkan
+# halaman (per produk, per mesin, per tanggal) dihitung sekali di aggregate(), lalu
+# calculate_metrics dan graph_data hanya membaca hasilnya.
+import functools
+import logging
+import math
+from pathlib import Path
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+GROUPINGS = {"product": "NAMA_PRODUCT", "mesin": "MESIN", "tanggal": "TANGGAL"}
+# Pengelompokan untuk rincian Six Sigma (lihat sigma_breakdown)
+SIGMA_LEVELS = {
+    "mesin": ["MESIN"],
+    "product": ["NAMA_PRODUCT"],
+    "mesin_product": ["MESIN", "NAMA_PRODUCT"],
+    "tanggal": ["TANGGAL"],
+}
+
+OPPORTUNITIES_FILE = "Source/opportunities.txt"
+# Peluang cacat per unit untuk produk yang tidak ada di file opportunities
+DEFAULT_OPPORTUNITIES = 5
+
+logger = logging.getLogger(__name__)
+
+
+# Jumlah per kode grup; hasil tetap bertipe integer kalau kolom aslinya integer
+def _group_sum(codes, size, values):
+    if values.dtype.kind == "f":
+        return np.bincount(codes, weights=np.nan_to_num(values), minlength=size)
+    # Dijumlahkan sebagai int64 (seperti groupby) walaupun kolomnya int8/int16
+    return np.bincount(codes, weights=values, minlength=size).astype(np.int64)
+
+
+# Invers CDF normal baku, sama dengan scipy.stats.norm.ppf (termasuk p=1 -> inf) tanpa
+# perlu mengimpor scipy hanya untuk satu fungsi ini
+def _norm_ppf(p):
+    if p >= 1:
+        return math.inf
+    if p <= 0:
+        return -math.inf
+    return NormalDist().inv_cdf(p)
+
+
+# Tabel sigma level (dengan shift 1.5) untuk sigma -5..10: log DPMO naik -> sigma. DPMO
+# lain diinterpolasi linear di log DPMO; selisihnya dengan rumus _norm_ppf di bawah 1e-6
+# (untuk DPMO < 0,00001 rumus float itu sendiri sudah tidak presisi).
+@functools.cache
+def _sigma_table():
+    sigma = np.arange(-5, 10, 0.001)
+    dpmo = np.array([0.5 * math.erfc((s - 1.5) / math.sqrt(2)) for s in sigma]) * 1_000_000
+    return np.log(dpmo)[::-1], sigma[::-1]
+
+
+# Sigma level untuk array DPMO sekaligus; sama dengan rumus di calculate_metrics
+# (DPMO 0 -> inf, DPMO >= 1.000.000 -> 0)
+def sigma_level(dpmo):
+    dpmo = np.asarray(dpmo, dtype=float)
+    log_dpmo, sigma = _sigma_table()
+    with np.errstate(divide="ignore"):
+        result = np.interp(np.log(np.maximum(dpmo, 0)), log_dpmo, sigma)
+    result = np.where(dpmo <= 0, np.inf, result)
+    return np.where(dpmo >= 1_000_000, 0.0, result)
+
+
+# Peluang cacat per unit per produk dari file konfigurasi: satu baris "NAMA_PRODUCT = n"
+# ('#' untuk komentar, nama tidak peka huruf besar/kecil). Produk yang tidak ada di file
+# memakai DEFAULT_OPPORTUNITIES; file kosong atau tidak ada berarti semua produk default.
+def load_opportunities(path=OPPORTUNITIES_FILE):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    opportunities = {}
+    for number, line in enumerate(path.read_text(encoding="utf-8").splitlines(), 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        name, _, value = line.rpartition("=")
+        try:
+            value = float(value)
+        except ValueError:
+            value = None
+        if not name.strip() or value is None or value <= 0:
+            logger.warning("%s:%d dilewati: format harus 'NAMA_PRODUCT = n' dengan n > 0", path, number)
+            continue
+        opportunities[name.strip().upper()] = value
+    return opportunities
+
+
+# Jumlah peluang cacat per baris cube: (ACTUAL_QTY + REJECT) x peluang per unit produknya
+def _cell_opportunities(cube, opportunities=None):
+    units = np.nan_to_num(cube["ACTUAL_QTY"].to_numpy(dtype=float)) + np.nan_to_num(cube["REJECT"].to_numpy(dtype=float))
+    codes, products = pd.factorize(cube["NAMA_PRODUCT"])
+    per_product = (pd.Series(products.astype(str)).str.upper().map(opportunities or {})
+                   .fillna(DEFAULT_OPPORTUNITIES).to_numpy(dtype=float))
+    # Kode -1 (produk kosong) memakai elemen terakhir (default)
+    per_product = np.append(per_product, DEFAULT_OPPORTUNITIES)
+    return units * per_product[codes]
+
+
+# Kode grup terurut untuk satu kunci. Kolom categorical memakai kode kategorinya langsung
+# (tanpa hashing); kategori yang tidak muncul di seleksi dibuang seperti di groupby.
+def _factorize(column):
+    if not isinstance(column.dtype, pd.CategoricalDtype):
+        return pd.factorize(column, sort=True)
+    codes = column.cat.codes.to_numpy()
+    categories = column.cat.categories
+    if not column.cat.ordered and not categories.is_monotonic_increasing:
+        return pd.factorize(column.astype(categories.dtype), sort=True)
+    present = np.bincount(codes[codes >= 0], minlength=len(categories)) > 0
+    remap = np.cumsum(present) - 1
+    return np.where(codes >= 0, remap[codes], -1), categories[present]
+
+
+# Tahap agregasi gabungan: setiap kunci grup di-factorize sekali, lalu setiap ukuran
+# dijumlahkan dengan np.bincount untuk semua pengelompokan sekaligus
+def aggregate(cube):
+    measures = [column for column in ("ACTUAL_QTY", "REJECT") if column in cube.columns]
+    values = {column: cube[column].to_numpy() for column in measures}
+    result = {}
+    for name, key in GROUPINGS.items():
+        codes, uniques = _factorize(cube[key])
+        columns = values
+        if (codes < 0).any():
+            # Baris dengan kunci kosong tidak ikut dijumlah, sama seperti groupby
+            valid = codes >= 0
+            codes, columns = codes[valid], {column: v[valid] for column, v in values.items()}
+        sums = {column: _group_sum(codes, len(uniques), v) for column, v in columns.items()}
+        result[name] = pd.DataFrame(sums, index=uniques.rename(key))
+    return result
+
+
+# Fungsi untuk perhitungan metrik (khusus Production)
+def calculate_metrics(cube, agg=None, opportunities=None):
+    agg = agg if agg is not None else aggregate(cube)
+    has_reject = "REJECT" in cube.columns
+    total_finishgood = float(cube["ACTUAL_QTY"].sum())
+    production_mean = float(total_finishgood / cube["ACTUAL_QTY_N"].sum())
+    total_reject = float(cube["REJECT"].sum()) if has_reject else 0
+    reject_mean = float(total_reject / cube["REJECT_N"].sum()) if has_reject else 0
+
+    # Baris tunggal terbesar/terkecil: kalau seri, baris paling awal (seperti idxmax/idxmin)
+    max_cells = cube[cube["MAX_QTY"] == cube["MAX_QTY"].max()]
+    max_single_qty_row = max_cells.loc[max_cells["MAX_ROW"].idxmin()]
+    max_single_product = max_single_qty_row["NAMA_PRODUCT"]
+    max_single_qty = max_single_qty_row["MAX_QTY"]
+
+    min_cells = cube[cube["MIN_QTY"] == cube["MIN_QTY"].min()]
+    min_single_qty_row = min_cells.loc[min_cells["MIN_ROW"].idxmin()]
+    min_single_product = min_single_qty_row["NAMA_PRODUCT"]
+    min_single_qty = min_single_qty_row["MIN_QTY"]
+
+    grouped_product = agg["product"]
+    max_actual_qty_product = grouped_product["ACTUAL_QTY"].idxmax()
+    max_actual_qty_value = grouped_product["ACTUAL_QTY"].max()
+    min_actual_qty_product = grouped_product["ACTUAL_QTY"].idxmin()
+    min_actual_qty_value = grouped_product["ACTUAL_QTY"].min()
+
+    if has_reject:
+        max_reject_product = grouped_product["REJECT"].idxmax()
+        max_reject_value = grouped_product["REJECT"].max()
+        min_reject_product = grouped_product["REJECT"].idxmin()
+        min_reject_value = grouped_product["REJECT"].min()
+    else:
+        max_reject_product = min_reject_product = "N/A"
+        max_reject_value = min_reject_value = 0
+
+    total_unit_all = total_finishgood + total_reject
+    dpu = (total_reject / total_unit_all) * 100 if total_unit_all != 0 and has_reject else 0
+
+    def calculate_dpmo_sigma(defect, total_opportunities):
+        dpmo = (defect / total_opportunities) * 1_000_000 if total_opportunities != 0 else 0
+        sigma = _norm_ppf(1 - dpmo / 1_000_000) + 1.5 if dpmo < 1_000_000 else 0
+        return dpmo, sigma
+
+    # Peluang cacat per unit bisa berbeda per produk (lihat load_opportunities)
+    dpmo, sigma = calculate_dpmo_sigma(
+        defect=total_reject,
+        total_opportunities=float(_cell_opportunities(cube, opportunities).sum())) if has_reject else (0, 0)
+
+    return {
+        "total_finishgood": total_finishgood,
+        "production_mean": production_mean,
+        "total_reject": total_reject,
+        "reject_mean": reject_mean,
+        "max_single_product": max_single_product,
+        "max_single_qty": max_single_qty,
+        "min_single_product": min_single_product,
+        "min_single_qty": min_single_qty,
+        "max_actual_qty_product": max_actual_qty_product,
+        "max_actual_qty_value": max_actual_qty_value,
+        "min_actual_qty_product": min_actual_qty_product,
+        "min_actual_qty_value": min_actual_qty_value,
+        "max_reject_product": max_reject_product,
+        "max_reject_value": max_reject_value,
+        "min_reject_product": min_reject_product,
+        "min_reject_value": min_reject_value,
+        "dpu": dpu,
+        "dpmo": dpmo,
+        "sigma": sigma
+    }
+
+
+# Kode grup untuk satu atau beberapa kunci; kombinasi kunci yang tidak muncul di seleksi
+# tidak ikut (kode dipadatkan dengan np.unique)
+def _group_codes(cube, keys):
+    codes, uniques = _factorize(cube[keys[0]])
+    if len(keys) == 1:
+        return codes, pd.Index(uniques, name=keys[0])
+    other_codes, other_uniques = _factorize(cube[keys[1]])
+    valid = (codes >= 0) & (other_codes >= 0)
+    combined = np.where(valid, codes * len(other_uniques) + other_codes, -1)
+    present, inverse = np.unique(combined[valid], return_inverse=True)
+    codes = np.full(len(cube), -1, dtype=np.intp)
+    codes[valid] = inverse
+    index = pd.MultiIndex.from_arrays([uniques[present // len(other_uniques)], other_uniques[present % len(other_uniques)]],
+                                      names=keys)
+    return codes, index
+
+
+# DPU, DPMO dan sigma level per mesin, per produk, per pasangan mesin-produk dan per tanggal
+# untuk cube terpilih, semuanya lewat np.bincount dan tabel sigma (tanpa loop per grup).
+# None kalau dataset tidak punya kolom REJECT.
+def sigma_breakdown(cube, opportunities=None):
+    if "REJECT" not in cube.columns:
+        return None
+    values = {
+        "ACTUAL_QTY": np.nan_to_num(cube["ACTUAL_QTY"].to_numpy(dtype=float)),
+        "REJECT": np.nan_to_num(cube["REJECT"].to_numpy(dtype=float)),
+        "OPPORTUNITIES": _cell_opportunities(cube, opportunities),
+    }
+    result = {}
+    for name, keys in SIGMA_LEVELS.items():
+        codes, index = _group_codes(cube, keys)
+        valid = codes >= 0
+        sums = {column: np.bincount(codes[valid], weights=v[valid], minlength=len(index)) for column, v in values.items()}
+        units = sums["ACTUAL_QTY"] + sums["REJECT"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dpu = np.where(units != 0, sums["REJECT"] / units * 100, 0.0)
+            dpmo = np.where(sums["OPPORTUNITIES"] != 0, sums["REJECT"] / sums["OPPORTUNITIES"] * 1_000_000, 0.0)
+        result[name] = pd.DataFrame({"ACTUAL_QTY": sums["ACTUAL_QTY"], "REJECT": sums["REJECT"], "UNITS": units,
+                                     "OPPORTUNITIES": sums["OPPORTUNITIES"], "DPU": dpu, "DPMO": dpmo,
+                                     "SIGMA": sigma_level(dpmo)}, index=index)
+    return result
+
+
+# Fungsi untuk data grafik (khusus Production), dari hasil aggregate()
+def graph_data(agg):
+    distribusi_produk = agg["product"][["ACTUAL_QTY"]].copy()
+    distribusi_produk["PERCENT"] = distribusi_produk["ACTUAL_QTY"] / distribusi_produk["ACTUAL_QTY"].sum()
+
+    hasil_utama = distribusi_produk[distribusi_produk["PERCENT"] >= 0.01]
+    hasil_lainnya = distribusi_produk[distribusi_produk["PERCENT"] < 0.01]
+
+    if not hasil_lainnya.empty:
+        total_lainnya = hasil_lainnya["ACTUAL_QTY"].sum()
+        hasil_utama.loc["Lainnya"] = [total_lainnya, total_lainnya / distribusi_produk["ACTUAL_QTY"].sum()]
+
+    data = {
+        "distribusi_produk": hasil_utama.sort_values(by="ACTUAL_QTY", ascending=False),
+        "produksi_produk": agg["product"]["ACTUAL_QTY"].sort_values(ascending=True),
+    }
+
+    if "REJECT" in agg["product"].columns:
+        reject_mesin = agg["mesin"][["REJECT"]].sort_values(by="REJECT", ascending=False)
+        reject_mesin["CUMSUM"] = reject_mesin["REJECT"].cumsum()
+        reject_mesin["CUMPCT"] = 100 * reject_mesin["CUMSUM"] / reject_mesin["REJECT"].sum()
+
+        reject_produk = agg["product"][["REJECT"]].sort_values(by="REJECT", ascending=False)
+        reject_produk["CUMSUM"] = reject_produk["REJECT"].cumsum()
+        reject_produk["CUMPCT"] = 100 * reject_produk["CUMSUM"] / reject_produk["REJECT"].sum()
+
+        data["reject_mesin"] = reject_mesin
+        data["reject_produk"] = reject_produk
+        data["reject_trend"] = agg["tanggal"]["REJECT"].reset_index()
+
+    return data
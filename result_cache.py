@@ -0,0 +1,138 @@
+# Cache hasil perhitungan per seleksi filter
+#
+# Hasil calculate_metrics / agregasi grafik disimpan dengan key hash kanonik dari seleksi
+# filter (tahun, bulan, mesin, produk, rentang tanggal). Jumlah entri (dan opsional total
+# ukurannya) dibatasi dengan LRU, dan semua entri sebuah dataset dibuang saat datasetnya
+# naik ke versi yang lebih baru. Session yang masih memakai versi lama dilayani tanpa
+# cache supaya tidak membuang entri versi terbaru.
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Batas total ukuran cache hasil bersama (lihat `results`): posisi baris tabel per
+# pencarian/sort sebesar seleksi, jadi jumlah entri saja tidak cukup membatasi memori
+RESULTS_BYTES = 256 * 1024 * 1024
+# Jumlah versi lama yang diingat per dataset untuk mengenali session basi
+_MAX_RETIRED = 16
+
+
+# Hash kanonik seleksi: urutan pilihan di multiselect tidak berpengaruh
+def selection_key(years, months, mesin, product, start_date, end_date):
+    payload = [
+        sorted(int(y) for y in years),
+        sorted(int(m) for m in months),
+        sorted(str(m) for m in mesin),
+        sorted(str(p) for p in product),
+        pd.Timestamp(start_date).isoformat(),
+        pd.Timestamp(end_date).isoformat(),
+    ]
+    return hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+
+
+# Perkiraan ukuran hasil di memori: array numpy, objek pandas, figure plotly (lewat data
+# trace-nya), dan dict/list/tuple berisi nilai-nilai tersebut
+def nbytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        # deep=True: kolom string/object dihitung dengan isinya, bukan hanya pointer-nya
+        return int(np.sum(value.memory_usage(index=True, deep=True)))
+    if isinstance(value, pd.Index):
+        return value.memory_usage(deep=True)
+    if hasattr(value, "to_plotly_json"):
+        return nbytes(value.to_plotly_json())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(nbytes(key) + nbytes(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(nbytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    def __init__(self, maxsize=128, maxbytes=None, sizeof=len):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._versions = {}
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    # Versi (lineage, jumlah baris) lebih baru dari versi yang di-cache: baris bertambah di
+    # lineage yang sama, atau lineage yang belum pernah digantikan
+    def _is_newer(self, dataset, version):
+        current = self._versions.get(dataset)
+        if current is None:
+            return True
+        if version in self._retired.get(dataset, ()):
+            return False
+        return current[0] != version[0] or current[1] < version[1]
+
+    # True kalau `version` adalah versi yang di-cache untuk dataset ini (setelah entri versi
+    # lama dibuang); False untuk versi yang sudah digantikan
+    def _check_version(self, dataset, version):
+        current = self._versions.get(dataset)
+        if current == version:
+            return True
+        if not self._is_newer(dataset, version):
+            return False
+        for key in [key for key in self._entries if key[0] == dataset]:
+            self._remove(key)
+        if current is not None:
+            retired = self._retired.setdefault(dataset, OrderedDict())
+            retired[current] = None
+            while len(retired) > _MAX_RETIRED:
+                retired.popitem(last=False)
+        self._versions[dataset] = version
+        return True
+
+    def _remove(self, key):
+        self._entries.pop(key)
+        self.nbytes -= self._sizes.pop(key, 0)
+
+    def _over_budget(self):
+        return len(self._entries) > self.maxsize or (self.maxbytes is not None and self.nbytes > self.maxbytes)
+
+    # Ambil hasil dari cache, atau hitung dengan compute() lalu simpan
+    def get_or_compute(self, dataset, version, name, key, compute):
+        entry_key = (dataset, name, key)
+        with self._lock:
+            if self._check_version(dataset, version) and entry_key in self._entries:
+                self._entries.move_to_end(entry_key)
+                self.hits += 1
+                return self._entries[entry_key]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            # Versi basi, atau dataset berganti versi selama compute() berjalan: jangan simpan
+            if self._versions.get(dataset) == version and entry_key not in self._entries:
+                self._entries[entry_key] = value
+                if self.maxbytes is not None:
+                    self._sizes[entry_key] = self.sizeof(value)
+                    self.nbytes += self._sizes[entry_key]
+                # Entri terbaru tetap disimpan walaupun sendirian melebihi maxbytes
+                while len(self._entries) > 1 and self._over_budget():
+                    self._remove(next(iter(self._entries)))
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._versions.clear()
+            self._retired.clear()
+            self.nbytes = 0
+
+
+# Satu cache untuk seluruh proses, dipakai bersama oleh semua session
+results = ResultCache(maxbytes=RESULTS_BYTES, sizeof=nbytes)
@@ -0,0 +1,105 @@
+# Skema tipe data per sheet untuk DataFrame hasil load
+#
+# read_excel menghasilkan string penuh untuk kolom berulang (mesin, produk, material) dan
+# int64/float64 untuk angka. Di sini kolom string dijadikan categorical (kode integer +
+# daftar kategori terurut) dan kolom angka diperkecil ke tipe terkecil yang masih memuat
+# semua nilainya tanpa kehilangan presisi.
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Jenis kolom:
+#   "category": string berulang -> categorical
+#   "integer":  bilangan bulat -> integer terkecil yang muat (float kalau ada nilai kosong)
+#   "float":    angka desimal -> float32 kalau lossless, selain itu float64
+DATE_PARTS = {"YEARS": "integer", "MONTH": "integer", "DAYS": "integer"}
+
+# Skema per workbook (nama file tanpa ekstensi); kolom turunan TANGGAL berlaku untuk semua
+SCHEMAS = {
+    "Production": {
+        "MESIN": "category",
+        "NAMA_PRODUCT": "category",
+        "TARGET_QTY": "integer",
+        "REJECT": "integer",
+        "ACTUAL_QTY": "integer",
+    },
+    "Used": {
+        "NAMA_PRODUCT": "category",
+        "MESIN": "category",
+        "NAMA_MATERIAL": "category",
+        "JUMLAH": "float",
+    },
+}
+
+
+def _float(values):
+    if values.dtype.kind not in "iuf":
+        return values
+    compact = values.astype(np.float32)
+    if np.array_equal(compact.to_numpy(np.float64), values.to_numpy(np.float64), equal_nan=True):
+        return compact
+    return values.astype(np.float64)
+
+
+def _integer(values):
+    if values.dtype.kind not in "iuf":
+        return values
+    if values.isna().any():
+        return _float(values)
+    # Nilai float yang semuanya bulat juga ikut jadi integer
+    return pd.to_numeric(values, downcast="integer")
+
+
+def _category(values):
+    return values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype("category")
+
+
+CONVERTERS = {"category": _category, "integer": _integer, "float": _float}
+
+
+def columns(name):
+    return {**DATE_PARTS, **SCHEMAS.get(name, {})}
+
+
+# Terapkan skema workbook `name` ke df (kolom yang tidak ada di df dilewati)
+def apply(df, name):
+    for column, kind in columns(name).items():
+        if column in df.columns:
+            df[column] = CONVERTERS[kind](df[column])
+    return df
+
+
+# pd.concat yang mempertahankan kolom categorical walaupun daftar kategorinya berbeda
+# (mis. produk baru di baris append); tanpa ini kolom berubah jadi string biasa
+def concat(frames):
+    df = pd.concat(frames, ignore_index=True)
+    for column in df.columns:
+        parts = [frame[column] for frame in frames if column in frame.columns]
+        if len(parts) == len(frames) and all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            try:
+                df[column] = union_categoricals(parts, sort_categories=True)
+            except TypeError:
+                # Tipe kategori berbeda (mis. part yang kolomnya kosong semua)
+                df[column] = df[column].astype("category")
+    return df
+
+
+# Tipe data sebelum skema: string biasa dan angka 64-bit seperti hasil read_excel
+def widen(df):
+    wide = {}
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            wide[column] = values.astype(values.cat.categories.dtype)
+        elif values.dtype.kind in "iu":
+            wide[column] = values.astype(np.int64)
+        elif values.dtype.kind == "f":
+            wide[column] = values.astype(np.float64)
+        else:
+            wide[column] = values
+    return pd.DataFrame(wide)
+
+
+# Ukuran memori (byte) frame sebelum dan sesudah skema
+def memory_report(df):
+    return int(widen(df).memory_usage(deep=True).sum()), int(df.memory_usage(deep=True).sum())
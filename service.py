@@ -0,0 +1,195 @@
+# Lapisan data dan KPI dashboard tanpa Streamlit
+#
+# Dipakai bersama oleh halaman Streamlit (Home.py) dan API HTTP (api.py): sumber data,
+# snapshot dataset dari watcher, backend query, dan perhitungan KPI per seleksi filter.
+# Semua hasil disimpan di result_cache.results dengan key yang sama, jadi di satu proses
+# halaman dan API saling memakai hasil yang sudah dihitung.
+#
+# Seleksi filter (filters) selalu tuple (years, months, mesin, product, start_date, end_date)
+# seperti yang dikembalikan sidebar dashboard.
+import backend
+import metrics
+import result_cache
+import spc
+import usage
+import watcher
+
+# Sumber data per halaman: satu workbook, direktori, atau pola glob (mis. "Source/Production"
+# berisi satu workbook per bulan). Sheet None = gabungkan semua sheet di setiap workbook.
+PRODUCTION_SOURCE, PRODUCTION_SHEET = "Source/Production.xlsx", "Sheet1"
+USED_SOURCE, USED_SHEET = "Source/Used.xlsx", "Sheet1"
+# Backend query (lihat backend.py): "pandas" (semua di memori), "sqlite" atau "duckdb"
+# (data di file database, filter dan agregasi dijalankan di engine)
+DATA_BACKEND = "pandas"
+
+DATASETS = ["Production", "Used"]
+FILTER_COLUMNS = ["YEARS", "MONTH", "MESIN", "NAMA_PRODUCT"]
+
+
+# Struktur turunan yang dihitung watcher sebelum snapshot baru dipakai session. Join
+# pemakaian material butuh kedua dataset, jadi dihitung dengan snapshot dataset lain yang
+# sedang dipakai (kalau sudah di-load).
+def prepare_production(df, version):
+    data = backend.get(DATA_BACKEND, "Production", df, version)
+    data.prepare(["cube"])
+    spc.get_stats(data, version)
+    used = _current("Used")
+    if used is not None:
+        usage.get_join(data, version, get_data("Used", *used), used[1])
+
+
+def prepare_used(df, version):
+    data = backend.get(DATA_BACKEND, "Used", df, version)
+    data.prepare(["materials"])
+    production = _current("Production")
+    if production is not None:
+        usage.get_join(get_data("Production", *production), production[1], data, version)
+
+
+def _source(name):
+    if name == "Production":
+        return PRODUCTION_SOURCE, PRODUCTION_SHEET, prepare_production
+    if name == "Used":
+        return USED_SOURCE, USED_SHEET, prepare_used
+    raise KeyError(name)
+
+
+def _current(name):
+    source, sheet_name, _ = _source(name)
+    return watcher.current(source, sheet_name)
+
+
+# Snapshot (df, versi) terbaru sebuah dataset; load pertama di proses ini dilakukan di
+# pemanggil, perubahan berikutnya di-load thread watcher
+def snapshot(name):
+    source, sheet_name, prepare = _source(name)
+    return watcher.snapshot(source, sheet_name, prepare, name)
+
+
+# Backend query untuk snapshot dataset. Hanya snapshot terbaru yang boleh memperbarui store
+# SQL; session yang masih memakai snapshot lama membaca versinya sendiri.
+def get_data(name, df, version):
+    current = _current(name)
+    return backend.get(DATA_BACKEND, name, df, version, sync=current is None or current[1] == version)
+
+
+def date_bounds(name, data, version):
+    return result_cache.results.get_or_compute(name, version, "date_bounds", None, data.date_bounds)
+
+
+# Nilai yang bisa dipilih per kolom filter (YEARS dan MONTH sebagai int), sekali per versi
+def filter_options(name, data, version):
+    def compute():
+        options = {column: list(data.options(column)) for column in FILTER_COLUMNS}
+        options["YEARS"] = [int(y) for y in options["YEARS"]]
+        options["MONTH"] = [int(m) for m in options["MONTH"]]
+        return options
+    return result_cache.results.get_or_compute(name, version, "filter_options", None, compute)
+
+
+# Pilihan filter bertingkat: nilai `column` yang masih punya data untuk pilihan kolom
+# sebelumnya (`selected`: kolom -> nilai terpilih), mis. produk yang pernah dibuat di mesin
+# terpilih. Kolom yang semua nilainya terpilih tidak membatasi, jadi seleksi default
+# langsung memakai filter_options; seleksi lain di-cache per versi.
+def dependent_options(name, data, version, column, selected):
+    options = filter_options(name, data, version)
+    narrowing = {other: values for other, values in selected.items() if not set(options[other]).issubset(values)}
+    if not narrowing:
+        return options[column]
+
+    def compute():
+        values = data.dependent_options(column, narrowing)
+        return [int(value) for value in values] if column in ("YEARS", "MONTH") else list(values)
+    key = tuple((other, tuple(sorted(str(value) for value in values))) for other, values in narrowing.items())
+    return result_cache.results.get_or_compute(name, version, f"options:{column}", key, compute)
+
+
+# Seleksi "semua terpilih" (default sidebar) untuk dataset
+def default_filters(name, data, version):
+    options = filter_options(name, data, version)
+    start_date, end_date = date_bounds(name, data, version)
+    return (options["YEARS"], options["MONTH"], options["MESIN"], options["NAMA_PRODUCT"],
+            start_date.date(), end_date.date())
+
+
+def selection_key(filters):
+    return result_cache.selection_key(*filters)
+
+
+# Baris mentah terpilih (tabel, ekspor). Backend SQL menjalankan SELECT * untuk seluruh
+# seleksi, jadi hasilnya di-cache per seleksi; backend pandas hanya memotong DataFrame di
+# memori lewat filter index, jadi tidak perlu (dan tidak ikut memenuhi cache).
+def selected_rows(name, data, version, filters, selection):
+    if isinstance(data, backend.PandasBackend):
+        return data.rows(filters)
+    return result_cache.results.get_or_compute(name, version, "rows", selection, lambda: data.rows(filters))
+
+
+# Cube harian (TANGGAL x MESIN x NAMA_PRODUCT) untuk seleksi; ikut di-cache supaya backend
+# SQL tidak di-query ulang untuk seleksi yang sama
+def production_cube(data, version, filters, selection):
+    return result_cache.results.get_or_compute(
+        "Production", version, "cube", selection, lambda: data.production_cube(filters))
+
+
+# Agregasi (sekali untuk metrik dan semua grafik) di-cache per seleksi filter
+def production_aggregate(version, cube_selection, selection):
+    return result_cache.results.get_or_compute(
+        "Production", version, "aggregate", selection, lambda: metrics.aggregate(cube_selection))
+
+
+# `opportunities` dari metrics.load_opportunities() ikut menjadi bagian key cache
+def production_metrics(version, cube_selection, agg, selection, opportunities):
+    return result_cache.results.get_or_compute(
+        "Production", version, "metrics", (selection, tuple(sorted(opportunities.items()))),
+        lambda: metrics.calculate_metrics(cube_selection, agg, opportunities))
+
+
+def production_sigma(version, cube_selection, selection, opportunities):
+    return result_cache.results.get_or_compute(
+        "Production", version, "sigma", (selection, tuple(sorted(opportunities.items()))),
+        lambda: metrics.sigma_breakdown(cube_selection, opportunities))
+
+
+def production_graphs(version, agg, selection):
+    return result_cache.results.get_or_compute(
+        "Production", version, "graphs", selection, lambda: metrics.graph_data(agg))
+
+
+def material_summary(data, version, filters, selection, material_list):
+    return result_cache.results.get_or_compute(
+        "Used", version, "materials", (selection, tuple(material_list or ())),
+        lambda: data.material_summary(filters, material_list))
+
+
+# Statistik SPC seluruh histori (lihat spc.py), dari jumlah harian backend query dan
+# diperbarui incremental saat append. None kalau dataset tidak punya kolom REJECT.
+def production_spc(data, version):
+    return spc.get_stats(data, version)
+
+
+# Mesin ("mesin") atau produk ("product") terpilih yang melanggar aturan Western Electric
+# di rentang tanggal seleksi
+def out_of_control(stats, version, level, filters, selection):
+    keys = filters[2] if level == "mesin" else filters[3]
+    return result_cache.results.get_or_compute(
+        "Production", version, f"out_of_control:{level}", selection,
+        lambda: spc.out_of_control(stats[level], keys, filters[4], filters[5]))
+
+
+# Join pemakaian material x output produksi (lihat usage.py) untuk backend query kedua
+# dataset: (DataFrame join, versi join). Ringkasan harian diagregasi backend masing-masing
+# dataset; join-nya sendiri kecil dan selalu DataFrame di memori.
+def usage_join(production_data, production_version, used_data, used_version):
+    return usage.get_join(production_data, production_version, used_data, used_version)
+
+
+def get_usage_data(joined, version):
+    return backend.PandasBackend("Usage", joined, version)
+
+
+# Kg per unit per (kelompok, material) untuk baris join terpilih
+def usage_summary(rows, version, selection, grouping, names):
+    return result_cache.results.get_or_compute(
+        "Usage", version, f"usage:{grouping}", (selection, tuple(names)),
+        lambda: usage.summarize(rows, grouping, names))
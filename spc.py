@@ -0,0 +1,372 @@
+# Statistik harian dan control chart (SPC) per mesin dan per produk (khusus Production)
+#
+# Untuk setiap level ("mesin", "product") seri harian ACTUAL_QTY/REJECT semua mesin/produk
+# disimpan sebagai matriks hari x seri beserta prefix sum-nya. Dari prefix sum, setiap hari
+# cukup dihitung dengan beberapa selisih: rata-rata bergulir, reject rate bergulir, center
+# line dan batas Laney p'-chart/u'-chart, lalu aturan Western Electric dari z-score beberapa
+# hari terakhir. Saat workbook hanya di-append, baris baru dijumlahkan ke matriks dan hanya hari
+# yang berubah (hari terakhir lama + hari baru) yang dihitung ulang, jadi biaya per hari
+# tambahan konstan berapa pun panjang historinya.
+#
+# Setiap versi dataset punya SeriesStats sendiri: append menghasilkan objek baru yang
+# mengambil alih matriks (hari baru ditulis di belakang kapasitas), dan objek lama
+# menyimpan salinan baris hari terakhirnya yang ikut berubah, jadi session yang masih
+# memakai versi lama tetap melihat statistik versinya sendiri.
+#
+# Center line hari t adalah reject rate BASELINE_DAYS hari sebelumnya (tanpa hari t).
+# Reject harian overdispersed (variasi antar hari jauh lebih besar dari binomial/Poisson
+# untuk jumlah unit sebesar ini), jadi batas binomial biasa menandai lebih dari separuh hari.
+# Karena itu dipakai chart Laney: z binomial/Poisson z_t = (rate - CL) / σ_t dengan σ_t dari
+# jumlah unit (ACTUAL_QTY + REJECT) hari itu, lalu σ_z = rata-rata moving range z (antar hari
+# berproduksi berurutan seri itu) di jendela baseline / 1.128. Batasnya CL ± 3·σ_t·σ_z dan
+# aturan dibaca dari z / σ_z. Hari tanpa produksi tidak punya titik dan memutus run aturan 2-4.
+import threading
+
+import numpy as np
+import pandas as pd
+
+LEVELS = {"mesin": "MESIN", "product": "NAMA_PRODUCT"}
+# Jendela rata-rata/reject rate bergulir dan baseline center line (dalam hari produksi pabrik)
+ROLL_DAYS = 7
+BASELINE_DAYS = 30
+# Minimal hari berproduksi di baseline sebelum batas kontrol dihitung
+MIN_BASELINE_DAYS = 5
+# Bit aturan Western Electric di kolom RULES
+RULES = {
+    1: "1 titik di luar 3σ",
+    2: "2 dari 3 titik di luar 2σ (sisi sama)",
+    4: "4 dari 5 titik di luar 1σ (sisi sama)",
+    8: "8 titik berturut-turut di satu sisi CL",
+}
+# Jumlah hari sebelumnya yang dibaca aturan Western Electric
+_RULE_LOOKBACK = 7
+
+_INPUTS = ["qty", "reject"]
+# Kolom baris mentah yang dijumlahkan per hari
+_MEASURES = ["ACTUAL_QTY", "REJECT"]
+_PREFIX = ["cum_units", "cum_reject", "cum_qty", "cum_active", "cum_p_mr", "cum_p_mr_n", "cum_u_mr", "cum_u_mr_n"]
+_DERIVED = ["rate", "roll_qty", "roll_rate", "cl", "p_ucl", "p_lcl", "u_ucl", "u_lcl", "p_sigma_z", "u_sigma_z", "z"]
+# z binomial/Poisson sebelum dibagi σ_z, dan z terakhir yang terhingga sampai hari itu
+# (untuk moving range antar hari berproduksi)
+_INTERNAL = ["p_z_raw", "u_z_raw", "p_z_last", "u_z_last"]
+# d2 untuk moving range dua titik
+_D2 = 1.128
+
+# Statistik per lineage dataset: lineage -> {jumlah baris mentah: {level: SeriesStats}},
+# hanya _MAX_VERSIONS versi terbaru per lineage
+_stats = {}
+_lock = threading.Lock()
+_MAX_LINEAGES = 4
+_MAX_VERSIONS = 2
+
+
+class RebuildRequired(Exception):
+    pass
+
+
+class SeriesStats:
+    def __init__(self, column):
+        self.column = column
+        self.lock = threading.Lock()
+        # Tanggal dan matriks berkapasitas (dua kali lipat saat penuh) supaya append tidak
+        # menyalin histori; yang terisi hanya n_days baris pertama
+        self.dates = np.empty(0, dtype="datetime64[ns]")
+        self.keys = []
+        self._columns = {}
+        self.n_days = 0
+        self._arrays = {name: np.zeros((0, 0)) for name in _INPUTS + _DERIVED + _INTERNAL}
+        self._arrays["rules"] = np.zeros((0, 0), dtype=np.uint8)
+        # Prefix sum punya satu baris nol di depan: cum[t + 1] = jumlah hari 0..t
+        self._prefix = {name: np.zeros((1, 0)) for name in _PREFIX}
+        # (baris pertama, {statistik: baris}) yang disalin sebelum versi berikutnya menimpanya
+        self._frozen = None
+        # Matriks sudah diambil alih versi berikutnya (append hanya boleh sekali per objek)
+        self._superseded = False
+
+    # Matriks hari x seri yang terisi untuk satu statistik ("qty", "rate", "rules", ...)
+    def array(self, name):
+        array = self._arrays[name][:self.n_days, :len(self.keys)]
+        if self._frozen is not None:
+            row, saved = self._frozen
+            array = np.concatenate([array[:row], saved[name]])
+        return array
+
+    # Objek versi berikutnya yang memakai matriks yang sama
+    def _successor(self):
+        updated = SeriesStats(self.column)
+        updated.dates = self.dates
+        updated.keys = list(self.keys)
+        updated._columns = dict(self._columns)
+        updated.n_days = self.n_days
+        updated._arrays = dict(self._arrays)
+        updated._prefix = dict(self._prefix)
+        return updated
+
+    def _reserve(self, n_days, n_series):
+        capacity, width = self._arrays["qty"].shape
+        if n_days <= capacity and n_series <= width:
+            return
+        if n_days > capacity:
+            capacity = max(n_days, capacity * 2, 16)
+        width = max(n_series, width)
+        dates = np.empty(capacity, dtype=self.dates.dtype)
+        dates[:len(self.dates)] = self.dates
+        self.dates = dates
+        for name, array in self._arrays.items():
+            grown = np.full((capacity, width), 0 if name in (*_INPUTS, "rules") else np.nan, dtype=array.dtype)
+            grown[:array.shape[0], :array.shape[1]] = array
+            self._arrays[name] = grown
+        for name, array in self._prefix.items():
+            grown = np.zeros((capacity + 1, width))
+            grown[:array.shape[0], :array.shape[1]] = array
+            self._prefix[name] = grown
+
+    # Statistik setelah jumlah harian (TANGGAL, kunci, ACTUAL_QTY, REJECT) dari baris mentah
+    # baru ditambahkan, sebagai objek baru; objek ini tetap berisi versi lama. Tanggal baru
+    # harus >= hari terakhir yang sudah ada (seperti append di ingest); kalau tidak, atau
+    # objek ini sudah pernah di-append, RebuildRequired.
+    def add(self, daily):
+        dates = daily["TANGGAL"].to_numpy(dtype="datetime64[ns]")
+        if not len(dates):
+            return self
+        unique = np.unique(dates)
+        old_days = self.n_days
+        if old_days:
+            last = self.dates[old_days - 1]
+            if unique[0] < last:
+                raise RebuildRequired()
+            unique = unique[unique > last]
+        keys = daily[self.column].tolist()
+
+        with self.lock:
+            if self._superseded:
+                raise RebuildRequired()
+            self._superseded = True
+        updated = self._successor()
+        for key in dict.fromkeys(key for key in keys if key not in updated._columns):
+            updated._columns[key] = len(updated.keys)
+            updated.keys.append(key)
+        updated.n_days = old_days + len(unique)
+        # Seri baru menambah lebar, jadi matriks dialokasikan ulang dan tidak lagi dipakai bersama
+        updated._reserve(updated.n_days, len(updated.keys))
+        updated.dates[old_days:updated.n_days] = unique
+
+        rows = np.searchsorted(updated.dates[:updated.n_days], dates)
+        start = int(rows.min())
+        # Kolom seri baru sebelum hari `start` sudah benar dari nilai awal alokasi (0/NaN)
+        with self.lock:
+            if start < old_days and updated._arrays["qty"] is self._arrays["qty"]:
+                self._frozen = (start, {name: array[start:old_days, :len(self.keys)].copy()
+                                        for name, array in self._arrays.items()})
+            columns = np.array([updated._columns[key] for key in keys], dtype=np.intp)
+            np.add.at(updated._arrays["qty"], (rows, columns), np.nan_to_num(daily["ACTUAL_QTY"].to_numpy(dtype=float)))
+            np.add.at(updated._arrays["reject"], (rows, columns), np.nan_to_num(daily["REJECT"].to_numpy(dtype=float)))
+            updated._recompute(start)
+        return updated
+
+    def _accumulate(self, name, start, values):
+        prefix = self._prefix[name]
+        prefix[start + 1:start + 1 + len(values), :values.shape[1]] = prefix[start, :values.shape[1]] + np.cumsum(values, axis=0)
+
+    # Hitung ulang prefix sum dan statistik turunan untuk hari start..akhir
+    def _recompute(self, start):
+        end = self.n_days
+        width = len(self.keys)
+        qty = self._arrays["qty"][start:end, :width]
+        reject = self._arrays["reject"][start:end, :width]
+        units = qty + reject
+        for name, values in (("cum_units", units), ("cum_reject", reject), ("cum_qty", qty),
+                             ("cum_active", (units > 0).astype(float))):
+            self._accumulate(name, start, values)
+
+        t = np.arange(start, end)[:, None]
+
+        def window(name, lo, hi):
+            prefix = self._prefix[name][:, :width]
+            return prefix[hi, np.arange(width)] - prefix[np.maximum(lo, 0), np.arange(width)]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = np.where(units > 0, reject / units, np.nan)
+            roll_active = window("cum_active", t + 1 - ROLL_DAYS, t + 1)
+            roll_qty = np.where(roll_active > 0, window("cum_qty", t + 1 - ROLL_DAYS, t + 1) / roll_active, np.nan)
+            roll_units = window("cum_units", t + 1 - ROLL_DAYS, t + 1)
+            roll_rate = np.where(roll_units > 0, window("cum_reject", t + 1 - ROLL_DAYS, t + 1) / roll_units, np.nan)
+
+            base_units = window("cum_units", t - BASELINE_DAYS, t)
+            base_active = window("cum_active", t - BASELINE_DAYS, t)
+            cl = np.where((base_active >= MIN_BASELINE_DAYS) & (base_units > 0),
+                          window("cum_reject", t - BASELINE_DAYS, t) / base_units, np.nan)
+            cl = np.where(units > 0, cl, np.nan)
+            derived = {"rate": rate, "roll_qty": roll_qty, "roll_rate": roll_rate, "cl": cl}
+            for kind, sigma in (("p", np.sqrt(cl * (1 - cl) / units)), ("u", np.sqrt(cl / units))):
+                z_raw, sigma_z = self._laney(kind, start, cl, rate, sigma, t, window)
+                derived[f"{kind}_sigma_z"] = sigma_z
+                derived[f"{kind}_ucl"] = cl + 3 * sigma * sigma_z
+                derived[f"{kind}_lcl"] = np.maximum(cl - 3 * sigma * sigma_z, 0)
+                if kind == "p":
+                    derived["p_ucl"] = np.minimum(derived["p_ucl"], 1)
+                    # σ_z = 0 (z baseline konstan, mis. CL = 0): setiap selisih dari CL berada
+                    # di luar batas
+                    z = np.where(sigma_z > 0, z_raw / sigma_z,
+                                 np.where(z_raw == 0, 0.0, np.sign(z_raw) * np.inf))
+                    derived["z"] = np.where(np.isnan(sigma_z), np.nan, z)
+
+        for name, values in derived.items():
+            self._arrays[name][start:end, :width] = values
+
+        lo = max(start - _RULE_LOOKBACK, 0)
+        rules = _western_electric(self._arrays["z"][lo:end, :width])
+        self._arrays["rules"][start:end, :width] = rules[start - lo:]
+
+    # z binomial/Poisson hari start..akhir dan faktor Laney σ_z dari moving range z di jendela
+    # baseline (hari sebelum t). Moving range dihitung antar hari berproduksi berurutan seri
+    # itu; titik dengan z tak hingga (CL = 0) tidak ikut.
+    def _laney(self, kind, start, cl, rate, sigma, t, window):
+        width = rate.shape[1]
+        # CL = 0 (baseline tanpa reject): setiap reject berada di atas UCL = 0
+        z_raw = np.where(sigma > 0, (rate - cl) / sigma, np.where(rate > cl, np.inf, 0.0))
+        z_raw = np.where(np.isnan(cl), np.nan, z_raw)
+        finite = np.isfinite(z_raw)
+
+        last_before = (self._arrays[f"{kind}_z_last"][start - 1, :width] if start
+                       else np.full(width, np.nan))
+        z_last = pd.DataFrame(np.vstack([last_before, np.where(finite, z_raw, np.nan)])).ffill().to_numpy()
+        previous, z_last = z_last[:-1], z_last[1:]
+        has_range = finite & np.isfinite(previous)
+        self._accumulate(f"cum_{kind}_mr", start, np.where(has_range, np.abs(z_raw - previous), 0.0))
+        self._accumulate(f"cum_{kind}_mr_n", start, has_range.astype(float))
+        self._arrays[f"{kind}_z_raw"][start:start + len(z_raw), :width] = z_raw
+        self._arrays[f"{kind}_z_last"][start:start + len(z_raw), :width] = z_last
+
+        ranges = window(f"cum_{kind}_mr_n", t - BASELINE_DAYS, t)
+        sigma_z = np.where((ranges >= MIN_BASELINE_DAYS - 1) & ~np.isnan(cl),
+                           window(f"cum_{kind}_mr", t - BASELINE_DAYS, t) / ranges / _D2, np.nan)
+        return z_raw, sigma_z
+
+    # Baris hari [lo, hi) untuk rentang tanggal inklusif
+    def date_slice(self, start_date, end_date):
+        dates = self.dates[:self.n_days]
+        return (np.searchsorted(dates, pd.Timestamp(start_date).to_datetime64(), "left"),
+                np.searchsorted(dates, pd.Timestamp(end_date).to_datetime64(), "right"))
+
+
+# Jumlah True di k baris terakhir (termasuk baris itu sendiri) per kolom
+def _trailing_sum(flags, k):
+    cum = np.vstack([np.zeros((1, flags.shape[1])), np.cumsum(flags, axis=0)])
+    hi = np.arange(1, len(flags) + 1)
+    return cum[hi] - cum[np.maximum(hi - k, 0)]
+
+
+# Bit aturan Western Electric per titik dari z-score (NaN = tidak ada titik)
+def _western_electric(z):
+    rules = np.zeros(z.shape, dtype=np.uint8)
+    with np.errstate(invalid="ignore"):
+        rules |= (np.abs(z) > 3).astype(np.uint8)
+        for bit, limit, k, needed in ((2, 2, 3, 2), (4, 1, 5, 4)):
+            for side in (z > limit, z < -limit):
+                rules |= (side & (_trailing_sum(side, k) >= needed)).astype(np.uint8) * bit
+        for side in (z > 0, z < 0):
+            rules |= (_trailing_sum(side, 8) >= 8).astype(np.uint8) * 8
+    return rules
+
+
+# Jumlah harian per (TANGGAL, kunci level) dari baris mentah
+def _daily(rows, column):
+    grouped = rows.groupby(["TANGGAL", column], observed=True, sort=False)[_MEASURES].sum()
+    return grouped.reset_index()
+
+
+def build(df):
+    return {level: SeriesStats(column).add(_daily(df, column)) for level, column in LEVELS.items()}
+
+
+# Statistik untuk dataset pada versi tertentu, dari jumlah harian backend query `data` (lihat
+# backend.py), jadi dengan backend SQL baris mentah tidak dibaca di Python; None kalau
+# dataset tidak punya kolom REJECT. Kalau versi baru hanya menambah baris, statistik versi
+# sebelumnya diperbarui dari baris tambahan saja. Versi yang lebih lama dari yang tersimpan
+# dihitung tanpa menimpa cache.
+def get_stats(data, version):
+    if "REJECT" not in data.columns:
+        return None
+    lineage, rows = version
+    with _lock:
+        versions = _stats.get(lineage, {})
+        stats = versions.get(rows)
+        base = max((n for n in versions if n < rows), default=None)
+        base_stats = versions.get(base)
+    if stats is not None:
+        return stats
+
+    if base_stats is not None:
+        try:
+            stats = {level: base_stats[level].add(data.daily_sums([column], _MEASURES, base, rows))
+                     for level, column in LEVELS.items()}
+        except RebuildRequired:
+            stats = None
+    if stats is None:
+        stats = {level: SeriesStats(column).add(data.daily_sums([column], _MEASURES, 0, rows))
+                 for level, column in LEVELS.items()}
+
+    with _lock:
+        versions = _stats.pop(lineage, {})
+        stats = versions.setdefault(rows, stats)
+        for n in sorted(versions)[:-_MAX_VERSIONS]:
+            del versions[n]
+        _stats[lineage] = versions
+        while len(_stats) > _MAX_LINEAGES:
+            del _stats[next(iter(_stats))]
+    return stats
+
+
+# Seri harian satu mesin/produk pada rentang tanggal: hanya hari berproduksi, kolom untuk
+# grafik (RATE, ROLL_RATE, CL, batas p/u-chart, RULES)
+def chart(series, key, start_date, end_date):
+    with series.lock:
+        if key not in series._columns:
+            return pd.DataFrame(columns=["ACTUAL_QTY", "REJECT", *(name.upper() for name in _DERIVED), "RULES"])
+        column = series._columns[key]
+        lo, hi = series.date_slice(start_date, end_date)
+        frame = pd.DataFrame({
+            "ACTUAL_QTY": series.array("qty")[lo:hi, column],
+            "REJECT": series.array("reject")[lo:hi, column],
+            **{name.upper(): series.array(name)[lo:hi, column] for name in _DERIVED},
+            "RULES": series.array("rules")[lo:hi, column],
+        }, index=pd.DatetimeIndex(series.dates[lo:hi], name="TANGGAL"))
+    return frame[frame["ACTUAL_QTY"] + frame["REJECT"] > 0]
+
+
+# Mesin/produk (dari `keys`) yang punya pelanggaran aturan di sisi atas CL (reject rate
+# naik; sinyal di bawah CL adalah perbaikan) di rentang tanggal: jumlah hari melanggar per
+# aturan, tanggal pelanggaran terakhir, dan reject rate/CL hari itu; urut jumlah hari
+# melanggar terbanyak
+def out_of_control(series, keys, start_date, end_date):
+    with series.lock:
+        keys = [key for key in keys if key in series._columns]
+        columns = np.array([series._columns[key] for key in keys], dtype=np.intp)
+        lo, hi = series.date_slice(start_date, end_date)
+        rules = series.array("rules")[lo:hi][:, columns]
+        z = series.array("z")[lo:hi][:, columns]
+        rate = series.array("rate")[lo:hi][:, columns]
+        cl = series.array("cl")[lo:hi][:, columns]
+        dates = series.dates[lo:hi]
+
+    index = pd.Index(keys, name=series.column)
+    if not len(dates):
+        return pd.DataFrame({"VIOLATION_DAYS": []}, index=index[:0])
+    # Setiap aturan hanya menandai titik di sisi yang sama dengan run-nya, jadi sisi sinyal
+    # adalah tanda z titik itu
+    with np.errstate(invalid="ignore"):
+        rules = np.where(z > 0, rules, 0)
+    violated = rules > 0
+    has = violated.any(axis=0)
+    # Baris pelanggaran terakhir per seri
+    last = len(dates) - 1 - np.argmax(violated[::-1], axis=0)
+    series_index = np.arange(len(keys))
+    result = pd.DataFrame({
+        "VIOLATION_DAYS": violated.sum(axis=0),
+        **{f"RULE_{bit}": ((rules & bit) > 0).sum(axis=0) for bit in RULES},
+        "LAST_VIOLATION": dates[last],
+        "LAST_RATE": rate[last, series_index],
+        "LAST_CL": cl[last, series_index],
+    }, index=index)
+    return result[has].sort_values(["VIOLATION_DAYS", "LAST_VIOLATION"], ascending=False, kind="stable")
@@ -0,0 +1,39 @@
+# Tabel data per halaman (pagination) dengan sort dan pencarian di server
+#
+# Yang dikirim ke browser hanya baris di halaman yang sedang dilihat, jadi ukuran payload
+# tidak ikut membesar dengan jumlah baris seleksi. Urutan baris setelah pencarian dan sort
+# disimpan sebagai array posisi, tanpa menyalin frame.
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = [25, 50, 100, 250, 500]
+DEFAULT_PAGE_SIZE = 100
+
+
+# Posisi baris (iloc) yang cocok dengan pencarian, dalam urutan sort yang diminta
+def row_positions(df, sort_by=None, ascending=True, search_column=None, query=""):
+    positions = np.arange(len(df))
+    if search_column and query:
+        values = df[search_column]
+        if not pd.api.types.is_string_dtype(values.dtype):
+            # Angka, tanggal, dan kategori dicari lewat teks yang tampil di tabel
+            values = values.astype(str)
+        mask = values.str.contains(query, case=False, regex=False, na=False)
+        positions = positions[mask.to_numpy()]
+    if sort_by:
+        keys = df[sort_by].iloc[positions].reset_index(drop=True)
+        # Sort stabil: baris dengan nilai sama tetap dalam urutan aslinya, kosong di akhir
+        order = keys.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+        positions = positions[order]
+    return positions
+
+
+def page_count(n_rows, page_size):
+    return max((n_rows + page_size - 1) // page_size, 1)
+
+
+# Baris untuk satu halaman (page mulai dari 1)
+def page(df, positions, page_number, page_size, columns=None):
+    start = (page_number - 1) * page_size
+    rows = df.iloc[positions[start:start + page_size]]
+    return rows[columns] if columns else rows
@@ -0,0 +1,211 @@
+# Pemakaian material per unit produksi: join Used.JUMLAH dengan Production.ACTUAL_QTY
+#
+# Kedua dataset diringkas per hari lewat backend query (backend.daily_sums, jadi dengan
+# backend SQL penjumlahan berjalan di engine): Production menjadi jumlah ACTUAL_QTY per
+# (TANGGAL, MESIN, NAMA_PRODUCT), Used menjadi jumlah JUMLAH per (TANGGAL, MESIN,
+# NAMA_PRODUCT, material). Kunci (TANGGAL, MESIN, NAMA_PRODUCT) diubah menjadi satu kode
+# int64 (nomor hari + kode categorical di kamus gabungan kedua dataset), lalu di-join dengan
+# sort-merge (np.searchsorted) tanpa membandingkan string. Hasilnya satu baris per (sel harian, material) dengan JUMLAH dan
+# ACTUAL_QTY sel tersebut; baris Used tanpa produksi di sel yang sama tetap ada dengan
+# MATCHED = False dan tidak ikut dihitung di rasio per unit.
+#
+# Kedua ringkasan diperbarui incremental saat workbook di-append (seperti cube), dan join
+# disimpan per pasangan versi dataset; watcher menghitungnya sebelum snapshot baru dipakai
+# (lihat service.prepare_production/prepare_used).
+import threading
+
+import numpy as np
+import pandas as pd
+
+import cube
+import materials
+import schema
+
+KEYS = cube.KEYS
+# Pengelompokan untuk ringkasan per unit
+GROUPINGS = {
+    "product": ["NAMA_PRODUCT"],
+    "mesin": ["MESIN"],
+    "mesin_product": ["MESIN", "NAMA_PRODUCT"],
+    "tanggal": ["TANGGAL"],
+}
+
+# Ringkasan per lineage: lineage -> (jumlah baris mentah yang sudah masuk, ringkasan harian)
+_daily = {}
+_output = {}
+# Join per pasangan versi: (versi Production, versi Used) -> DataFrame
+_joins = {}
+_lock = threading.Lock()
+_MAX_LINEAGES = 4
+
+
+# JUMLAH per (TANGGAL, MESIN, NAMA_PRODUCT, kode material) untuk baris mentah Used
+# [start, stop); nama material baru ditambahkan ke `names`
+def _build_daily(data, start, stop, names):
+    sums = data.daily_sums(["MESIN", "NAMA_PRODUCT", "NAMA_MATERIAL"], ["JUMLAH"], start, stop)
+    codes, names = materials.encode(sums["NAMA_MATERIAL"], names)
+    frame = sums[KEYS].copy()
+    frame["MATERIAL"] = codes
+    frame["JUMLAH"] = sums["JUMLAH"].to_numpy(dtype=float)
+    # Penulisan nama yang berbeda (huruf besar/kecil) bisa menjadi material yang sama
+    return _regroup(frame[codes >= 0], "JUMLAH"), names
+
+
+def _regroup(frame, measure):
+    keys = [column for column in frame.columns if column != measure]
+    return frame.groupby(keys, observed=True, sort=False)[measure].sum().reset_index()
+
+
+# Ringkasan harian per lineage untuk versi tertentu: build(start, stop, lama) meringkas
+# baris mentah [start, stop) (lama = ringkasan versi sebelumnya atau None); kalau versi
+# baru hanya menambah baris, hanya baris tambahan yang diringkas lalu digabung
+def _get_summary(cache, version, build, measure):
+    lineage, rows = version
+    with _lock:
+        cached = cache.get(lineage)
+    if cached is not None and cached[0] == rows:
+        return cached[1]
+
+    if cached is not None and cached[0] < rows:
+        tail = build(cached[0], rows, cached[1])
+        summary = _regroup(schema.concat([cached[1], tail]), measure)
+        summary.attrs.update(tail.attrs)
+    else:
+        summary = build(0, rows, None)
+
+    with _lock:
+        # Session yang masih memakai versi lama tidak menimpa ringkasan versi yang lebih baru
+        current = cache.get(lineage)
+        if current is None or current[0] < rows:
+            cache[lineage] = (rows, summary)
+        while len(cache) > _MAX_LINEAGES:
+            del cache[next(iter(cache))]
+    return summary
+
+
+# Ringkasan harian Used (backend query `data`) untuk versi tertentu
+def get_daily(data, version):
+    def build(start, stop, previous):
+        names = previous.attrs["materials"] if previous is not None else pd.Index([], dtype=object)
+        daily, names = _build_daily(data, start, stop, names)
+        daily.attrs["materials"] = names
+        return daily
+    return _get_summary(_daily, version, build, "JUMLAH")
+
+
+# ACTUAL_QTY per (TANGGAL, MESIN, NAMA_PRODUCT) Production (backend query `data`)
+def get_output(data, version):
+    return _get_summary(_output, version, lambda start, stop, _: data.daily_sums(
+        ["MESIN", "NAMA_PRODUCT"], ["ACTUAL_QTY"], start, stop), "ACTUAL_QTY")
+
+
+# Kode nilai di kamus kategori bersama (-1 untuk kosong); kolom categorical cukup
+# memetakan daftar kategorinya, bukan setiap baris
+def _recode(values, dictionary):
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return dictionary.get_indexer(values)
+    codes = values.cat.codes.to_numpy()
+    mapping = np.append(dictionary.get_indexer(values.cat.categories), -1)
+    return mapping[codes]
+
+
+# Kode int64 per baris untuk kunci (TANGGAL, MESIN, NAMA_PRODUCT) dengan kamus kategori
+# bersama; -1 untuk kunci kosong
+def _key_codes(frame, dictionaries):
+    days = frame["TANGGAL"].to_numpy().astype("datetime64[D]")
+    valid = ~np.isnat(days)
+    key = np.where(valid, days.astype(np.int64), 0)
+    for column in ("MESIN", "NAMA_PRODUCT"):
+        codes = _recode(frame[column], dictionaries[column])
+        valid &= codes >= 0
+        key = key * len(dictionaries[column]) + codes
+    return np.where(valid, key, -1)
+
+
+def _categories(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.categories
+    return pd.Index(values.dropna().unique())
+
+
+# Join sort-merge ringkasan harian Used dengan output harian Production (get_output atau
+# cube harian)
+def build(production_daily, used_daily):
+    dictionaries = {
+        column: _categories(production_daily[column]).union(_categories(used_daily[column])).astype("str")
+        for column in ("MESIN", "NAMA_PRODUCT")
+    }
+    production_keys = _key_codes(production_daily, dictionaries)
+    valid = production_keys >= 0
+    # Sel unik per kunci; kalau TANGGAL punya jam berbeda di hari yang sama, dijumlahkan
+    unique_keys, inverse = np.unique(production_keys[valid], return_inverse=True)
+    output = np.bincount(inverse, weights=np.nan_to_num(production_daily["ACTUAL_QTY"].to_numpy(dtype=float)[valid]),
+                         minlength=len(unique_keys))
+
+    used_keys = _key_codes(used_daily, dictionaries)
+    positions = np.minimum(np.searchsorted(unique_keys, used_keys), max(len(unique_keys) - 1, 0))
+    matched = (used_keys >= 0) & (len(unique_keys) > 0)
+    if len(unique_keys):
+        matched &= unique_keys[positions] == used_keys
+
+    names = used_daily.attrs["materials"]
+    joined = pd.DataFrame({
+        "TANGGAL": used_daily["TANGGAL"].to_numpy(),
+        **{column: pd.Categorical.from_codes(_recode(used_daily[column], dictionaries[column]), categories=dictionaries[column])
+           for column in ("MESIN", "NAMA_PRODUCT")},
+        "NAMA_MATERIAL": pd.Categorical.from_codes(used_daily["MATERIAL"].to_numpy(),
+                                                   categories=pd.Index(names, dtype="str")),
+        "JUMLAH": used_daily["JUMLAH"].to_numpy(dtype=float),
+        "ACTUAL_QTY": np.where(matched, output[positions] if len(output) else 0.0, 0.0),
+        "MATCHED": matched,
+    })
+    joined["YEARS"] = joined["TANGGAL"].dt.year
+    joined["MONTH"] = joined["TANGGAL"].dt.month
+    return joined.sort_values("TANGGAL", kind="stable", ignore_index=True)
+
+
+# Join untuk pasangan versi Production dan Used (backend query masing-masing, di-cache);
+# versi join = pasangan versi itu
+def get_join(production, production_version, used, used_version):
+    key = (production_version, used_version)
+    with _lock:
+        cached = _joins.get(key)
+    if cached is not None:
+        return cached, key
+    joined = build(get_output(production, production_version), get_daily(used, used_version))
+    with _lock:
+        _joins[key] = joined
+        while len(_joins) > _MAX_LINEAGES:
+            del _joins[next(iter(_joins))]
+    return joined, key
+
+
+# Material (huruf besar) yang dipakai ringkasan: semua material di join, atau hanya yang
+# ada di daftar material (lihat materials.load_material_list)
+def material_names(joined, material_list=None):
+    names = list(joined["NAMA_MATERIAL"].cat.categories)
+    if material_list is None:
+        return names
+    wanted = set(materials.normalize(pd.Series(material_list, dtype="str")))
+    return [name for name in names if name in wanted]
+
+
+# Kg material per unit untuk baris join terpilih, per kelompok (lihat GROUPINGS) dan
+# material: JUMLAH dan ACTUAL_QTY dari sel yang punya produksi, KG_PER_UNIT = rasio
+# keduanya, COVERAGE = bagian JUMLAH yang ada produksinya di sel yang sama
+def summarize(rows, grouping, names=None):
+    if names is not None:
+        rows = rows[rows["NAMA_MATERIAL"].isin(names)]
+    keys = [*GROUPINGS[grouping], "NAMA_MATERIAL"]
+    matched = rows["MATCHED"].to_numpy()
+    frame = pd.DataFrame({
+        **{column: rows[column] for column in keys},
+        "JUMLAH": np.where(matched, rows["JUMLAH"].to_numpy(), 0.0),
+        "ACTUAL_QTY": rows["ACTUAL_QTY"].to_numpy(),
+        "TOTAL_JUMLAH": rows["JUMLAH"].to_numpy(),
+    })
+    summary = frame.groupby(keys, observed=True).sum()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        summary["KG_PER_UNIT"] = np.where(summary["ACTUAL_QTY"] > 0, summary["JUMLAH"] / summary["ACTUAL_QTY"], np.nan)
+        summary["COVERAGE"] = np.where(summary["TOTAL_JUMLAH"] > 0, summary["JUMLAH"] / summary["TOTAL_JUMLAH"], np.nan)
+    return summary.drop(columns="TOTAL_JUMLAH")
@@ -0,0 +1,117 @@
+# Reload dataset di background saat workbook di Source/ berubah
+#
+# Session tidak pernah mem-parse workbook sendiri: mereka membaca snapshot (df, versi)
+# yang terakhir dipublikasikan. Thread watcher memeriksa mtime/ukuran setiap workbook
+# yang terdaftar; kalau berubah, workbook di-load lewat ingest (append incremental atau
+# rebuild), struktur turunan (cube, filter index, dll.) dihitung lewat fungsi prepare,
+# lalu snapshot baru dipasang sekaligus untuk semua session. Selama proses itu session
+# tetap memakai snapshot lama.
+import logging
+import os
+import threading
+import time
+
+import ingest
+
+# Jeda antar pemeriksaan file (detik); data paling lama basi sekitar selama ini + waktu load
+POLL_SECONDS = 2.0
+
+logger = logging.getLogger(__name__)
+
+# (path, sheet) -> (df, versi) yang sedang dipakai session
+_snapshots = {}
+# (path, sheet) -> (source, sheet_name, name, prepare, stat saat snapshot dibuat)
+_sources = {}
+_lock = threading.Lock()
+_thread = None
+
+
+# mtime/ukuran semua workbook sumber (satu file, direktori, atau pola glob); file yang
+# ditambah atau dihapus dari direktori juga mengubah hasilnya
+def _stat(source):
+    stats = []
+    for file_path in ingest.expand_files(source):
+        stat = os.stat(file_path)
+        stats.append((str(file_path), stat.st_mtime_ns, stat.st_size))
+    if not stats:
+        raise FileNotFoundError(source)
+    return tuple(stats)
+
+
+# Load workbook dan hitung struktur turunannya, lalu pasang sebagai snapshot baru
+def _refresh(key, source, sheet_name, name, prepare):
+    stat = _stat(source)
+    df, version = ingest.load_versioned(source, sheet_name, name)
+    if prepare is not None:
+        prepare(df, version)
+    with _lock:
+        _snapshots[key] = (df, version)
+        _sources[key] = (source, sheet_name, name, prepare, stat)
+    return df, version
+
+
+# Snapshot terbaru sebuah dataset. `source`, `sheet_name` dan `name` diteruskan ke
+# ingest.load_versioned (workbook, direktori atau pola glob; None = semua sheet).
+# Hanya load pertama di proses ini yang dilakukan di request; perubahan berikutnya
+# di-load oleh thread watcher (lihat start()).
+def snapshot(source, sheet_name="Sheet1", prepare=None, name=None):
+    key = (os.path.abspath(source), sheet_name)
+    with _lock:
+        current = _snapshots.get(key)
+    if current is not None:
+        return current
+    return _refresh(key, source, sheet_name, name, prepare)
+
+
+# Snapshot yang sedang dipakai tanpa memicu load; None kalau belum pernah di-load
+def current(source, sheet_name="Sheet1"):
+    with _lock:
+        return _snapshots.get((os.path.abspath(source), sheet_name))
+
+
+def _record_stat(key, stat):
+    with _lock:
+        if key in _sources:
+            *rest, _ = _sources[key]
+            _sources[key] = (*rest, stat)
+
+
+def poll_once():
+    with _lock:
+        sources = list(_sources.items())
+    for key, (source, sheet_name, name, prepare, stat) in sources:
+        try:
+            current = _stat(source)
+        except OSError:
+            current = None
+        if current == stat:
+            continue
+        if current is None:
+            logger.warning("%s tidak ditemukan; snapshot lama tetap dipakai", source)
+            _record_stat(key, None)
+            continue
+        try:
+            start = time.perf_counter()
+            df, version = _refresh(key, source, sheet_name, name, prepare)
+            logger.info("reloaded %s: %d rows in %.2fs", source, len(df), time.perf_counter() - start)
+        except Exception:
+            # Mis. workbook masih ditulis: snapshot lama tetap dipakai, dicoba lagi saat
+            # file berubah lagi
+            logger.exception("reload %s gagal; snapshot lama tetap dipakai", source)
+            _record_stat(key, current)
+
+
+def _run(poll_seconds):
+    while True:
+        time.sleep(poll_seconds)
+        poll_once()
+
+
+# Jalankan thread watcher (sekali per proses)
+def start(poll_seconds=POLL_SECONDS):
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=_run, args=(poll_seconds,), name="dataset-watcher", daemon=True)
+        _thread.start()